@@ -0,0 +1 @@
+# Benchmark suite: local OpenAI stand-in and load runner for the MITRE ATT&CK application
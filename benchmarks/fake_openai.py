@@ -0,0 +1,179 @@
+"""
+Local OpenAI-compatible server for benchmarks and offline development.
+
+Implements the parts of the API the application uses: GET /v1/models,
+GET /v1/models/{model} (the health probe) and POST /v1/chat/completions,
+streamed or not, with usage reporting. Latency, streaming pace and error
+injection are configurable, and GET /stats reports how many calls were
+served and failed.
+
+    python -m benchmarks.fake_openai --port 9999 --latency 0.5 --error-rate 0.05
+    OPENAI_BASE_URL=http://127.0.0.1:9999/v1 OPENAI_API_KEY=test python main.py
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+class FakeOpenAIConfig:
+    """Behaviour of the fake server; see parse_args for the meaning of each field"""
+
+    def __init__(
+        self,
+        latency: float = 0.5,
+        jitter: float = 0.2,
+        tokens: int = 120,
+        token_interval: float = 0.005,
+        error_rate: float = 0.0,
+        error_status: int = 429,
+        retry_after: float = 1.0,
+        slow_rate: float = 0.0,
+        slow_latency: float = 10.0,
+        seed: Optional[int] = None,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.tokens = tokens
+        self.token_interval = token_interval
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.random = random.Random(seed)
+
+
+def create_app(config: FakeOpenAIConfig) -> FastAPI:
+    app = FastAPI(title="Fake OpenAI")
+    stats = {"calls": 0, "streamed": 0, "errors": 0, "slow": 0, "model_lookups": 0, "started": time.time()}
+
+    def delay() -> float:
+        if config.slow_rate and config.random.random() < config.slow_rate:
+            stats["slow"] += 1
+            return config.slow_latency
+        return max(0.0, config.latency * (1 + config.random.uniform(-config.jitter, config.jitter)))
+
+    def completion_text(prompt: str) -> str:
+        words = prompt.split() or ["procedure"]
+        return " ".join(words[i % len(words)] for i in range(config.tokens))
+
+    def usage(prompt: str) -> dict:
+        prompt_tokens = max(1, len(prompt) // 4)
+        return {"prompt_tokens": prompt_tokens, "completion_tokens": config.tokens, "total_tokens": prompt_tokens + config.tokens}
+
+    @app.get("/v1/models")
+    async def list_models():
+        return {"object": "list", "data": [{"id": "gpt-3.5-turbo", "object": "model", "created": 0, "owned_by": "fake"}]}
+
+    @app.get("/v1/models/{model}")
+    async def retrieve_model(model: str):
+        stats["model_lookups"] += 1
+        return {"id": model, "object": "model", "created": 0, "owned_by": "fake"}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        stats["calls"] += 1
+        if config.error_rate and config.random.random() < config.error_rate:
+            stats["errors"] += 1
+            headers = {"Retry-After": f"{config.retry_after:g}"} if config.error_status == 429 else {}
+            return JSONResponse(
+                {"error": {"message": "Injected error", "type": "fake_error", "code": config.error_status}},
+                status_code=config.error_status,
+                headers=headers,
+            )
+
+        prompt = body["messages"][-1]["content"]
+        model = body.get("model", "gpt-3.5-turbo")
+        text = completion_text(prompt)
+        created = int(time.time())
+
+        if not body.get("stream"):
+            await asyncio.sleep(delay())
+            return {
+                "id": f"chatcmpl-fake-{stats['calls']}",
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+                "usage": usage(prompt),
+            }
+
+        stats["streamed"] += 1
+        include_usage = bool((body.get("stream_options") or {}).get("include_usage"))
+
+        def chunk(delta: dict, finish_reason: Optional[str] = None, **extra) -> str:
+            payload = {
+                "id": f"chatcmpl-fake-{stats['calls']}",
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+                **extra,
+            }
+            return f"data: {json.dumps(payload)}\n\n"
+
+        async def events():
+            await asyncio.sleep(delay())
+            for word in text.split(" "):
+                yield chunk({"content": word + " "})
+                if config.token_interval:
+                    await asyncio.sleep(config.token_interval)
+            yield chunk({}, "stop")
+            if include_usage:
+                yield f"data: {json.dumps({'id': 'usage', 'object': 'chat.completion.chunk', 'created': created, 'model': model, 'choices': [], 'usage': usage(prompt)})}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.get("/stats")
+    async def get_stats():
+        return {**stats, "uptime": time.time() - stats["started"]}
+
+    return app
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible server with configurable latency and errors")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9999)
+    parser.add_argument("--latency", type=float, default=0.5, help="seconds before the response (or first token)")
+    parser.add_argument("--jitter", type=float, default=0.2, help="latency varies uniformly by +/- this fraction")
+    parser.add_argument("--tokens", type=int, default=120, help="completion length in words")
+    parser.add_argument("--token-interval", type=float, default=0.005, help="seconds between streamed chunks")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of calls that fail")
+    parser.add_argument("--error-status", type=int, default=429, help="status code of injected failures")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds sent with 429s")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="fraction of calls that take --slow-latency (tail latency)")
+    parser.add_argument("--slow-latency", type=float, default=10.0, help="latency of slow calls in seconds")
+    parser.add_argument("--seed", type=int, default=None)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    import uvicorn
+
+    args = parse_args(argv)
+    config = FakeOpenAIConfig(
+        latency=args.latency,
+        jitter=args.jitter,
+        tokens=args.tokens,
+        token_interval=args.token_interval,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        retry_after=args.retry_after,
+        slow_rate=args.slow_rate,
+        slow_latency=args.slow_latency,
+        seed=args.seed,
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
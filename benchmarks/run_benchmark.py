@@ -0,0 +1,426 @@
+"""
+Load test the application against a local OpenAI stand-in.
+
+Boots benchmarks/fake_openai.py and main.py (with throwaway feedback, cache
+and log files) on free local ports, then drives a weighted mix of catalog,
+search, feedback and procedure requests with a fixed number of closed-loop
+clients per concurrency level. Throughput and p50/p95/p99 latency are
+reported per endpoint and saved as JSON; --baseline compares the run with an
+earlier result and flags regressions. Nothing leaves the machine.
+
+    python -m benchmarks.run_benchmark --mix mixed --concurrency 1,8,32 --duration 20
+    python -m benchmarks.run_benchmark --baseline benchmarks/results/<earlier>.json --fail-on-regression
+    python -m benchmarks.run_benchmark --url http://127.0.0.1:8000 --mix browse   # an already running server
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(REPO_ROOT, "benchmarks", "results")
+RESULT_FORMAT = 1
+
+# Operation weights per traffic mix
+MIXES: Dict[str, Dict[str, int]] = {
+    "browse": {"catalog_list": 25, "catalog_tactics": 10, "technique_detail": 25, "search": 25, "facets": 15},
+    "feedback": {"feedback_submit": 50, "feedback_list": 30, "feedback_stats": 20},
+    "generate": {"procedure_generate": 60, "procedure_stream": 40},
+    "mixed": {
+        "catalog_list": 12, "catalog_tactics": 5, "technique_detail": 13, "search": 15, "facets": 10,
+        "feedback_submit": 15, "feedback_list": 5, "feedback_stats": 5,
+        "procedure_generate": 12, "procedure_stream": 8,
+    },
+}
+
+SEARCH_TERMS = ["credential", "powershell", "phishing", "registry", "cloud", "lateral", "exfiltration", "dump", "token", "remote ser"]
+PLATFORM_VALUES = ["Windows", "Linux", "macOS", "IaaS", "SaaS", "Containers", "Network Devices"]
+STRIDE_VALUES = ["Spoofing", "Tampering", "Repudiation", "Information Disclosure", "Denial of Service", "Elevation of Privilege"]
+CIA_VALUES = ["Confidentiality", "Integrity", "Availability"]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return 0.0
+    rank = min(len(sorted_values), max(1, math.ceil(fraction * len(sorted_values))))
+    return sorted_values[rank - 1]
+
+
+def git_revision() -> Dict[str, object]:
+    def git(*args: str) -> str:
+        try:
+            return subprocess.run(["git", *args], cwd=REPO_ROOT, capture_output=True, text=True, timeout=10).stdout.strip()
+        except (OSError, subprocess.SubprocessError):
+            return ""
+    return {"commit": git("rev-parse", "--short", "HEAD"), "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+
+class ServerProcess:
+    """A child process that serves HTTP on a local port, logging to a file"""
+
+    def __init__(self, name: str, args: List[str], env: Dict[str, str], log_path: str):
+        self.name = name
+        self.log_path = log_path
+        self.log_file = open(log_path, "w")
+        self.process = subprocess.Popen(
+            args, cwd=REPO_ROOT, env=env, stdout=self.log_file, stderr=subprocess.STDOUT
+        )
+
+    def wait_ready(self, url: str, timeout: float = 60.0):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if self.process.poll() is not None:
+                break
+            try:
+                if httpx.get(url, timeout=2.0).status_code < 500:
+                    return
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.2)
+        self.stop()
+        with open(self.log_path) as file:
+            tail = file.read()[-2000:]
+        raise RuntimeError(f"{self.name} did not become ready at {url}:\n{tail}")
+
+    def stop(self):
+        if self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        self.log_file.close()
+
+
+class Workload:
+    """Builds the requests for each operation from data fetched from the app under test"""
+
+    def __init__(self, client: httpx.AsyncClient, seed: int):
+        self.client = client
+        self.random = random.Random(seed)
+        self.techniques: List[Dict[str, str]] = []
+
+    async def prepare(self):
+        unique = {}
+        offset, total = 0, None
+        while total is None or offset < total:
+            response = await self.client.get("/api/techniques/", params={
+                "fields": "Technique_ID,Technique_Name", "offset": offset, "limit": 1000,
+            })
+            response.raise_for_status()
+            page = response.json()
+            total = page["total"]
+            offset += page["limit"]
+            for row in page["techniques"]:
+                unique.setdefault(row["Technique_ID"], row)
+        self.techniques = list(unique.values())
+        if not self.techniques:
+            raise RuntimeError("The catalog under test is empty")
+
+    def technique(self) -> Dict[str, str]:
+        return self.random.choice(self.techniques)
+
+    async def run(self, operation: str) -> Tuple[bool, Optional[float]]:
+        """Perform one operation; returns (succeeded, time to first token for streams)"""
+        client = self.client
+        if operation == "catalog_list":
+            response = await client.get("/api/techniques/", params={"limit": 1000})
+        elif operation == "catalog_tactics":
+            response = await client.get("/api/techniques/tactics")
+        elif operation == "technique_detail":
+            response = await client.get(f"/api/techniques/{self.technique()['Technique_ID']}")
+        elif operation == "search":
+            response = await client.get("/api/search/", params={"q": self.random.choice(SEARCH_TERMS), "limit": 20})
+        elif operation == "facets":
+            response = await client.get("/api/facets/", params={
+                "platform": self.random.sample(PLATFORM_VALUES, self.random.randint(0, 2)),
+                "stride": self.random.sample(STRIDE_VALUES, self.random.randint(0, 2)),
+                "cia": self.random.choice(CIA_VALUES),
+                "include_subtechniques": "false",
+            })
+        elif operation == "feedback_submit":
+            response = await client.post("/api/feedback/", json={
+                "technique": self.technique()["Technique_Name"],
+                "stride": self.random.choice(STRIDE_VALUES),
+                "cia": self.random.choice(CIA_VALUES),
+                "feedback_type": self.random.choice(["thumbs_up", "thumbs_down"]),
+                "sid": f"S-1-5-21-{self.random.randint(1000, 9999)}",
+                "comment": "benchmark",
+            })
+        elif operation == "feedback_list":
+            response = await client.get("/api/feedback/", params={"limit": 100})
+        elif operation == "feedback_stats":
+            response = await client.get("/api/feedback/stats")
+        elif operation == "procedure_generate":
+            response = await client.post("/api/procedure/generate", json={"technique_id": self.technique()["Technique_ID"]})
+        elif operation == "procedure_stream":
+            return await self.stream_procedure()
+        else:
+            raise ValueError(f"Unknown operation: {operation}")
+        return response.status_code < 400, None
+
+    async def stream_procedure(self) -> Tuple[bool, Optional[float]]:
+        technique_id = self.technique()["Technique_ID"]
+        start = time.perf_counter()
+        first_token = None
+        ok = False
+        async with self.client.stream("POST", "/api/procedure/generate/stream", json={"technique_id": technique_id}) as response:
+            if response.status_code >= 400:
+                await response.aread()
+                return False, None
+            async for line in response.aiter_lines():
+                if line == "event: token" and first_token is None:
+                    first_token = time.perf_counter() - start
+                elif line == "event: done":
+                    ok = True
+                elif line == "event: error":
+                    ok = False
+        return ok, first_token
+
+
+async def run_level(
+    base_url: str, mix: Dict[str, int], concurrency: int, duration: float, warmup: float, seed: int
+) -> Dict[str, object]:
+    """Drive one concurrency level for warmup + duration seconds; only the measured window is reported"""
+    limits = httpx.Limits(max_connections=concurrency * 2, max_keepalive_connections=concurrency * 2)
+    samples: Dict[str, List[float]] = {}
+    errors: Dict[str, int] = {}
+    operations, weights = list(mix), list(mix.values())
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120.0) as client:
+        workload = Workload(client, seed)
+        await workload.prepare()
+        measure_from = time.perf_counter() + warmup
+        stop_at = measure_from + duration
+
+        async def worker(worker_id: int):
+            rng = random.Random(seed * 1000 + worker_id)
+            while time.perf_counter() < stop_at:
+                operation = rng.choices(operations, weights)[0]
+                start = time.perf_counter()
+                try:
+                    ok, first_token = await workload.run(operation)
+                except httpx.HTTPError:
+                    ok, first_token = False, None
+                end = time.perf_counter()
+                if start < measure_from or end > stop_at:
+                    continue
+                samples.setdefault(operation, []).append(end - start)
+                if not ok:
+                    errors[operation] = errors.get(operation, 0) + 1
+                if first_token is not None:
+                    samples.setdefault(f"{operation}_ttft", []).append(first_token)
+
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+
+    endpoints = {}
+    for operation, latencies in sorted(samples.items()):
+        latencies.sort()
+        endpoints[operation] = {
+            "count": len(latencies),
+            "errors": errors.get(operation, 0),
+            "throughput": len(latencies) / duration,
+            "p50_ms": percentile(latencies, 0.50) * 1000,
+            "p95_ms": percentile(latencies, 0.95) * 1000,
+            "p99_ms": percentile(latencies, 0.99) * 1000,
+            "mean_ms": sum(latencies) / len(latencies) * 1000,
+            "max_ms": latencies[-1] * 1000,
+        }
+    requests = sum(e["count"] for name, e in endpoints.items() if not name.endswith("_ttft"))
+    return {
+        "concurrency": concurrency,
+        "duration": duration,
+        "requests": requests,
+        "errors": sum(errors.values()),
+        "throughput": requests / duration,
+        "endpoints": endpoints,
+    }
+
+
+def compare(result: dict, baseline: dict, tolerance: float) -> List[str]:
+    """Human-readable regressions: p95 up or throughput down by more than tolerance"""
+    regressions = []
+    baseline_levels = {level["concurrency"]: level for level in baseline.get("results", [])}
+    for level in result["results"]:
+        base_level = baseline_levels.get(level["concurrency"])
+        if base_level is None:
+            continue
+        for operation, stats in level["endpoints"].items():
+            base = base_level["endpoints"].get(operation)
+            if base is None:
+                continue
+            if base["p95_ms"] and stats["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+                regressions.append(
+                    f"c={level['concurrency']} {operation}: p95 {base['p95_ms']:.1f} -> {stats['p95_ms']:.1f} ms"
+                )
+            if not operation.endswith("_ttft") and stats["throughput"] < base["throughput"] * (1 - tolerance):
+                regressions.append(
+                    f"c={level['concurrency']} {operation}: throughput {base['throughput']:.1f} -> {stats['throughput']:.1f}/s"
+                )
+    return regressions
+
+
+def print_level(level: dict, baseline_level: Optional[dict]):
+    print(f"[i] concurrency {level['concurrency']}: {level['requests']} requests, "
+          f"{level['throughput']:.1f}/s, {level['errors']} errors")
+    print(f"    {'endpoint':<24}{'count':>7}{'err':>5}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}  vs baseline p95")
+    for operation, stats in level["endpoints"].items():
+        delta = ""
+        base = (baseline_level or {}).get("endpoints", {}).get(operation)
+        if base and base["p95_ms"]:
+            delta = f"{(stats['p95_ms'] / base['p95_ms'] - 1) * 100:+.0f}%"
+        print(f"    {operation:<24}{stats['count']:>7}{stats['errors']:>5}{stats['throughput']:>9.1f}"
+              f"{stats['p50_ms']:>9.1f}{stats['p95_ms']:>9.1f}{stats['p99_ms']:>9.1f}  {delta}")
+
+
+def start_servers(args: argparse.Namespace, workdir: str) -> Tuple[str, List[ServerProcess]]:
+    """Start the fake OpenAI server and the app; returns the app URL and the processes to stop"""
+    fake_port, app_port = free_port(), free_port()
+    env = {**os.environ, "PYTHONUNBUFFERED": "1"}
+    fake = ServerProcess("fake OpenAI server", [
+        sys.executable, "-m", "benchmarks.fake_openai", "--port", str(fake_port),
+        "--latency", str(args.llm_latency), "--jitter", str(args.llm_jitter), "--tokens", str(args.llm_tokens),
+        "--token-interval", str(args.llm_token_interval), "--error-rate", str(args.llm_error_rate),
+        "--error-status", str(args.llm_error_status), "--slow-rate", str(args.llm_slow_rate),
+        "--slow-latency", str(args.llm_slow_latency), "--seed", str(args.seed),
+    ], env, os.path.join(workdir, "fake_openai.log"))
+    servers = [fake]
+    try:
+        fake.wait_ready(f"http://127.0.0.1:{fake_port}/v1/models")
+        app_env = {
+            **env,
+            "OPENAI_API_KEY": "benchmark",
+            "OPENAI_BASE_URL": f"http://127.0.0.1:{fake_port}/v1",
+            "FEEDBACK_DB": os.path.join(workdir, "feedback.db"),
+            "FEEDBACK_CSV": os.path.join(workdir, "feedback.csv"),
+            "LLM_CACHE_DB": os.path.join(workdir, "llm_cache.db"),
+            "LOG_FILE": os.path.join(workdir, "app.log"),
+            "LOG_CONSOLE": "false",
+        }
+        if args.app_workers > 1:
+            # Several workers share app.log; size-based rotation is single-process only
+            app_env["LOG_MAX_BYTES"] = "0"
+        for spec in args.app_env:
+            key, _, value = spec.partition("=")
+            app_env[key] = value
+        app = ServerProcess("application", [
+            sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(app_port),
+            "--log-level", "warning", "--workers", str(args.app_workers),
+        ], app_env, os.path.join(workdir, "app_stdout.log"))
+        servers.append(app)
+        app.wait_ready(f"http://127.0.0.1:{app_port}/api/techniques/tactics")
+    except Exception:
+        for server in servers:
+            server.stop()
+        raise
+    return f"http://127.0.0.1:{app_port}", servers
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the application against a local OpenAI stand-in")
+    parser.add_argument("--mix", choices=sorted(MIXES), default="mixed", help="traffic mix")
+    parser.add_argument("--concurrency", default="1,8,32", help="comma separated client counts, one level each")
+    parser.add_argument("--duration", type=float, default=15.0, help="measured seconds per level")
+    parser.add_argument("--warmup", type=float, default=2.0, help="unmeasured seconds before each level")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--url", help="benchmark this running server instead of starting one")
+    parser.add_argument("--app-workers", type=int, default=1, help="uvicorn workers for the started app")
+    parser.add_argument("--app-env", action="append", default=[], metavar="KEY=VALUE",
+                        help="extra environment for the started app, e.g. FEEDBACK_BACKEND=csv")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="fake upstream latency in seconds")
+    parser.add_argument("--llm-jitter", type=float, default=0.2)
+    parser.add_argument("--llm-tokens", type=int, default=120)
+    parser.add_argument("--llm-token-interval", type=float, default=0.002)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--llm-error-status", type=int, default=429)
+    parser.add_argument("--llm-slow-rate", type=float, default=0.0, help="fraction of upstream calls that are very slow")
+    parser.add_argument("--llm-slow-latency", type=float, default=5.0)
+    parser.add_argument("--output", help="result JSON path (default: benchmarks/results/<time>-<commit>.json)")
+    parser.add_argument("--baseline", help="earlier result JSON to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression vs the baseline")
+    parser.add_argument("--fail-on-regression", action="store_true", help="exit 1 when a regression is found")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    levels = [int(c) for c in args.concurrency.split(",") if c.strip()]
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)
+    baseline_levels = {level["concurrency"]: level for level in (baseline or {}).get("results", [])}
+
+    result = {
+        "format": RESULT_FORMAT,
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git": git_revision(),
+        "host": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "config": {
+            key: value for key, value in vars(args).items()
+            if key not in ("output", "baseline", "fail_on_regression", "tolerance")
+        },
+        "results": [],
+    }
+
+    with tempfile.TemporaryDirectory(prefix="mitre-bench-") as workdir:
+        servers: List[ServerProcess] = []
+        base_url = args.url
+        if not base_url:
+            base_url, servers = start_servers(args, workdir)
+            print(f"[+] Started fake OpenAI server and application at {base_url} (work dir {workdir})")
+        try:
+            for concurrency in levels:
+                level = asyncio.run(run_level(base_url, MIXES[args.mix], concurrency, args.duration, args.warmup, args.seed))
+                result["results"].append(level)
+                print_level(level, baseline_levels.get(concurrency))
+        finally:
+            for server in reversed(servers):
+                server.stop()
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{result['git']['commit'] or 'nogit'}-{args.mix}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as file:
+        json.dump(result, file, indent=2)
+    print(f"[+] Saved results to {output}")
+
+    if baseline is not None:
+        differing = sorted(
+            key for key, value in result["config"].items()
+            if key in baseline.get("config", {}) and baseline["config"][key] != value and key not in ("concurrency", "url")
+        )
+        if differing:
+            print(f"[!] Baseline was run with different settings ({', '.join(differing)}); deltas may not be comparable")
+        regressions = compare(result, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"[!] Regression: {regression}")
+        if not regressions:
+            print(f"[+] No regressions beyond {args.tolerance:.0%} vs {args.baseline}")
+        if regressions and args.fail_on_regression:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
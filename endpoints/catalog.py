@@ -0,0 +1,53 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+
+from utils.catalog import CATALOG_CSV, CATALOG_WATCH_INTERVAL, current_catalog_version, reload_catalog
+from utils.admin import require_admin
+from utils.logger import app_logger
+
+# Create router for catalog administration endpoints
+router = APIRouter(prefix="/api/catalog", tags=["catalog"])
+
+def log_reload(result: dict):
+    """Log a completed reload (shared with the file watcher)"""
+    errors = f", listener errors: {'; '.join(result['errors'])}" if result["errors"] else ""
+    app_logger.log_system(
+        f"Reloaded technique catalog: version {result['previous_version']} -> {result['version']}, "
+        f"{result['rows']} rows, {result['changed_techniques']} technique(s) changed, "
+        f"{result['seconds']}s{errors}",
+        "WARNING" if errors else "INFO"
+    )
+
+@router.get("/")
+async def catalog_version():
+    """The catalog version being served, where it was loaded from and what is built on it"""
+    return {
+        **current_catalog_version().info(),
+        "csv": CATALOG_CSV,
+        "watch_interval": CATALOG_WATCH_INTERVAL
+    }
+
+@router.post("/reload", dependencies=[Depends(require_admin)])
+async def reload(force: bool = False):
+    """
+    Reload mitre.csv without restarting this worker
+
+    The new catalog and its search, facet and graph indexes are built off the
+    event loop while requests keep using the current version, then swapped in
+    at once. Cached procedure examples are dropped only for techniques whose
+    name or description changed. Each worker holds its own catalog: with
+    several workers, enable CATALOG_WATCH_INTERVAL so every one of them reloads.
+    A reload costs a full parse and index rebuild, so it requires the
+    X-Admin-Token header (see ADMIN_TOKEN).
+
+    Args:
+        force: Rebuild even if the CSV looks unchanged
+    """
+    try:
+        result = await run_in_threadpool(reload_catalog, CATALOG_CSV, force)
+    except Exception as e:
+        app_logger.log_error("POST", "/api/catalog/reload", e)
+        raise HTTPException(status_code=500, detail=f"Error reloading catalog: {str(e)}")
+    if result["reloaded"]:
+        log_reload(result)
+    return result
@@ -0,0 +1,55 @@
+from typing import List
+
+from fastapi import APIRouter, Query
+
+from utils.facets import MATCH_ALL, MATCH_ANY, get_facet_index_async
+
+# Create router for faceted filtering endpoints
+router = APIRouter(prefix="/api/facets", tags=["facets"])
+
+def parse_values(values: List[str]) -> List[str]:
+    """Accept both ?stride=a&stride=b and ?stride=a,b"""
+    return [v.strip() for value in values for v in value.split(",") if v.strip()]
+
+@router.get("/")
+async def query_facets(
+    platform: List[str] = Query([]),
+    matrix: List[str] = Query([]),
+    tactic: List[str] = Query([]),
+    stride: List[str] = Query([]),
+    cia: List[str] = Query([]),
+    platform_match: str = Query(MATCH_ANY, pattern=f"^({MATCH_ANY}|{MATCH_ALL})$"),
+    include_subtechniques: bool = True,
+    breakdown: bool = False
+):
+    """
+    Filter the catalog by platform, matrix, tactic ID, STRIDE and CIA in one call
+
+    Args:
+        platform, matrix, tactic, stride, cia: Selected values, repeated or comma separated (case-insensitive)
+        platform_match: "any" (default) or "all" of the selected platforms
+        include_subtechniques: Set to false to drop dotted sub-technique IDs
+        breakdown: Add per-tactic STRIDE / CIA counts of the matching rows
+
+    Returns:
+        Matching technique IDs (each once, in catalog order), the number of
+        matching rows, and for every facet value the number of rows the result
+        would have with that value selected as well
+    """
+    selections = {
+        "platform": parse_values(platform),
+        "matrix": parse_values(matrix),
+        "tactic": parse_values(tactic),
+        "stride": parse_values(stride),
+        "cia": parse_values(cia),
+    }
+    result = (await get_facet_index_async()).query(
+        selections,
+        match={"platform": platform_match},
+        include_subtechniques=include_subtechniques,
+        breakdown=breakdown
+    )
+    return {
+        "selected": {facet: values for facet, values in selections.items() if values},
+        **result
+    }
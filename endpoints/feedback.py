@@ -1,23 +1,40 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import iterate_in_threadpool, run_in_threadpool
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+import asyncio
+import base64
+import binascii
 import csv
+import io
+import json
 import os
+import zlib
 from datetime import datetime
 import uuid
-import sys
-from dotenv import load_dotenv
 
-# Load environment variables from .env file
-load_dotenv()
-
-# Add the utils directory to the path so we can import the logger
-sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'utils'))
-from logger import app_logger
+from utils.admin import require_admin
+from utils.logger import app_logger
+from utils.feedback_store import FEEDBACK_COLUMNS, FEEDBACK_FIELDS, get_feedback_store, to_row
+from utils.static_assets import choose_encoding
 
 # Create router for feedback endpoints
 router = APIRouter(prefix="/api/feedback", tags=["feedback"])
 
+# Page size limits for feedback listing
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Export configuration - loaded from environment variables or defaults
+FEEDBACK_EXPORT_GZIP_LEVEL = int(os.getenv("FEEDBACK_EXPORT_GZIP_LEVEL", "6"))
+
+# Export format -> (media type, file extension)
+EXPORT_FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+}
+
 # Feedback model
 class FeedbackItem(BaseModel):
     technique: str
@@ -38,36 +55,9 @@ class FeedbackResponse(BaseModel):
     comment: str
     message: str
 
-# CSV file path - loaded from environment variable or default
-FEEDBACK_CSV = os.getenv("FEEDBACK_CSV", "feedback.csv")
-
-def ensure_csv_exists():
-    """Ensure feedback.csv exists with headers"""
-    if not os.path.exists(FEEDBACK_CSV):
-        with open(FEEDBACK_CSV, 'w', newline='', encoding='utf-8') as file:
-            writer = csv.writer(file)
-            writer.writerow(['ID', 'Technique', 'STRIDE', 'CIA', 'Feedback Type', 'SID', 'Comment', 'Timestamp'])
-
-def append_feedback_to_csv(feedback_data: dict):
-    """Append feedback to CSV file"""
-    ensure_csv_exists()
-    
-    with open(FEEDBACK_CSV, 'a', newline='', encoding='utf-8') as file:
-        writer = csv.writer(file)
-        writer.writerow([
-            feedback_data['id'],
-            feedback_data['technique'],
-            feedback_data['stride'],
-            feedback_data['cia'],
-            feedback_data['feedback_type'],
-            feedback_data.get('sid', ''),  # Include SID
-            feedback_data.get('comment', ''),  # Include comment
-            feedback_data['timestamp']
-        ])
-
 @router.post("/", response_model=FeedbackResponse)
 async def submit_feedback(feedback: FeedbackItem):
-    """Submit feedback and save to CSV"""
+    """Submit feedback and save it to the feedback store"""
     try:
         # Generate unique ID and timestamp
         feedback_id = f"fb_{int(datetime.now().timestamp())}_{uuid.uuid4().hex[:8]}"
@@ -85,8 +75,8 @@ async def submit_feedback(feedback: FeedbackItem):
             'timestamp': timestamp
         }
         
-        # Append to CSV
-        append_feedback_to_csv(feedback_data)
+        # Queue for the store's next group commit and wait until it is durable
+        await asyncio.wrap_future(get_feedback_store().submit(feedback_data))
         
         # Log successful feedback submission
         app_logger.log_feedback("SUBMIT", feedback.technique, feedback.feedback_type, True)
@@ -108,47 +98,187 @@ async def submit_feedback(feedback: FeedbackItem):
         app_logger.log_feedback("SUBMIT", feedback.technique, feedback.feedback_type, False)
         raise HTTPException(status_code=500, detail=f"Error saving feedback: {str(e)}")
 
+def encode_cursor(record: dict) -> str:
+    """Opaque cursor pointing just past record in (timestamp, id) order"""
+    payload = json.dumps([record["timestamp"], record["id"]]).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii")
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    try:
+        timestamp, feedback_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return str(timestamp), str(feedback_id)
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def feedback_filters(technique, feedback_type, stride, cia, sid) -> dict:
+    """Exact-match filters that were actually supplied"""
+    filters = {
+        "technique": technique,
+        "feedback_type": feedback_type,
+        "stride": stride,
+        "cia": cia,
+        "sid": sid,
+    }
+    return {field: value for field, value in filters.items() if value is not None}
+
 @router.get("/")
-async def get_feedback():
-    """Get all feedback from CSV"""
+async def get_feedback(
+    technique: Optional[str] = None,
+    feedback_type: Optional[str] = None,
+    stride: Optional[str] = None,
+    cia: Optional[str] = None,
+    sid: Optional[str] = None,
+    since: Optional[str] = Query(None, description="Inclusive ISO timestamp lower bound"),
+    until: Optional[str] = Query(None, description="Exclusive ISO timestamp upper bound"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)
+):
+    """
+    Get one page of feedback, oldest first, optionally filtered
+
+    Returns at most limit records (100 by default) and a next_cursor to pass
+    as cursor for the following page, None on the last one. Clients that
+    expect the whole history in one response should follow next_cursor or
+    use /export, which streams every matching record.
+    """
     try:
-        if not os.path.exists(FEEDBACK_CSV):
-            app_logger.log_feedback("GET", "ALL", "N/A", True)
-            return {"feedback": []}
-        
-        feedback_list = []
-        with open(FEEDBACK_CSV, 'r', newline='', encoding='utf-8') as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                feedback_list.append(row)
+        filters = feedback_filters(technique, feedback_type, stride, cia, sid)
+        after = decode_cursor(cursor) if cursor else None
+        # Fetch one extra record to learn whether another page exists
+        records = await run_in_threadpool(
+            get_feedback_store().query, filters, since, until, after, limit + 1
+        )
+        next_cursor = encode_cursor(records[limit - 1]) if len(records) > limit else None
+        feedback_list = [to_row(record) for record in records[:limit]]
         
-        app_logger.log_feedback("GET", "ALL", f"{len(feedback_list)} items", True)
-        return {"feedback": feedback_list}
+        app_logger.log_feedback("GET", technique or "ALL", f"{len(feedback_list)} items", True)
+        return {"feedback": feedback_list, "next_cursor": next_cursor, "limit": limit}
         
+    except HTTPException:
+        raise
     except Exception as e:
-        app_logger.log_feedback("GET", "ALL", "N/A", False)
+        app_logger.log_feedback("GET", technique or "ALL", "N/A", False)
         raise HTTPException(status_code=500, detail=f"Error reading feedback: {str(e)}")
 
-@router.delete("/")
+@router.get("/stats")
+async def get_feedback_stats(technique: Optional[str] = None):
+    """Thumbs-up/down counts per (technique, STRIDE, CIA), served from in-memory counters"""
+    try:
+        store = get_feedback_store()
+        stats = await run_in_threadpool(store.aggregates, technique)
+        totals = {"thumbs_up": 0, "thumbs_down": 0}
+        for entry in stats:
+            totals["thumbs_up"] += entry["thumbs_up"]
+            totals["thumbs_down"] += entry["thumbs_down"]
+        totals["total"] = sum(
+            count for entry in stats for key, count in entry.items() if key not in ("technique", "stride", "cia")
+        )
+        return {"totals": totals, "stats": stats}
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error reading feedback stats: {str(e)}")
+
+@router.delete("/", dependencies=[Depends(require_admin)])
 async def clear_feedback():
-    """Clear all feedback (recreate CSV with headers only)"""
+    """Delete all stored feedback; requires the X-Admin-Token header (see ADMIN_TOKEN)"""
     try:
-        ensure_csv_exists()
-        app_logger.log_feedback("CLEAR", "ALL", "N/A", True)
-        return {"message": "All feedback cleared successfully!"}
+        removed = await run_in_threadpool(get_feedback_store().clear)
+        app_logger.log_feedback("CLEAR", "ALL", f"{removed} items", True)
+        return {"message": "All feedback cleared successfully!", "removed": removed}
         
     except Exception as e:
         app_logger.log_feedback("CLEAR", "ALL", "N/A", False)
         raise HTTPException(status_code=500, detail=f"Error clearing feedback: {str(e)}")
 
+def format_export_chunk(records: List[Dict[str, str]], export_format: str) -> str:
+    """Serialize one chunk of records as CSV rows or JSON lines"""
+    if export_format == "ndjson":
+        return "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows([record[field] for field in FEEDBACK_FIELDS] for record in records)
+    return buffer.getvalue()
+
+async def export_feedback_stream(
+    filters: dict,
+    since: Optional[str],
+    until: Optional[str],
+    export_format: str,
+    compress: bool
+) -> AsyncIterator[bytes]:
+    """Yield the export chunk by chunk; only one chunk is ever held in memory"""
+    compressor = zlib.compressobj(FEEDBACK_EXPORT_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS) if compress else None
+
+    def encode(text: str) -> bytes:
+        data = text.encode("utf-8")
+        if compressor is None:
+            return data
+        # Sync-flush so every chunk reaches the client as soon as it is read
+        return compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    if export_format == "csv":
+        header = io.StringIO()
+        csv.writer(header).writerow(FEEDBACK_COLUMNS)
+        yield encode(header.getvalue())
+    chunks = get_feedback_store().iter_chunks(filters, since, until)
+    async for records in iterate_in_threadpool(chunks):
+        yield encode(format_export_chunk(records, export_format))
+    if compressor is not None:
+        yield compressor.flush()
+
+def export_response(
+    request: Request,
+    filters: dict,
+    since: Optional[str],
+    until: Optional[str],
+    export_format: str
+) -> StreamingResponse:
+    if export_format not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown format '{export_format}' (expected one of {', '.join(EXPORT_FORMATS)})"
+        )
+    media_type, extension = EXPORT_FORMATS[export_format]
+    compress = choose_encoding(request.headers.get("accept-encoding", ""), ["gzip", "identity"]) == "gzip"
+    headers = {
+        "Content-Disposition": f'attachment; filename="feedback.{extension}"',
+        "Cache-Control": "no-store",
+        "Vary": "Accept-Encoding",
+    }
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+    app_logger.log_feedback("EXPORT", filters.get("technique", "ALL"), export_format, True)
+    return StreamingResponse(
+        export_feedback_stream(filters, since, until, export_format, compress),
+        media_type=media_type,
+        headers=headers
+    )
+
+@router.get("/export")
+async def export_feedback(
+    request: Request,
+    format: str = Query("csv", description="csv or ndjson"),
+    technique: Optional[str] = None,
+    feedback_type: Optional[str] = None,
+    stride: Optional[str] = None,
+    cia: Optional[str] = None,
+    sid: Optional[str] = None,
+    since: Optional[str] = Query(None, description="Inclusive ISO timestamp lower bound, for incremental pulls"),
+    until: Optional[str] = Query(None, description="Exclusive ISO timestamp upper bound")
+):
+    """Stream matching feedback as CSV or NDJSON, gzip-encoded when the client accepts it"""
+    filters = feedback_filters(technique, feedback_type, stride, cia, sid)
+    return export_response(request, filters, since, until, format)
+
 @router.get("/download")
-async def download_feedback():
-    """Download feedback CSV file"""
+async def download_feedback(request: Request):
+    """Download all feedback as a CSV file"""
     try:
-        if not os.path.exists(FEEDBACK_CSV):
-            raise HTTPException(status_code=404, detail="No feedback file found")
+        if await run_in_threadpool(get_feedback_store().count) == 0:
+            raise HTTPException(status_code=404, detail="No feedback found")
         
-        return {"message": "Feedback CSV is available at /feedback.csv"}
+        return export_response(request, {}, None, None, "csv")
         
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error accessing feedback file: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error exporting feedback: {str(e)}")
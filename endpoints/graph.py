@@ -0,0 +1,36 @@
+from fastapi import APIRouter, Request, Response
+
+from utils.graph import get_graph_state_async
+from utils.static_assets import etag_matches
+
+# Create router for network graph endpoints
+router = APIRouter(prefix="/api/graph", tags=["graph"])
+
+# Seconds a client should wait before asking again for a layout that is still being computed
+LAYOUT_RETRY_AFTER = 2
+
+@router.get("/")
+async def get_graph(request: Request, response: Response, layout: bool = True):
+    """
+    Get the tactic / technique / STRIDE / CIA network in compact form
+
+    Nodes are returned as parallel arrays and links refer to nodes by their
+    position in those arrays. With layout=true (the default) settled x/y
+    coordinates are included so the client can render without simulating.
+    While the layout is still being computed (a few seconds after a cold
+    start) the graph is returned without it, as 202 with Retry-After.
+    """
+    state = await get_graph_state_async()
+    if layout and state.layout is None:
+        state.start_layout()
+        response.status_code = 202
+        response.headers.update({"Cache-Control": "no-store", "Retry-After": str(LAYOUT_RETRY_AFTER)})
+        return state.graph.to_dict(None)
+
+    etag = f'"{state.graph.digest}-{int(layout)}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return state.graph.to_dict(state.layout if layout else None)
@@ -0,0 +1,78 @@
+from fastapi import APIRouter
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse
+
+from utils.llm_cache import get_llm_cache
+from utils.llm_client import shared_llm_client_stats
+from utils.llm_health import UP, get_llm_health
+from utils.metrics import gauge_lines, metrics
+from endpoints.procedure_example import procedure_admission, procedure_flight, procedure_streams
+
+# Create router for the Prometheus scrape endpoint (served at the conventional /metrics)
+router = APIRouter(tags=["metrics"])
+
+# Prometheus text exposition format
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4"  # Starlette appends the charset
+
+def llm_cache_metrics():
+    """Reuse the LLM cache's own hit/miss counters instead of counting twice"""
+    stats = get_llm_cache().stats()
+    lines = gauge_lines("llm_cache_lookups_total", "Procedure cache lookups by result", {
+        (("result", "memory_hit"),): stats["memory_hits"],
+        (("result", "disk_hit"),): stats["disk_hits"],
+        (("result", "miss"),): stats["misses"],
+    }, kind="counter")
+    lines += gauge_lines("llm_cache_hit_ratio", "Procedure cache hits / lookups since start", {(): stats["hit_ratio"]})
+    lines += gauge_lines("llm_cache_entries", "Procedure cache entries by tier", {
+        (("tier", "memory"),): stats["memory_entries"],
+        (("tier", "disk"),): stats["disk_entries"],
+    })
+    return lines
+
+def llm_admission_metrics():
+    """Generation admission queue and request coalescing"""
+    stats = procedure_admission.stats()
+    lines = gauge_lines("llm_generations_active", "Generations holding an admission slot", {(): stats["active"]})
+    lines += gauge_lines("llm_generations_queued", "Generations waiting for an admission slot", {(): stats["queued"]})
+    lines += gauge_lines("llm_generations_rejected_total", "Generations rejected by admission control", {
+        (("reason", reason),): count for reason, count in stats["rejected"].items()
+    }, kind="counter")
+    lines += gauge_lines("llm_generations_coalesced_total", "Requests that joined an identical in-flight generation", {
+        (): procedure_flight.shared_calls + procedure_streams.shared_calls
+    }, kind="counter")
+    return lines
+
+def llm_circuit_metrics():
+    """Circuit breaker state of the shared LLM client (0 closed, 1 half-open, 2 open)"""
+    stats = shared_llm_client_stats()
+    circuit = stats and stats["circuit"]
+    if not circuit:
+        return []
+    lines = gauge_lines("llm_circuit_state", "LLM circuit breaker state: 0 closed, 1 half-open, 2 open", {
+        (): {"closed": 0, "half_open": 1, "open": 2}[circuit["state"]]
+    })
+    lines += gauge_lines("llm_circuit_opened_total", "Times the LLM circuit breaker opened", {(): circuit["times_opened"]}, kind="counter")
+    lines += gauge_lines("llm_circuit_rejected_total", "Calls failed fast by the open circuit", {(): circuit["rejected"]}, kind="counter")
+    return lines
+
+def llm_health_metrics():
+    """Result of the background LLM upstream probe"""
+    prober = get_llm_health()
+    if not prober.probes:
+        return []
+    lines = gauge_lines("llm_upstream_up", "1 if the last LLM upstream probe succeeded", {(): int(prober.current_state() == UP)})
+    if prober.latency is not None:
+        lines += gauge_lines("llm_upstream_probe_seconds", "Latency of the last successful LLM upstream probe", {(): prober.latency})
+    lines += gauge_lines("llm_upstream_probe_failures_total", "Failed LLM upstream probes", {(): prober.failures}, kind="counter")
+    return lines
+
+metrics.register_collector(llm_cache_metrics)
+metrics.register_collector(llm_admission_metrics)
+metrics.register_collector(llm_circuit_metrics)
+metrics.register_collector(llm_health_metrics)
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Application metrics in Prometheus text format"""
+    # The LLM cache collector takes the cache lock and queries SQLite; keep both off the event loop
+    return PlainTextResponse(await run_in_threadpool(metrics.render), media_type=PROMETHEUS_CONTENT_TYPE)
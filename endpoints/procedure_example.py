@@ -1,27 +1,47 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Optional
-import sys
+from typing import AsyncIterator, Awaitable, Callable, Optional, Tuple
 import os
 import time
+import json
+import hashlib
 
-# Add the utils directory to the path so we can import the LLM client and logger
-sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'utils'))
-from llm_client import LLMClient
-from logger import app_logger
+from utils.logger import app_logger
+from utils.admin import require_admin
+from utils.llm_client import LLMClient, get_shared_llm_client, shared_llm_client_stats
+from utils.resilience import CircuitOpenError
+from utils.llm_cache import get_llm_cache, make_cache_key
+from utils.llm_health import UNCONFIGURED, UNKNOWN, UP, get_llm_health
+from utils.catalog import CatalogVersion, TechniqueCatalog, get_catalog, on_catalog_reload
+from utils.prompt_budget import LLM_PROMPT_MAX_TOKENS, compact_description, count_tokens
+from utils.concurrency import AdmissionController, AdmissionRejected, SharedStream, SingleFlight, StreamGroup
 
 # Create router for procedure example endpoints
 router = APIRouter(prefix="/api/procedure", tags=["procedure"])
 
+# Generation admission limits - loaded from environment variables or defaults
+LLM_MAX_CONCURRENT = int(os.getenv("LLM_MAX_CONCURRENT", "8"))
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "32"))
+LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", "30"))
+
+# Shared across requests: dedupe identical generations and bound upstream concurrency
+procedure_flight = SingleFlight()
+procedure_streams = StreamGroup()
+procedure_admission = AdmissionController(LLM_MAX_CONCURRENT, LLM_MAX_QUEUE, LLM_QUEUE_TIMEOUT)
+
 # Request/Response models
 class ProcedureRequest(BaseModel):
-    technique_name: str
-    technique_description: str
+    technique_id: Optional[str] = None  # resolved from the catalog; name and description are then ignored
+    technique_name: str = ""
+    technique_description: str = ""
 
 class ProcedureResponse(BaseModel):
     technique_name: str
     procedure_example: str
     message: str
+    cached: bool = False
 
 # Prompt template for procedure generation
 PROCEDURE_PROMPT_TEMPLATE = """You are a cybersecurity expert. Based on the following MITRE ATT&CK Technique description, provide a realistic and educational procedure example that demonstrates how this technique might be used in practice.
@@ -40,14 +60,129 @@ Keep the response educational and focused on understanding the technique for def
 
 Response:"""
 
+# Changes whenever the template text changes, so cached outputs of an old template are never served
+PROCEDURE_TEMPLATE_VERSION = hashlib.sha256(PROCEDURE_PROMPT_TEMPLATE.encode("utf-8")).hexdigest()[:12]
+
+def procedure_cache_key(technique_name: str, technique_description: str) -> str:
+    """Cache key for a generation request under the current model and template"""
+    return make_cache_key(
+        LLMClient.OPENAI_MODEL,
+        PROCEDURE_TEMPLATE_VERSION,
+        technique_name,
+        technique_description
+    )
+
 # Dependency to get LLM client
 def get_llm_client():
-    """Dependency to get LLM client instance"""
+    """Dependency to get the shared, connection-pooled LLM client instance"""
     try:
-        return LLMClient()
+        return get_shared_llm_client()
     except ValueError as e:
         raise HTTPException(status_code=500, detail=f"LLM client initialization failed: {str(e)}")
 
+def build_procedure_prompt(technique_name: str, technique_description: str) -> str:
+    """Fill PROCEDURE_PROMPT_TEMPLATE for one technique"""
+    return PROCEDURE_PROMPT_TEMPLATE.format(
+        technique_name=technique_name,
+        technique_description=technique_description
+    )
+
+# Chat formatting tokens per message (role markers, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+def description_budget(technique_name: str) -> int:
+    """Tokens left for the description once the system prompt and template are counted (0 = unlimited)"""
+    if LLM_PROMPT_MAX_TOKENS <= 0:
+        return 0
+    fixed = (
+        count_tokens(LLMClient.SYSTEM_PROMPT)
+        + count_tokens(build_procedure_prompt(technique_name, ""))
+        + 2 * MESSAGE_OVERHEAD_TOKENS
+    )
+    return max(64, LLM_PROMPT_MAX_TOKENS - fixed)
+
+def prepare_description(technique_name: str, technique_description: str) -> str:
+    """Description as it goes into the prompt: links and citations stripped, fitted to the token budget"""
+    return compact_description(technique_description, description_budget(technique_name))
+
+def resolve_procedure_request(request: ProcedureRequest) -> Tuple[str, str]:
+    """
+    Technique name and prompt-ready description for a request
+    
+    A technique_id is looked up in the server-side catalog, so clients do not
+    have to upload the description; otherwise both name and description are
+    required.
+    """
+    if request.technique_id:
+        catalog = get_catalog()
+        matches = catalog.query(technique_id=request.technique_id.strip())
+        if not matches:
+            raise HTTPException(status_code=404, detail=f"Technique {request.technique_id} not found")
+        row = catalog.row(matches[0], ["Technique_Name", "Technique_Description"])
+        technique_name, technique_description = row["Technique_Name"], row["Technique_Description"]
+    else:
+        technique_name, technique_description = request.technique_name, request.technique_description
+    if not technique_name or not technique_description:
+        raise HTTPException(
+            status_code=400,
+            detail="Provide technique_id, or both technique_name and technique_description"
+        )
+    return technique_name, prepare_description(technique_name, technique_description)
+
+def prompt_inputs(catalog: TechniqueCatalog, technique_id: str) -> Optional[Tuple[str, str]]:
+    """(name, description) a technique contributes to its prompt, None if it is not in the catalog"""
+    matches = catalog.by_technique_id.get(technique_id.upper())
+    if not matches:
+        return None
+    row = catalog.row(matches[0], ["Technique_Name", "Technique_Description"])
+    return row["Technique_Name"], row["Technique_Description"]
+
+def invalidate_changed_procedures(old: CatalogVersion, new: CatalogVersion):
+    """After a catalog reload, drop cached examples of techniques whose name or description changed"""
+    removed = 0
+    for technique_id in new.changed or ():
+        before = prompt_inputs(old.catalog, technique_id)
+        if before is not None and before != prompt_inputs(new.catalog, technique_id):
+            removed += get_llm_cache().invalidate(technique_name=before[0])
+    if removed:
+        app_logger.log_system(f"Invalidated {removed} cached procedure example(s) after catalog reload", "INFO")
+
+on_catalog_reload(invalidate_changed_procedures)
+
+def busy_exception(rejection) -> HTTPException:
+    """Fast 503 telling the client when to come back (AdmissionRejected or CircuitOpenError)"""
+    return HTTPException(
+        status_code=503,
+        detail=str(rejection),
+        headers={"Retry-After": str(rejection.retry_after)}
+    )
+
+async def generate_and_cache(llm_client: LLMClient, technique_name: str, technique_description: str, cache_key: str) -> str:
+    """One upstream generation under the admission limit; the result is cached"""
+    prompt = build_procedure_prompt(technique_name, technique_description)
+    app_logger.log_llm_request(technique_name, len(prompt))
+    
+    acquired_at = await procedure_admission.acquire()
+    try:
+        start_time = time.time()
+        procedure_example = await llm_client.generate_procedure_example(prompt)
+        response_time = time.time() - start_time
+    finally:
+        procedure_admission.release(acquired_at)
+    
+    # Log successful LLM response
+    app_logger.log_llm_response(technique_name, len(procedure_example), response_time)
+    await run_in_threadpool(get_llm_cache().set, cache_key, procedure_example, technique_name, LLMClient.OPENAI_MODEL)
+    return procedure_example
+
+async def collect_stream(stream: SharedStream) -> str:
+    """Wait for an in-flight streamed generation and return its full text"""
+    subscription = stream.subscribe()
+    try:
+        return "".join([part async for part in subscription]).strip()
+    finally:
+        await subscription.aclose()
+
 @router.post("/generate", response_model=ProcedureResponse)
 async def generate_procedure_example(
     request: ProcedureRequest,
@@ -56,63 +191,242 @@ async def generate_procedure_example(
     """
     Generate a procedure example based on MITRE Technique description using LLM
     
+    Identical concurrent requests share one upstream call, and at most
+    LLM_MAX_CONCURRENT generations run at once; when the wait queue is full
+    the request fails fast with 503 and a Retry-After header.
+    
     Args:
-        request: Contains technique name and description
+        request: A technique_id resolved from the catalog, or technique name and description
         llm_client: LLM client instance injected via dependency
         
     Returns:
         Generated procedure example
     """
+    technique_name = request.technique_name or request.technique_id or ""
     try:
-        # Validate input
-        if not request.technique_name or not request.technique_description:
-            raise HTTPException(
-                status_code=400, 
-                detail="Both technique_name and technique_description are required"
-            )
+        # Validate input and resolve the technique text server-side
+        technique_name, technique_description = resolve_procedure_request(request)
         
-        # Build the prompt using the template
-        prompt = PROCEDURE_PROMPT_TEMPLATE.format(
-            technique_name=request.technique_name,
-            technique_description=request.technique_description
-        )
-        
-        # Log LLM request
-        app_logger.log_llm_request(request.technique_name, len(prompt))
-        
-        # Generate procedure example using LLM
-        start_time = time.time()
-        procedure_example = await llm_client.generate_procedure_example(prompt)
-        response_time = time.time() - start_time
+        # Serve repeated requests for the same technique from the cache
+        cache = get_llm_cache()
+        cache_key = procedure_cache_key(technique_name, technique_description)
+        cached_example = await run_in_threadpool(cache.get, cache_key)
+        if cached_example is not None:
+            app_logger.log_llm_cache(technique_name, True)
+            return ProcedureResponse(
+                technique_name=technique_name,
+                procedure_example=cached_example,
+                message="Procedure example served from cache",
+                cached=True
+            )
+        app_logger.log_llm_cache(technique_name, False)
         
-        # Log successful LLM response
-        app_logger.log_llm_response(request.technique_name, len(procedure_example), response_time)
+        # Join an identical generation that is already running, streamed or not
+        stream = procedure_streams.get(cache_key)
+        if stream is not None:
+            procedure_example, shared = await collect_stream(stream), True
+        else:
+            procedure_example, shared = await procedure_flight.do(
+                cache_key,
+                lambda: generate_and_cache(llm_client, technique_name, technique_description, cache_key)
+            )
         
         return ProcedureResponse(
-            technique_name=request.technique_name,
+            technique_name=technique_name,
             procedure_example=procedure_example,
-            message="Procedure example generated successfully!"
+            message="Procedure example generated successfully!" if not shared else "Procedure example shared with an identical in-flight request"
         )
         
+    except HTTPException:
+        raise
+    except (AdmissionRejected, CircuitOpenError) as e:
+        app_logger.log_llm_error(technique_name, e)
+        raise busy_exception(e)
     except Exception as e:
         # Log the error for debugging
-        app_logger.log_llm_error(request.technique_name, e)
+        app_logger.log_llm_error(technique_name, e)
         raise HTTPException(
             status_code=500, 
             detail=f"Failed to generate procedure example: {str(e)}"
         )
 
-@router.get("/health")
-async def health_check(llm_client: LLMClient = Depends(get_llm_client)):
-    """Health check endpoint to test LLM connection"""
+def sse_event(event: str, data: dict) -> str:
+    """Format one Server-Sent Event; data is JSON so newlines in tokens survive"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def start_procedure_stream(llm_client: LLMClient, technique_name: str, technique_description: str,
+                           cache_key: str, acquired_at: float) -> SharedStream:
+    """Start one upstream streamed generation that any number of requests can subscribe to"""
+    prompt = build_procedure_prompt(technique_name, technique_description)
+    app_logger.log_llm_request(technique_name, len(prompt))
+    start_time = time.time()
+    
+    async def completed(text: str):
+        procedure_example = text.strip()
+        app_logger.log_llm_response(technique_name, len(procedure_example), time.time() - start_time)
+        await run_in_threadpool(get_llm_cache().set, cache_key, procedure_example, technique_name, LLMClient.OPENAI_MODEL)
+    
+    def cancelled():
+        app_logger.log_system(f"All clients disconnected, cancelled generation for {technique_name}", "INFO")
+    
+    return procedure_streams.start(
+        cache_key,
+        llm_client.stream_procedure_example(prompt),
+        on_complete=completed,
+        on_error=lambda e: app_logger.log_llm_error(technique_name, e),
+        on_cancel=cancelled,
+        on_finish=lambda: procedure_admission.release(acquired_at)
+    )
+
+async def stream_procedure_events(
+    request: Request,
+    stream: SharedStream,
+    shared: bool
+) -> AsyncIterator[str]:
+    """Relay a shared generation as SSE; the upstream stops once every subscriber has gone"""
+    length = 0
+    subscription = stream.subscribe()
     try:
-        is_healthy = llm_client.test_connection()
-        if is_healthy:
-            return {"status": "healthy", "message": "LLM connection is working"}
-        else:
-            return {"status": "unhealthy", "message": "LLM connection failed"}
+        async for text in subscription:
+            if await request.is_disconnected():
+                return
+            length += len(text)
+            yield sse_event("token", {"text": text})
+    except CircuitOpenError as e:
+        yield sse_event("error", {"detail": str(e), "retry_after": e.retry_after})
+        return
+    except Exception as e:
+        yield sse_event("error", {"detail": f"Failed to generate procedure example: {str(e)}"})
+        return
+    finally:
+        await subscription.aclose()
+    
+    yield sse_event("done", {"cached": False, "shared": shared, "length": length})
+
+async def stream_cached_events(procedure_example: str) -> AsyncIterator[str]:
+    yield sse_event("token", {"text": procedure_example})
+    yield sse_event("done", {"cached": True, "shared": False, "length": len(procedure_example)})
+
+async def stream_joined_events(join: Callable[[], Awaitable]) -> AsyncIterator[str]:
+    """
+    Relay the result of an identical non-streamed generation that was already running
+
+    join is called here rather than by the caller, so a client that disconnects
+    before the stream starts leaves no un-awaited coroutine behind.
+    """
+    try:
+        procedure_example, _ = await join()
+    except (AdmissionRejected, CircuitOpenError) as e:
+        yield sse_event("error", {"detail": str(e), "retry_after": e.retry_after})
+        return
     except Exception as e:
-        return {"status": "error", "message": f"Health check failed: {str(e)}"}
+        yield sse_event("error", {"detail": f"Failed to generate procedure example: {str(e)}"})
+        return
+    yield sse_event("token", {"text": procedure_example})
+    yield sse_event("done", {"cached": False, "shared": True, "length": len(procedure_example)})
+
+@router.post("/generate/stream")
+async def generate_procedure_example_stream(
+    request: Request,
+    body: ProcedureRequest,
+    llm_client: LLMClient = Depends(get_llm_client)
+):
+    """
+    Stream a procedure example as Server-Sent Events
+    
+    Emits "token" events ({"text": ...}) as the model produces output, then a
+    single "done" event, or an "error" event if generation fails midway.
+    Identical concurrent requests subscribe to the same upstream stream, which
+    is cancelled once all of them disconnect. Returns 503 with Retry-After
+    when the generation queue is full.
+    """
+    technique_name, technique_description = resolve_procedure_request(body)
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    
+    cache_key = procedure_cache_key(technique_name, technique_description)
+    cached_example = await run_in_threadpool(get_llm_cache().get, cache_key)
+    if cached_example is not None:
+        app_logger.log_llm_cache(technique_name, True)
+        return StreamingResponse(stream_cached_events(cached_example), media_type="text/event-stream", headers=headers)
+    app_logger.log_llm_cache(technique_name, False)
+    
+    if cache_key in procedure_flight:
+        join = lambda: procedure_flight.do(
+            cache_key,
+            lambda: generate_and_cache(llm_client, technique_name, technique_description, cache_key)
+        )
+        return StreamingResponse(stream_joined_events(join), media_type="text/event-stream", headers=headers)
+    
+    stream = procedure_streams.get(cache_key)
+    shared = stream is not None
+    if stream is None:
+        try:
+            # Fail fast while the upstream is known to be down instead of queueing for a slot
+            llm_client.resilience.check()
+            acquired_at = await procedure_admission.acquire()
+        except (AdmissionRejected, CircuitOpenError) as e:
+            app_logger.log_llm_error(technique_name, e)
+            raise busy_exception(e)
+        # Someone may have started the same generation while we were queued
+        stream = procedure_streams.get(cache_key)
+        shared = stream is not None
+        if stream is not None:
+            procedure_admission.release()
+        else:
+            stream = start_procedure_stream(llm_client, technique_name, technique_description, cache_key, acquired_at)
+    
+    return StreamingResponse(
+        stream_procedure_events(request, stream, shared),
+        media_type="text/event-stream",
+        headers=headers
+    )
+
+@router.get("/queue")
+async def queue_stats():
+    """Admission queue depth, wait times and request coalescing counters"""
+    return {
+        **procedure_admission.stats(),
+        "in_flight": procedure_flight.in_flight() + procedure_streams.in_flight(),
+        "coalesced_requests": procedure_flight.shared_calls + procedure_streams.shared_calls,
+        "upstream": shared_llm_client_stats()
+    }
+
+@router.get("/health")
+async def health_check():
+    """
+    LLM upstream health from the background prober
+
+    Returns the cached result of the last probe; it never calls the upstream
+    itself, so it is safe to poll often.
+    """
+    upstream = get_llm_health().status()
+    state = upstream["state"]
+    if state == UP:
+        return {"status": "healthy", "message": "LLM connection is working", "upstream": upstream}
+    if state == UNKNOWN:
+        return {"status": "unknown", "message": "LLM connection has not been checked yet", "upstream": upstream}
+    if state == UNCONFIGURED:
+        return {"status": "error", "message": f"Health check failed: {upstream['error']}", "upstream": upstream}
+    return {"status": "unhealthy", "message": "LLM connection failed", "upstream": upstream}
+
+@router.get("/cache/stats")
+async def cache_stats():
+    """Hit/miss counters and sizes of the procedure example cache"""
+    return {"template_version": PROCEDURE_TEMPLATE_VERSION, **(await run_in_threadpool(get_llm_cache().stats))}
+
+@router.delete("/cache", dependencies=[Depends(require_admin)])
+async def invalidate_cache(technique_name: Optional[str] = None, clear_all: bool = Query(False, alias="all")):
+    """
+    Invalidate cached procedure examples for one technique, or all of them with all=true
+
+    Requires the X-Admin-Token header (see ADMIN_TOKEN).
+    """
+    if technique_name is None and not clear_all:
+        raise HTTPException(status_code=400, detail="Pass technique_name, or all=true to clear the whole cache")
+    removed = await run_in_threadpool(get_llm_cache().invalidate, technique_name=technique_name, everything=clear_all)
+    target = technique_name or "ALL"
+    app_logger.log_system(f"Invalidated {removed} cached procedure example(s) for {target}", "INFO")
+    return {"message": f"Invalidated {removed} cached procedure example(s)", "removed": removed}
 
 @router.get("/test")
 async def test_endpoint():
@@ -129,7 +443,7 @@ async def debug_endpoint():
         
         # Check if we can create an LLM client
         try:
-            llm_client = LLMClient()
+            get_shared_llm_client()
             llm_status = "Available"
         except Exception as e:
             llm_status = f"Error: {str(e)}"
@@ -0,0 +1,44 @@
+from fastapi import APIRouter, HTTPException, Query
+
+from utils.search import get_search_index_async
+
+# Create router for full-text search endpoints
+router = APIRouter(prefix="/api/search", tags=["search"])
+
+@router.get("/")
+async def search_techniques(
+    q: str = Query(..., min_length=1, max_length=200),
+    prefix: bool = True,
+    include_subtechniques: bool = True,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100)
+):
+    """
+    Full-text search over technique IDs, names and descriptions
+
+    Args:
+        q: Search text; the last word is treated as a prefix for type-ahead
+        prefix: Set to false to disable prefix expansion of the last word
+        include_subtechniques: Set to false to drop dotted sub-technique IDs
+        offset, limit: Pagination window
+
+    Returns:
+        BM25-ranked techniques with highlighted names and description snippets
+    """
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="Query must not be blank")
+
+    total, results = (await get_search_index_async()).search(
+        q,
+        limit=limit,
+        offset=offset,
+        prefix=prefix,
+        include_subtechniques=include_subtechniques
+    )
+    return {
+        "query": q,
+        "total": total,
+        "offset": offset,
+        "limit": limit,
+        "results": results
+    }
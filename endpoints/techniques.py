@@ -0,0 +1,105 @@
+from fastapi import APIRouter, HTTPException, Query
+from typing import List, Optional
+
+from utils.catalog import (
+    CATALOG_FIELDS,
+    SUMMARY_FIELDS,
+    get_catalog,
+)
+
+# Create router for technique catalog endpoints
+router = APIRouter(prefix="/api/techniques", tags=["techniques"])
+
+# Upper bound on a single page of results
+MAX_PAGE_SIZE = 1000
+
+def parse_fields(fields: Optional[str], default: List[str]) -> List[str]:
+    """Turn a comma separated ?fields= value into a validated column list"""
+    if not fields:
+        return default
+    if fields == "all":
+        return CATALOG_FIELDS
+
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in CATALOG_FIELDS]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown field(s): {', '.join(unknown)}. Valid fields: {', '.join(CATALOG_FIELDS)}"
+        )
+    return requested
+
+@router.get("/")
+async def list_techniques(
+    tactic_id: Optional[str] = None,
+    platform: Optional[str] = None,
+    matrix: Optional[str] = None,
+    technique_id: Optional[str] = None,
+    include_subtechniques: bool = True,
+    fields: Optional[str] = None,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE)
+):
+    """
+    List catalog rows, filtered through the in-memory indexes
+
+    Args:
+        tactic_id, platform, matrix, technique_id: Optional exact-match filters
+        include_subtechniques: Set to false to drop dotted sub-technique IDs
+        fields: Comma separated column names, or "all"; descriptions are omitted by default
+        offset, limit: Pagination window
+
+    Returns:
+        One page of projected rows plus the total match count
+    """
+    projection = parse_fields(fields, SUMMARY_FIELDS)
+    catalog = get_catalog()
+
+    matches = catalog.query(
+        technique_id=technique_id,
+        tactic_id=tactic_id,
+        platform=platform,
+        matrix=matrix,
+        include_subtechniques=include_subtechniques
+    )
+    page = matches[offset:offset + limit]
+
+    return {
+        "total": len(matches),
+        "offset": offset,
+        "limit": limit,
+        "fields": projection,
+        "techniques": catalog.rows(page, projection)
+    }
+
+@router.get("/tactics")
+async def list_tactics():
+    """List the tactics in the catalog with their technique counts"""
+    catalog = get_catalog()
+    return {
+        "tactics": [
+            {"Tactic_ID": tactic_id, "Tactic_Name": name, "count": len(catalog.by_tactic_id[tactic_id.upper()])}
+            for tactic_id, name in catalog.tactics.items()
+        ]
+    }
+
+@router.get("/{technique_id}")
+async def get_technique(technique_id: str, fields: Optional[str] = None):
+    """
+    Get a single technique by ID, including its description by default
+
+    A technique that belongs to several tactics appears once per tactic in
+    mitre.csv; the tactic columns are returned as a list instead.
+    """
+    technique_fields = [f for f in CATALOG_FIELDS if not f.startswith("Tactic_")]
+    projection = parse_fields(fields, technique_fields)
+    catalog = get_catalog()
+
+    matches = catalog.query(technique_id=technique_id)
+    if not matches:
+        raise HTTPException(status_code=404, detail=f"Technique {technique_id} not found")
+
+    return {
+        "technique": catalog.row(matches[0], [f for f in projection if not f.startswith("Tactic_")]),
+        "tactics": [catalog.row(i, ["Tactic_ID", "Tactic_Name"]) for i in matches]
+    }
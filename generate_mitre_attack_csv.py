@@ -1,9 +1,58 @@
+"""
+Generate the tactic/technique catalog CSV from ATT&CK STIX bundles.
+
+Each bundle is read once and indexed in a single pass: tactics, techniques
+by kill-chain phase, and the technique -> sub-technique map from the
+"subtechnique-of" relationships. Rows are then produced from the indexes
+without further queries. Enterprise, ICS and Mobile bundles are processed
+in parallel worker processes.
+
+Given the previous bundles, regeneration is incremental: objects are
+compared by STIX id and `modified`, rows whose technique and tactic are
+unchanged are kept exactly as they were in the previous CSV, and every
+re-emitted row keeps its CIA/STRIDE annotations. A JSON changelog lists
+what was added, changed, revoked, deprecated or removed so downstream
+caches can invalidate just those techniques.
+
+Bundles are streamed by default: the "objects" array is decoded one object
+at a time from a fixed-size read buffer, and only the objects and fields
+the CSV needs are kept, as compact records. --max-memory-mb turns a
+runaway peak RSS into a clean failure instead of an OOM kill.
+
+Next to the CSV, a memory-mapped catalog snapshot (<output>.catalog, see
+utils/catalog_snapshot.py) is written for the API workers to map instead of
+parsing the CSV.
+
+    python generate_mitre_attack_csv.py                          # every <domain>.json in the bundle dir
+    python generate_mitre_attack_csv.py --domain enterprise-attack --output mitre.csv
+    python generate_mitre_attack_csv.py --bundle ics-attack=/data/ics-attack-15.1.json
+    python generate_mitre_attack_csv.py --bundle-dir ./stix-16.0 --previous-dir ./stix-15.1 --output mitre.csv
+    python generate_mitre_attack_csv.py --workers 1 --max-memory-mb 256
+"""
+import argparse
 import csv
-from mitreattack.stix20 import MitreAttackData
+import json
+import os
+import resource
+import sys
+import time
+from datetime import datetime, timezone
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from utils.catalog import write_catalog_snapshot
+from utils.catalog_snapshot import snapshot_path_for
 
-ATTACK_FILE = "enterprise-attack.json"   # Path to your local STIX 2.0 file
-OUTPUT_CSV  = "attack_tactics_techniques.csv"
-DOMAIN      = "enterprise-attack"
+BUNDLE_DIR = "."                                  # Where <domain>.json bundles are looked up
+OUTPUT_CSV = "attack_tactics_techniques.csv"
+
+# ATT&CK domain -> (kill chain name used by its techniques, matrix name for the Matrices column)
+DOMAINS = {
+    "enterprise-attack": ("mitre-attack", "Enterprise"),
+    "ics-attack": ("mitre-ics-attack", "ICS"),
+    "mobile-attack": ("mitre-mobile-attack", "Mobile"),
+}
 
 # Map from source_name to human-friendly matrix name
 MATRIX_MAP = {
@@ -12,7 +61,36 @@ MATRIX_MAP = {
     "mitre-mobile-attack": "Mobile",
 }
 
-attack_data = MitreAttackData(ATTACK_FILE)
+# Columns filled in by hand after generation; carried over when rows are regenerated
+ANNOTATION_COLUMNS = ["CIA", "STRIDE"]
+
+# STIX object types whose changes affect catalog rows
+CATALOG_TYPES = ("attack-pattern", "x-mitre-tactic")
+
+# Streaming ingestion: bytes read per refill, and how often (in objects) peak RSS is checked
+READ_SIZE = 1024 * 1024
+MEMORY_CHECK_EVERY = 1000
+
+# Fields kept per object type in compact records; everything else is dropped while streaming
+COMMON_FIELDS = ("id", "type", "name", "modified", "revoked", "x_mitre_deprecated")
+COMPACT_FIELDS = {
+    "attack-pattern": COMMON_FIELDS + ("description", "x_mitre_platforms", "kill_chain_phases"),
+    "x-mitre-tactic": COMMON_FIELDS + ("description", "x_mitre_shortname"),
+    "relationship": ("type", "relationship_type", "source_ref", "target_ref", "revoked", "x_mitre_deprecated"),
+}
+
+CSV_HEADER = [
+    "Tactic_Name",
+    "Tactic_ID",
+    "Tactic_Description",
+    "Technique_Name",
+    "Technique_ID",
+    "Technique_Description",
+    "Platform",
+    "Matrices",
+    "CIA",
+    "STRIDE"
+]
 
 def get_attack_id_and_matrix(obj):
     """Return (external_id, matrix_name) derived from external_references."""
@@ -49,93 +127,598 @@ def has_required_fields_for_row(tech):
     plats_ok = bool(platforms_of(tech))
     return desc_ok and plats_ok
 
-rows = []
-skipped_no_required = 0
-
-# Get tactics (active only)
-tactics = [t for t in attack_data.get_tactics() if is_active(t)]
-
-for tactic in tactics:
-    tactic_name = tactic.get("name", "")
-    tactic_id, matrix_name = get_attack_id_and_matrix(tactic)
-    tactic_desc = clean(tactic.get("description", ""))
-    tactic_shortname = tactic.get("x_mitre_shortname")
-    if not tactic_shortname:
-        continue
-
-    # Techniques for this tactic (active only)
-    techniques = [
-        t for t in attack_data.get_techniques_by_tactic(tactic_shortname, DOMAIN)
-        if is_active(t)
-    ]
-
-    for tech in techniques:
-        if not has_required_fields_for_row(tech):
-            skipped_no_required += 1
-            continue
+def load_bundle_objects(path: str) -> List[dict]:
+    """All objects of a STIX bundle file"""
+    with open(path, "r", encoding="utf-8") as file:
+        return json.load(file).get("objects", [])
 
-        tech_name = tech.get("name", "")
-        tech_id, _ = get_attack_id_and_matrix(tech)
-        tech_desc = clean(tech.get("description", ""))
-        plats = platforms_of(tech)
-
-        rows.append([
-            tactic_name,
-            tactic_id,
-            tactic_desc,
-            tech_name,
-            tech_id,
-            tech_desc,
-            plats,
-            matrix_name,
-            "",  # CIA placeholder
-            ""   # STRIDE placeholder
-        ])
-
-        # Sub-techniques (active only)
-        subtechs = [
-            s for s in attack_data.get_subtechniques_of_technique(tech["id"])
-            if is_active(s)
-        ]
-        for sub in subtechs:
-            if not has_required_fields_for_row(sub):
-                skipped_no_required += 1
+
+class MemoryCeilingExceeded(RuntimeError):
+    pass
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process (ru_maxrss is KiB on Linux, bytes on macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class JsonStream:
+    """Incremental JSON tokenizer over a text file, holding at most one value plus one read buffer"""
+
+    def __init__(self, file, read_size: int = READ_SIZE):
+        self.file = file
+        self.read_size = read_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        """Append the next chunk, dropping what was already consumed; False at end of file"""
+        if self.eof:
+            return False
+        chunk = self.file.read(self.read_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character (consumed whitespace only), or "" at end of file"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill():
+                return ""
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise ValueError(f"Expected {char!r} at offset {self.pos} of the read buffer, found {self.peek()!r}")
+        self.pos += 1
+
+    def value(self):
+        """Decode the next complete JSON value, reading more input until it fits in the buffer"""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self.fill():
+                    continue
+                raise
+            # A number ending exactly at the buffer edge may continue in the next chunk
+            if end == len(self.buffer) and not isinstance(value, (dict, list, str)) and self.fill():
                 continue
+            self.pos = end
+            return value
+
+
+def compact(obj: dict) -> Optional[dict]:
+    """The subset of a STIX object row generation and diffing use, or None if it is not needed at all"""
+    obj_type = obj.get("type")
+    fields = COMPACT_FIELDS.get(obj_type)
+    if fields is None:
+        return None
+    if obj_type == "relationship" and obj.get("relationship_type") != "subtechnique-of":
+        return None
+    record = {field: obj[field] for field in fields if field in obj}
+    if obj_type != "relationship":
+        record["external_references"] = [
+            {"source_name": ref.get("source_name"), "external_id": ref["external_id"]}
+            for ref in obj.get("external_references", [])
+            if "external_id" in ref
+        ]
+    if "x_mitre_platforms" in record and isinstance(record["x_mitre_platforms"], list):
+        record["x_mitre_platforms"] = [sys.intern(p) for p in record["x_mitre_platforms"] if isinstance(p, str)]
+    if "kill_chain_phases" in record:
+        record["kill_chain_phases"] = [
+            {"kill_chain_name": sys.intern(phase.get("kill_chain_name", "")),
+             "phase_name": sys.intern(phase.get("phase_name", ""))}
+            for phase in record["kill_chain_phases"]
+        ]
+    return record
+
+
+def iter_bundle_objects(path: str, read_size: int = READ_SIZE) -> Iterator[dict]:
+    """Yield the objects of a STIX bundle one at a time without materialising the whole document"""
+    with open(path, "r", encoding="utf-8") as file:
+        stream = JsonStream(file, read_size)
+        stream.expect("{")
+        while stream.peek() not in ("}", ""):
+            key = stream.value()
+            stream.expect(":")
+            if key != "objects":
+                stream.value()  # "type", "id", "spec_version": small scalars
+            else:
+                stream.expect("[")
+                while stream.peek() != "]":
+                    yield stream.value()
+                    if stream.peek() == ",":
+                        stream.pos += 1
+                stream.expect("]")
+            if stream.peek() == ",":
+                stream.pos += 1
+
+
+def stream_bundle_objects(
+    path: str, read_size: int = READ_SIZE, max_memory_mb: Optional[float] = None
+) -> Tuple[List[dict], int]:
+    """
+    Compact records of the objects a catalog needs, read incrementally
+
+    Returns:
+        (records, number of objects read)
 
-            sub_name = sub.get("name", "")
-            sub_id, _ = get_attack_id_and_matrix(sub)
-            sub_desc = clean(sub.get("description", ""))
-            sub_plat = platforms_of(sub)
+    Raises:
+        MemoryCeilingExceeded: peak RSS went over max_memory_mb
+    """
+    records = []
+    seen = 0
+    for obj in iter_bundle_objects(path, read_size):
+        seen += 1
+        record = compact(obj)
+        if record is not None:
+            records.append(record)
+        if max_memory_mb and seen % MEMORY_CHECK_EVERY == 0 and peak_rss_mb() > max_memory_mb:
+            raise MemoryCeilingExceeded(
+                f"{path}: peak RSS {peak_rss_mb():.0f} MB exceeds --max-memory-mb {max_memory_mb:g} "
+                f"after {seen} objects"
+            )
+    return records, seen
 
+
+def read_bundle(
+    path: str, ingest: str = "stream", read_size: int = READ_SIZE, max_memory_mb: Optional[float] = None
+) -> Tuple[List[dict], int]:
+    """(objects, number of objects in the bundle) using the "stream" (compact records) or "full" ingest mode"""
+    if ingest == "full":
+        objects = load_bundle_objects(path)
+        return objects, len(objects)
+    return stream_bundle_objects(path, read_size, max_memory_mb)
+
+
+class BundleIndex:
+    """Everything row generation needs from one domain's bundle, built in a single pass"""
+
+    def __init__(self, objects: List[dict], kill_chain_name: str):
+        self.kill_chain_name = kill_chain_name
+        self.tactics: List[dict] = []                          # active tactics, bundle order
+        self.techniques_by_phase: Dict[str, List[dict]] = {}   # tactic shortname -> techniques
+        self.subtechniques: Dict[str, List[dict]] = {}         # parent STIX id -> sub-techniques
+        self.parent_of: Dict[str, str] = {}                    # sub-technique STIX id -> parent STIX id
+
+        techniques: Dict[str, dict] = {}
+        subtechnique_links: List[Tuple[str, str]] = []
+        for obj in objects:
+            obj_type = obj.get("type")
+            if obj_type == "attack-pattern":
+                techniques[obj["id"]] = obj
+                for phase in obj.get("kill_chain_phases", []):
+                    if phase.get("kill_chain_name") == kill_chain_name:
+                        self.techniques_by_phase.setdefault(phase.get("phase_name"), []).append(obj)
+            elif obj_type == "x-mitre-tactic":
+                if is_active(obj):
+                    self.tactics.append(obj)
+            elif obj_type == "relationship" and obj.get("relationship_type") == "subtechnique-of":
+                if is_active(obj):
+                    subtechnique_links.append((obj.get("source_ref"), obj.get("target_ref")))
+
+        # Relationships can precede the objects they connect, so resolve them after the pass
+        for source_ref, target_ref in subtechnique_links:
+            if source_ref in techniques and target_ref in techniques:
+                self.parent_of[source_ref] = target_ref
+                self.subtechniques.setdefault(target_ref, []).append(techniques[source_ref])
+        for children in self.subtechniques.values():
+            children.sort(key=lambda sub: get_attack_id_and_matrix(sub)[0])
+
+    def techniques_for(self, tactic_shortname: str) -> List[dict]:
+        """Active techniques in a tactic, each parent immediately followed by its sub-techniques"""
+        members = [t for t in self.techniques_by_phase.get(tactic_shortname, []) if is_active(t)]
+        member_ids = {t["id"] for t in members}
+        ordered = []
+        for tech in members:
+            if self.parent_of.get(tech["id"]) in member_ids:
+                continue  # emitted right after its parent
+            ordered.append(tech)
+            ordered.extend(sub for sub in self.subtechniques.get(tech["id"], []) if sub["id"] in member_ids)
+        return ordered
+
+
+def build_rows(index: BundleIndex, matrix_name: str) -> Tuple[List[List[str]], List[Tuple[str, str]], int]:
+    """
+    CSV rows for one domain
+
+    Returns:
+        (rows, sources, skipped) where sources[i] is the (technique, tactic)
+        STIX id pair row i was built from
+    """
+    rows = []
+    sources = []
+    skipped_no_required = 0
+    for tactic in index.tactics:
+        tactic_shortname = tactic.get("x_mitre_shortname")
+        if not tactic_shortname:
+            continue
+        tactic_name = tactic.get("name", "")
+        tactic_id, _ = get_attack_id_and_matrix(tactic)
+        tactic_desc = clean(tactic.get("description", ""))
+
+        for tech in index.techniques_for(tactic_shortname):
+            if not has_required_fields_for_row(tech):
+                skipped_no_required += 1
+                continue
+            tech_id, _ = get_attack_id_and_matrix(tech)
             rows.append([
                 tactic_name,
                 tactic_id,
                 tactic_desc,
-                f"{tech_name}: {sub_name}",
-                sub_id,
-                sub_desc,
-                sub_plat,
+                tech.get("name", ""),
+                tech_id,
+                clean(tech.get("description", "")),
+                platforms_of(tech),
                 matrix_name,
                 "",  # CIA placeholder
                 ""   # STRIDE placeholder
             ])
+            sources.append((tech["id"], tactic["id"]))
+    return rows, sources, skipped_no_required
+
+
+def change_of(previous: Optional[dict], current: Optional[dict]) -> Optional[str]:
+    """Classify how one STIX object changed between releases, or None if it did not"""
+    if current is None:
+        return "removed"
+    if previous is None:
+        return "added" if is_active(current) else None
+    if previous.get("modified") == current.get("modified"):
+        return None
+    if current.get("revoked", False) and not previous.get("revoked", False):
+        return "revoked"
+    if current.get("x_mitre_deprecated", False) and not previous.get("x_mitre_deprecated", False):
+        return "deprecated"
+    return "changed"
+
+
+def diff_bundles(previous_objects: List[dict], current_objects: List[dict]) -> List[dict]:
+    """Techniques and tactics that were added, changed, revoked, deprecated or removed, by STIX id"""
+    previous = {obj["id"]: obj for obj in previous_objects if obj.get("type") in CATALOG_TYPES}
+    current = {obj["id"]: obj for obj in current_objects if obj.get("type") in CATALOG_TYPES}
+    changes = []
+    for stix_id in list(current) + [i for i in previous if i not in current]:
+        old, new = previous.get(stix_id), current.get(stix_id)
+        change = change_of(old, new)
+        if change is None:
+            continue
+        obj = new or old
+        changes.append({
+            "change": change,
+            "type": "tactic" if obj["type"] == "x-mitre-tactic" else "technique",
+            "stix_id": stix_id,
+            "attack_id": get_attack_id_and_matrix(obj)[0],
+            "name": obj.get("name", ""),
+            "previous_modified": old.get("modified") if old else None,
+            "modified": new.get("modified") if new else None,
+        })
+    return changes
+
+
+def generate_domain(
+    domain: str,
+    path: str,
+    previous_path: Optional[str] = None,
+    ingest: str = "stream",
+    read_size: int = READ_SIZE,
+    max_memory_mb: Optional[float] = None,
+) -> dict:
+    """Load, index and convert one bundle (diffing it against previous_path if given); runs in a worker process"""
+    kill_chain_name, matrix_name = DOMAINS[domain]
+    timings = {}
+
+    start = time.perf_counter()
+    objects, object_count = read_bundle(path, ingest, read_size, max_memory_mb)
+    timings["load"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    index = BundleIndex(objects, kill_chain_name)
+    timings["index"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    rows, sources, skipped = build_rows(index, matrix_name)
+    timings["rows"] = time.perf_counter() - start
+
+    # Without a previous bundle every row counts as dirty (regenerated, annotations still carried over)
+    changes = None
+    dirty = [True] * len(rows)
+    if previous_path:
+        start = time.perf_counter()
+        previous_objects, _ = read_bundle(previous_path, ingest, read_size, max_memory_mb)
+        changes = diff_bundles(previous_objects, objects)
+        del previous_objects
+        changed_ids = {change["stix_id"] for change in changes}
+        dirty = [tech_id in changed_ids or tactic_id in changed_ids for tech_id, tactic_id in sources]
+        timings["diff"] = time.perf_counter() - start
+
+    return {
+        "domain": domain,
+        "path": path,
+        "objects": object_count,
+        "records": len(objects),
+        "tactics": len(index.tactics),
+        "matrix": matrix_name,
+        "rows": rows,
+        "dirty": dirty,
+        "changes": changes,
+        "skipped": skipped,
+        "timings": timings,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def read_previous_csv(path: str) -> List[Dict[str, str]]:
+    with open(path, "r", newline="", encoding="utf-8-sig") as file:
+        return [row for row in csv.DictReader(file) if row.get("Technique_ID")]
+
+
+def merge_with_previous(results: List[dict], previous_rows: List[Dict[str, str]]) -> Tuple[List[List[str]], dict]:
+    """
+    Combine freshly built rows with the previous CSV
+
+    Unchanged rows are copied verbatim from the previous CSV; regenerated
+    rows keep the previous CIA/STRIDE for the same (technique, tactic).
+    Rows of matrices that were not regenerated are kept as they were.
+
+    Returns:
+        (rows, row-level summary for the changelog)
+    """
+    previous = {(row["Technique_ID"], row["Tactic_ID"]): row for row in previous_rows}
+    regenerated_matrices = {result["matrix"] for result in results}
+    columns = {name: i for i, name in enumerate(CSV_HEADER)}
+    annotated = [columns[name] for name in ANNOTATION_COLUMNS]
+    content = [i for i in range(len(CSV_HEADER)) if i not in annotated]
+
+    merged, seen = [], set()
+    summary = {"kept": 0, "updated": 0, "added": 0, "removed": 0, "techniques": set()}
+    for result in results:
+        for row, dirty in zip(result["rows"], result["dirty"]):
+            key = (row[columns["Technique_ID"]], row[columns["Tactic_ID"]])
+            seen.add(key)
+            old = previous.get(key)
+            if old is None:
+                summary["added"] += 1
+                summary["techniques"].add((row[columns["Technique_ID"]], row[columns["Technique_Name"]]))
+                merged.append(row)
+                continue
+            old_row = [old.get(name) or "" for name in CSV_HEADER]
+            if not dirty:
+                summary["kept"] += 1
+                merged.append(old_row)
+                continue
+            for i in annotated:
+                row[i] = old_row[i]
+            if any(row[i] != old_row[i] for i in content):
+                summary["updated"] += 1
+                summary["techniques"].add((row[columns["Technique_ID"]], row[columns["Technique_Name"]]))
+            else:
+                summary["kept"] += 1
+            merged.append(row)
+
+    for key, old in previous.items():
+        if old.get("Matrices") not in regenerated_matrices:
+            merged.append([old.get(name) or "" for name in CSV_HEADER])
+        elif key not in seen:
+            summary["removed"] += 1
+            summary["techniques"].add((old["Technique_ID"], old["Technique_Name"]))
+    return merged, summary
+
+
+def write_changelog(path: str, results: List[dict], summary: dict, previous_csv: str, output: str):
+    """Machine-readable record of what this regeneration changed"""
+    changelog = {
+        "generated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "previous_csv": previous_csv,
+        "output": output,
+        "rows": {key: summary[key] for key in ("kept", "updated", "added", "removed")},
+        # Techniques whose rows changed in any way: what downstream caches should drop
+        "invalidate": [
+            {"technique_id": technique_id, "technique_name": name}
+            for technique_id, name in sorted(summary["techniques"])
+        ],
+        "domains": {
+            result["domain"]: {
+                "bundle": result["path"],
+                "previous_bundle": result.get("previous_path"),
+                "changes": result["changes"],
+            }
+            for result in results
+        },
+    }
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        json.dump(changelog, file, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def write_csv(rows: List[List[str]], output: str):
+    """Write atomically so a running app never reads a half-written catalog"""
+    tmp_path = f"{output}.tmp"
+    with open(tmp_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_HEADER)
+        writer.writerows(rows)
+    os.replace(tmp_path, output)
+
+
+def generate(
+    bundles: Dict[str, str],
+    output: str = OUTPUT_CSV,
+    workers: Optional[int] = None,
+    previous_bundles: Optional[Dict[str, str]] = None,
+    previous_csv: Optional[str] = None,
+    changelog: Optional[str] = None,
+    ingest: str = "stream",
+    read_size: int = READ_SIZE,
+    max_memory_mb: Optional[float] = None,
+) -> List[dict]:
+    """
+    Generate the catalog CSV from one bundle per domain
+
+    Args:
+        bundles: Domain name -> bundle path, e.g. {"enterprise-attack": "enterprise-attack.json"}
+        output: CSV path to write
+        workers: Worker processes; defaults to one per domain
+        previous_bundles: Domain name -> the bundle previous_csv was generated from
+        previous_csv: Earlier catalog whose unchanged rows and annotations are kept
+        changelog: Where to write the JSON changelog (only with previous_csv)
+        ingest: "stream" (incremental, compact records) or "full" (json.load the whole bundle)
+        read_size: Characters read per refill when streaming
+        max_memory_mb: Per-process peak RSS ceiling while streaming
+
+    Returns:
+        Per-domain results (row counts, skipped counts, per-phase timings) in DOMAINS order
+    """
+    previous_bundles = previous_bundles or {}
+    domains = [domain for domain in DOMAINS if domain in bundles]
+    paths = [bundles[d] for d in domains]
+    previous_paths = [previous_bundles.get(d) for d in domains]
+    workers = min(workers or len(domains), len(domains))
+    run = partial(generate_domain, ingest=ingest, read_size=read_size, max_memory_mb=max_memory_mb)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(run, domains, paths, previous_paths))
+    else:
+        results = [run(*args) for args in zip(domains, paths, previous_paths)]
+    for result, previous_path in zip(results, previous_paths):
+        result["previous_path"] = previous_path
+
+    start = time.perf_counter()
+    if previous_csv:
+        rows, summary = merge_with_previous(results, read_previous_csv(previous_csv))
+        if changelog:
+            write_changelog(changelog, results, summary, previous_csv, output)
+        for result in results:
+            result["summary"] = summary
+    else:
+        rows = [row for result in results for row in result["rows"]]
+    write_csv(rows, output)
+    write_time = time.perf_counter() - start
+    for result in results:
+        result["timings"]["write"] = write_time
+    return results
+
+
+def resolve_bundles(args: argparse.Namespace) -> Dict[str, str]:
+    """Explicit --bundle paths win; otherwise look for <domain>.json in --bundle-dir"""
+    bundles = {}
+    for spec in args.bundle:
+        domain, sep, path = spec.partition("=")
+        if not sep or domain not in DOMAINS:
+            raise SystemExit(f"[!] --bundle expects DOMAIN=PATH with DOMAIN in {', '.join(DOMAINS)}: {spec}")
+        bundles[domain] = path
+    for domain in args.domain or ([] if bundles else list(DOMAINS)):
+        if domain not in bundles:
+            path = os.path.join(args.bundle_dir, f"{domain}.json")
+            if os.path.exists(path):
+                bundles[domain] = path
+            elif args.domain:
+                raise SystemExit(f"[!] Bundle for {domain} not found: {path}")
+    if not bundles:
+        raise SystemExit(f"[!] No ATT&CK bundles found in {args.bundle_dir} (expected e.g. enterprise-attack.json)")
+    return bundles
+
+
+def resolve_previous_bundles(args: argparse.Namespace, bundles: Dict[str, str]) -> Dict[str, str]:
+    """Previous release bundles from --previous-bundle and --previous-dir, for the domains being generated"""
+    previous = {}
+    for spec in args.previous_bundle:
+        domain, sep, path = spec.partition("=")
+        if not sep or domain not in DOMAINS:
+            raise SystemExit(f"[!] --previous-bundle expects DOMAIN=PATH with DOMAIN in {', '.join(DOMAINS)}: {spec}")
+        previous[domain] = path
+    if args.previous_dir:
+        for domain in bundles:
+            path = os.path.join(args.previous_dir, f"{domain}.json")
+            if domain not in previous and os.path.exists(path):
+                previous[domain] = path
+    return previous
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Generate the ATT&CK tactic/technique CSV from STIX bundles")
+    parser.add_argument("--bundle-dir", default=BUNDLE_DIR, help="directory holding <domain>.json bundles (default: %(default)s)")
+    parser.add_argument("--domain", action="append", choices=list(DOMAINS), help="domain to include; repeatable (default: all found)")
+    parser.add_argument("--bundle", action="append", default=[], metavar="DOMAIN=PATH", help="explicit bundle path for a domain")
+    parser.add_argument("--output", default=OUTPUT_CSV, help="CSV to write (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per domain)")
+    parser.add_argument("--previous-dir", help="directory with the previous release's <domain>.json bundles")
+    parser.add_argument("--previous-bundle", action="append", default=[], metavar="DOMAIN=PATH",
+                        help="previous release bundle for a domain")
+    parser.add_argument("--previous-csv", help="catalog to update (default: --output if it exists)")
+    parser.add_argument("--changelog", help="JSON changelog path (default: <output>.changelog.json)")
+    parser.add_argument("--full", action="store_true", help="ignore any previous CSV and start from scratch")
+    parser.add_argument("--snapshot", help="catalog snapshot path (default: <output>.catalog)")
+    parser.add_argument("--no-snapshot", action="store_true", help="only write the CSV")
+    parser.add_argument("--ingest", choices=("stream", "full"), default="stream",
+                        help="stream bundles object by object into compact records (default) or json.load them whole")
+    parser.add_argument("--read-size-kb", type=int, default=READ_SIZE // 1024, help="streaming read buffer size")
+    parser.add_argument("--max-memory-mb", type=float, default=None,
+                        help="fail if a worker's peak RSS exceeds this (per process; use --workers 1 to bound the total)")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    bundles = resolve_bundles(args)
+    previous_bundles = resolve_previous_bundles(args, bundles)
+    previous_csv = None
+    if not args.full:
+        previous_csv = args.previous_csv or (args.output if os.path.exists(args.output) else None)
+    changelog = args.changelog or (f"{os.path.splitext(args.output)[0]}.changelog.json" if previous_csv else None)
+
+    start = time.perf_counter()
+    try:
+        results = generate(
+            bundles, args.output, args.workers, previous_bundles, previous_csv, changelog,
+            args.ingest, args.read_size_kb * 1024, args.max_memory_mb,
+        )
+    except MemoryCeilingExceeded as e:
+        print(f"[!] {e}")
+        return 1
+    snapshot = None
+    if not args.no_snapshot:
+        snapshot_start = time.perf_counter()
+        snapshot = write_catalog_snapshot(args.output, args.snapshot or snapshot_path_for(args.output))
+        snapshot_time = time.perf_counter() - snapshot_start
+    total = time.perf_counter() - start
+
+    for result in results:
+        t = result["timings"]
+        print(f"[i] {result['domain']}: {result['objects']} objects ({result['records']} kept), "
+              f"{result['tactics']} tactics, {len(result['rows'])} rows, {result['skipped']} skipped, "
+              f"peak RSS {result['peak_rss_mb']:.0f} MB | "
+              f"load {t['load']:.2f}s, index {t['index']:.2f}s, rows {t['rows']:.2f}s"
+              + (f", diff {t['diff']:.2f}s" if "diff" in t else ""))
+        if result["changes"] is not None:
+            counts = {}
+            for change in result["changes"]:
+                counts[change["change"]] = counts.get(change["change"], 0) + 1
+            summary = ", ".join(f"{count} {change}" for change, count in sorted(counts.items())) or "no changes"
+            print(f"[i] {result['domain']}: {summary} since {result['previous_path']}")
+    if previous_csv:
+        summary = results[0]["summary"]
+        print(f"[i] Rows vs {previous_csv}: {summary['kept']} kept, {summary['updated']} updated, "
+              f"{summary['added']} added, {summary['removed']} removed; changelog {changelog}")
+    print(f"[+] Saved {sum(len(r['rows']) for r in results)} rows to {args.output} "
+          f"(write {results[0]['timings']['write']:.2f}s, total {total:.2f}s)")
+    if snapshot:
+        print(f"[+] Saved catalog snapshot to {snapshot} ({os.path.getsize(snapshot)} bytes, {snapshot_time:.2f}s)")
+    print(f"[i] Skipped {sum(r['skipped'] for r in results)} technique/sub-technique objects lacking ID/description/platform.")
+    return 0
+
 
-# Write CSV
-with open(OUTPUT_CSV, "w", newline="", encoding="utf-8") as f:
-    writer = csv.writer(f)
-    writer.writerow([
-        "Tactic_Name",
-        "Tactic_ID",
-        "Tactic_Description",
-        "Technique_Name",
-        "Technique_ID",
-        "Technique_Description",
-        "Platform",
-        "Matrices",
-        "CIA",
-        "STRIDE"
-    ])
-    writer.writerows(rows)
-
-print(f"[+] Saved {len(rows)} rows to {OUTPUT_CSV}")
-print(f"[i] Skipped {skipped_no_required} technique/sub-technique objects lacking ID/description/platform.")
+if __name__ == "__main__":
+    sys.exit(main())
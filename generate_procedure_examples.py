@@ -0,0 +1,212 @@
+"""
+Pre-generate procedure examples for every technique in the catalog.
+
+Results go straight into the LLM response cache that /api/procedure/generate
+reads from, keyed the same way the API keys them, so a finished run means
+no user ever waits on the model. Techniques that already have an entry for
+the current model and prompt template are skipped, which also makes an
+interrupted run resumable: just start it again.
+
+    python generate_procedure_examples.py --concurrency 4
+    python generate_procedure_examples.py --base-url http://127.0.0.1:9999/v1 --limit 20
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+from typing import List, Optional, Tuple
+
+import openai
+
+from endpoints.procedure_example import (
+    PROCEDURE_TEMPLATE_VERSION,
+    build_procedure_prompt,
+    prepare_description,
+    procedure_cache_key,
+)
+from utils.catalog import CATALOG_CSV, TechniqueCatalog, is_subtechnique
+from utils.llm_cache import LLM_CACHE_DB, LLMResponseCache
+from utils.llm_client import LLM_ATTEMPT_TIMEOUT, LLMClient
+from utils.resilience import ResilientCaller, retry_delay, retryable_errors
+
+
+class RunStats:
+    """Counters reported at the end of a run"""
+
+    def __init__(self, total: int):
+        self.total = total
+        self.generated = 0
+        self.skipped = 0
+        self.retries = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.failures: List[Tuple[str, str]] = []
+        self.started = time.time()
+
+    def elapsed(self) -> float:
+        return time.time() - self.started
+
+    def progress(self) -> str:
+        done = self.generated + self.skipped + len(self.failures)
+        rate = self.generated / self.elapsed() * 60 if self.elapsed() else 0.0
+        return (
+            f"{done}/{self.total} done | generated {self.generated} | skipped {self.skipped} | "
+            f"failed {len(self.failures)} | {rate:.1f}/min"
+        )
+
+
+class RateLimitGate:
+    """Shared pause so one 429 backs off every worker, not just the one that saw it"""
+
+    def __init__(self):
+        self.resume_at = 0.0
+
+    def pause(self, seconds: float):
+        self.resume_at = max(self.resume_at, time.monotonic() + seconds)
+
+    async def wait(self):
+        delay = self.resume_at - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+def load_techniques(path: str, include_subtechniques: bool) -> List[Tuple[str, str, str]]:
+    """(technique_id, name, description) once per technique, in catalog order"""
+    catalog = TechniqueCatalog.from_csv(path)
+    techniques = []
+    for technique_id, rows in catalog.by_technique_id.items():
+        row = catalog.row(rows[0], ["Technique_ID", "Technique_Name", "Technique_Description"])
+        if not include_subtechniques and is_subtechnique(row["Technique_ID"]):
+            continue
+        if row["Technique_Name"] and row["Technique_Description"]:
+            techniques.append((row["Technique_ID"], row["Technique_Name"], row["Technique_Description"]))
+    return techniques
+
+
+async def generate_one(
+    llm_client: LLMClient,
+    cache: LLMResponseCache,
+    gate: RateLimitGate,
+    stats: RunStats,
+    technique: Tuple[str, str, str],
+    args: argparse.Namespace,
+):
+    technique_id, name, description = technique
+    # Same compaction as the API, so the entries written here are the ones it looks up
+    description = prepare_description(name, description)
+    cache_key = procedure_cache_key(name, description)
+    # The cache blocks on SQLite; keep it off the loop the workers and the rate-limit gate share
+    if await asyncio.to_thread(cache.contains, cache_key):
+        stats.skipped += 1
+        return
+
+    prompt = build_procedure_prompt(name, description)
+    for attempt in range(args.max_retries + 1):
+        await gate.wait()
+        try:
+            completion = await llm_client.complete(prompt)
+        except retryable_errors() as e:
+            if attempt == args.max_retries:
+                stats.failures.append((technique_id, f"{type(e).__name__}: {e}"))
+                return
+            delay = retry_delay(e, attempt, args.backoff_base, args.backoff_cap)
+            if isinstance(e, openai.RateLimitError):
+                gate.pause(delay)
+            stats.retries += 1
+            await asyncio.sleep(delay)
+            continue
+        except Exception as e:
+            stats.failures.append((technique_id, f"{type(e).__name__}: {e}"))
+            return
+
+        await asyncio.to_thread(cache.set, cache_key, completion.text, name, LLMClient.OPENAI_MODEL)
+        stats.generated += 1
+        stats.prompt_tokens += completion.prompt_tokens
+        stats.completion_tokens += completion.completion_tokens
+        return
+
+
+async def run(args: argparse.Namespace) -> RunStats:
+    techniques = load_techniques(args.catalog, not args.no_subtechniques)
+    if args.limit:
+        techniques = techniques[:args.limit]
+
+    cache = LLMResponseCache(db_path=args.cache_db)
+    # Retries happen here, behind the shared rate-limit gate; a bulk run should not trip a circuit breaker
+    llm_client = LLMClient(
+        base_url=args.base_url,
+        max_connections=args.concurrency,
+        resilience=ResilientCaller(max_retries=0, attempt_timeout=LLM_ATTEMPT_TIMEOUT)
+    )
+    gate = RateLimitGate()
+    stats = RunStats(len(techniques))
+    queue: "asyncio.Queue[Tuple[str, str, str]]" = asyncio.Queue()
+    for technique in techniques:
+        queue.put_nowait(technique)
+
+    print(f"[i] {len(techniques)} techniques from {args.catalog}, model {LLMClient.OPENAI_MODEL}, "
+          f"template {PROCEDURE_TEMPLATE_VERSION}, concurrency {args.concurrency}")
+
+    async def worker():
+        while True:
+            try:
+                technique = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            await generate_one(llm_client, cache, gate, stats, technique, args)
+            done = stats.generated + stats.skipped + len(stats.failures)
+            if done % args.progress_every == 0:
+                print(f"[i] {stats.progress()}")
+
+    try:
+        await asyncio.gather(*[worker() for _ in range(args.concurrency)])
+    finally:
+        await llm_client.aclose()
+        cache.close()
+    return stats
+
+
+def report(stats: RunStats):
+    elapsed = stats.elapsed()
+    rate = stats.generated / elapsed * 60 if elapsed else 0.0
+    print(f"[+] Generated {stats.generated}, skipped {stats.skipped} already cached, "
+          f"failed {len(stats.failures)} of {stats.total} in {elapsed:.1f}s ({rate:.1f} techniques/min)")
+    print(f"[i] Tokens: {stats.prompt_tokens} prompt + {stats.completion_tokens} completion "
+          f"= {stats.prompt_tokens + stats.completion_tokens}; {stats.retries} retries")
+    for technique_id, error in stats.failures:
+        print(f"[!] {technique_id}: {error}")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Pre-generate procedure examples into the LLM response cache")
+    parser.add_argument("--catalog", default=CATALOG_CSV, help="technique catalog CSV (default: %(default)s)")
+    parser.add_argument("--cache-db", default=LLM_CACHE_DB, help="LLM cache database the API reads (default: %(default)s)")
+    parser.add_argument("--base-url", default=os.getenv("OPENAI_BASE_URL") or None,
+                        help="OpenAI-compatible endpoint, e.g. a local stand-in")
+    parser.add_argument("--concurrency", type=int, default=4, help="parallel requests (default: %(default)s)")
+    parser.add_argument("--limit", type=int, default=0, help="only process the first N techniques")
+    parser.add_argument("--no-subtechniques", action="store_true", help="skip dotted sub-technique IDs")
+    parser.add_argument("--max-retries", type=int, default=6, help="retries per technique (default: %(default)s)")
+    parser.add_argument("--backoff-base", type=float, default=1.0, help="initial backoff seconds (default: %(default)s)")
+    parser.add_argument("--backoff-cap", type=float, default=60.0, help="maximum backoff seconds (default: %(default)s)")
+    parser.add_argument("--progress-every", type=int, default=25, help="print progress every N techniques")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    # One line per HTTP request drowns out the progress report
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    try:
+        stats = asyncio.run(run(args))
+    except KeyboardInterrupt:
+        print("[!] Interrupted; finished techniques are cached, re-run to resume")
+        return 130
+    report(stats)
+    return 1 if stats.failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
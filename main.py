@@ -1,20 +1,29 @@
-from fastapi import FastAPI, Request
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
-import time
-
-# Import the endpoint routers and logger
-from endpoints import feedback, procedure_example
-from utils.logger import app_logger
+# Time start-up from the first import on; the breakdown is served at /health/startup
+from utils.startup import startup_timer
 
-# Application Configuration - loaded from environment variables
+with startup_timer.phase("import fastapi"):
+    from fastapi import FastAPI, Request, Response
+    from fastapi.middleware.cors import CORSMiddleware
 import os
-from dotenv import load_dotenv
+import threading
+import time
+from typing import Optional
 
-# Load environment variables from .env file
-load_dotenv()
+# Import the endpoint routers and logger (openai is imported lazily, on first use)
+with startup_timer.phase("import application"):
+    from endpoints import catalog, facets, feedback, graph, metrics, procedure_example, search, techniques
+    from utils.logger import app_logger
+    from utils.metrics import HTTP_IN_FLIGHT, HTTP_LATENCY, HTTP_REQUESTS, UNMATCHED_ROUTE
+    from utils.catalog import CATALOG_CSV, CATALOG_WATCH_INTERVAL, CatalogWatcher, current_catalog_version, load_catalog
+    from utils.static_assets import PRECOMPRESS_ASSETS, static_assets
+    from utils.search import get_search_index
+    from utils.facets import get_facet_index
+    from utils.graph import get_graph_state
+    from utils.llm_client import close_shared_llm_client
+    from utils.llm_health import LLM_HEALTH_GATES_READINESS, LLM_HEALTH_INTERVAL, get_llm_health
+    from utils.feedback_store import FEEDBACK_BACKEND, close_feedback_store, get_feedback_store
 
+# Application Configuration - loaded from environment variables (.env is loaded once, by utils.config)
 APP_HOST = os.getenv("APP_HOST", "0.0.0.0")
 APP_PORT = int(os.getenv("APP_PORT", "8000"))
 APP_DEBUG = os.getenv("APP_DEBUG", "false").lower() == "true"
@@ -30,12 +39,103 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Mount static files (HTML, CSS, JS) at /static
-app.mount("/static", StaticFiles(directory="."), name="static")
-
 # Include the endpoint routers
 app.include_router(feedback.router)
 app.include_router(procedure_example.router)
+app.include_router(techniques.router)
+app.include_router(catalog.router)
+app.include_router(search.router)
+app.include_router(facets.router)
+app.include_router(graph.router)
+app.include_router(metrics.router)
+
+@app.on_event("startup")
+async def load_technique_catalog():
+    """Map the catalog snapshot (or parse mitre.csv) once so catalog requests are served from memory"""
+    with startup_timer.phase("catalog"):
+        catalog = load_catalog()
+    app_logger.log_system(f"Loaded technique catalog: {catalog.size} rows from {CATALOG_CSV} ({catalog.loaded_from})", "INFO")
+    with startup_timer.phase("facet index"):
+        facet_index = get_facet_index()
+    facet_values = sum(len(values) for values in facet_index.bitsets.values())
+    app_logger.log_system(f"Built facet index: {facet_values} facet values over {catalog.size} rows", "INFO")
+    # The force layout takes a few seconds when not cached on disk; compute it off the event loop
+    with startup_timer.phase("graph"):
+        graph_state = get_graph_state()
+    graph_state.start_layout()
+
+catalog_watcher: Optional[CatalogWatcher] = None
+
+@app.on_event("startup")
+async def watch_technique_catalog():
+    """Reload the catalog in the background whenever mitre.csv is replaced"""
+    global catalog_watcher
+    if CATALOG_WATCH_INTERVAL <= 0:
+        return
+    catalog_watcher = CatalogWatcher(
+        on_reload=catalog.log_reload,
+        on_error=lambda e: app_logger.log_system(f"Catalog reload failed, keeping the current version: {str(e)}", "ERROR")
+    )
+    catalog_watcher.start()
+    app_logger.log_system(f"Watching {CATALOG_CSV} for changes every {CATALOG_WATCH_INTERVAL:g}s", "INFO")
+
+@app.on_event("startup")
+async def open_feedback_store():
+    """Open the feedback store (importing feedback.csv into a new database)"""
+    with startup_timer.phase("feedback store"):
+        store = get_feedback_store()
+    app_logger.log_system(f"Opened {FEEDBACK_BACKEND} feedback store: {store.count()} entries", "INFO")
+
+def warm_up():
+    """Build what can wait until after start-up; a request that needs it first builds (or waits for) it"""
+    with startup_timer.phase("search index"):
+        index = get_search_index()
+    app_logger.log_system(f"Built search index: {len(index.documents)} techniques, {len(index.vocabulary)} terms", "INFO")
+    # Compress the frontend files once so requests only pick an encoding
+    with startup_timer.phase("precompress assets"):
+        sizes = static_assets.precompress()
+    for path, encodings in sizes.items():
+        summary = ", ".join(f"{enc}={size}" for enc, size in encodings.items())
+        app_logger.log_system(f"Precompressed {path}: {summary}", "INFO")
+
+@app.on_event("startup")
+async def start_warm_up():
+    """Build the search index and compressed assets in the background instead of delaying readiness"""
+    threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+
+@app.on_event("startup")
+async def start_llm_health_prober():
+    """Probe the LLM upstream in the background so health checks only read a cached status"""
+    get_llm_health().start()
+    if LLM_HEALTH_INTERVAL > 0:
+        app_logger.log_system(f"Probing the LLM upstream every {LLM_HEALTH_INTERVAL:g}s", "INFO")
+
+@app.on_event("startup")
+async def report_startup_time():
+    """Registered last: everything before this ran before the first request can be served"""
+    startup_timer.mark_ready()
+    app_logger.log_system(startup_timer.summary(), "INFO")
+
+@app.on_event("shutdown")
+async def stop_llm_health_prober():
+    """Stop probing before the client's connection pool is closed"""
+    await get_llm_health().stop()
+
+@app.on_event("shutdown")
+async def close_llm_client():
+    """Drain the LLM connection pool on shutdown"""
+    await close_shared_llm_client()
+
+@app.on_event("shutdown")
+async def stop_catalog_watcher():
+    """Stop polling mitre.csv"""
+    if catalog_watcher is not None:
+        catalog_watcher.stop()
+
+@app.on_event("shutdown")
+async def flush_feedback_store():
+    """Write out any queued feedback before exiting"""
+    close_feedback_store()
 
 # Logging middleware
 @app.middleware("http")
@@ -43,20 +143,28 @@ async def log_requests(request: Request, call_next):
     """Middleware to log all requests and responses"""
     start_time = time.time()
     
-    # Get client IP
-    client_ip = request.client.host if request.client else "unknown"
-    user_agent = request.headers.get("user-agent", "unknown")
+    # Excluded and unsampled paths skip request/response logging (errors are always logged)
+    path = request.url.path
+    log_this = app_logger.should_log_request(path)
     
     # Log the request
-    app_logger.log_request(request.method, request.url.path, client_ip, user_agent)
+    if log_this:
+        client_ip = request.client.host if request.client else "unknown"
+        user_agent = request.headers.get("user-agent", "unknown")
+        app_logger.log_request(request.method, path, client_ip, user_agent)
     
     # Process the request
+    HTTP_IN_FLIGHT.inc()
+    status_code = 500
     try:
         response = await call_next(request)
+        status_code = response.status_code
         response_time = time.time() - start_time
+        startup_timer.mark_first_response()
         
         # Log the response
-        app_logger.log_response(request.method, request.url.path, response.status_code, response_time)
+        if log_this:
+            app_logger.log_response(request.method, path, response.status_code, response_time)
         
         return response
         
@@ -64,25 +172,38 @@ async def log_requests(request: Request, call_next):
         response_time = time.time() - start_time
         
         # Log the error
-        app_logger.log_error(request.method, request.url.path, e, 500)
+        app_logger.log_error(request.method, path, e, 500)
         
         # Re-raise the exception
         raise
+    
+    finally:
+        HTTP_IN_FLIGHT.dec()
+        # Label by route template (/api/techniques/{technique_id}), never by raw path
+        route = request.scope.get("route")
+        route_path = getattr(route, "path", UNMATCHED_ROUTE)
+        HTTP_REQUESTS.inc(request.method, route_path, str(status_code))
+        HTTP_LATENCY.observe(time.time() - start_time, request.method, route_path)
 
-@app.get("/")
-async def read_index():
+@app.api_route("/", methods=["GET", "HEAD"])
+async def read_index(request: Request):
     """Serve the main index.html file"""
-    return FileResponse("index.html")
+    return await static_assets.response(request, "index.html")
 
-@app.get("/index.html")
-async def read_index_html():
-    """Serve the main index.html file"""
-    return FileResponse("index.html")
+@app.api_route("/static/{path:path}", methods=["GET", "HEAD"])
+async def read_static(request: Request, path: str):
+    """Serve the frontend files (HTML pages, scripts, stylesheets, mitre.csv) with compression and ETags"""
+    return await static_assets.response(request, path)
 
-@app.get("/network.html")
-async def read_network_html():
-    """Serve the network.html file"""
-    return FileResponse("network.html")
+def asset_route(asset: str):
+    async def read_asset(request: Request):
+        return await static_assets.response(request, asset)
+    read_asset.__doc__ = f"Serve the {asset} file"
+    return read_asset
+
+# The pages reference their assets relative to the site root
+for asset in PRECOMPRESS_ASSETS:
+    app.add_api_route(f"/{asset}", asset_route(asset), methods=["GET", "HEAD"], include_in_schema=False)
 
 @app.get("/health")
 async def health_check():
@@ -90,12 +211,58 @@ async def health_check():
     return {
         "status": "healthy",
         "message": "MITRE ATT&CK application is running",
+        "llm": get_llm_health().current_state(),
         "endpoints": [
             "/api/feedback",
-            "/api/procedure"
+            "/api/procedure",
+            "/api/techniques",
+            "/api/search",
+            "/api/facets",
+            "/api/graph",
+            "/api/catalog",
+            "/metrics",
+            "/health/live",
+            "/health/ready",
+            "/health/startup"
         ]
     }
 
+@app.get("/health/live")
+async def liveness():
+    """Liveness: the process is up and its event loop is responsive"""
+    return {"status": "alive"}
+
+@app.get("/health/startup")
+async def startup_report():
+    """
+    Where start-up time went, in milliseconds
+
+    before_import_ms is interpreter start-up until main.py began importing
+    (Linux only). phases are the imports and startup steps up to readiness;
+    deferred lists work done after it, such as lazy imports on first use.
+    ready_ms and first_response_ms are measured from process launch.
+    """
+    return startup_timer.report()
+
+@app.get("/health/ready")
+async def readiness(response: Response):
+    """
+    Readiness: the catalog is loaded (and, with LLM_HEALTH_GATES_READINESS, the LLM upstream is up)
+
+    Only reads cached state. Returns 503 while not ready. The LLM status is
+    reported either way; by default an LLM outage does not take the instance
+    out of rotation, and generation requests fail fast with 503 on the
+    circuit breaker instead.
+    """
+    llm = get_llm_health()
+    checks = {"catalog": current_catalog_version().catalog.size > 0}
+    if LLM_HEALTH_GATES_READINESS:
+        checks["llm"] = llm.ready()
+    ready = all(checks.values())
+    if not ready:
+        response.status_code = 503
+    return {"status": "ready" if ready else "not_ready", "checks": checks, "llm": llm.status()}
+
 if __name__ == "__main__":
     import uvicorn
     
@@ -13,119 +13,56 @@ const NODE_COLORS = {
     [NODE_TYPES.TACTIC]: '#ffeaa7'  // Soft yellow for tactics
 };
 
-// Load and process the data (robust for quoted/multiline fields)
-async function loadData() {
-    try {
-        const dataRows = await d3.csv('mitre.csv');
+// API base URL (same origin as the page)
+const API_BASE = '/api';
 
-        // Process data into nodes and links
-        const nodes = new Map();
-        const links = [];
-        
-        // Add STRIDE categories
-        const strideCategories = [
-            'Spoofing',
-            'Tampering',
-            'Repudiation',
-            'Information Disclosure',
-            'Denial of Service',
-            'Elevation of Privilege'
-        ];
-        
-        strideCategories.forEach(category => {
-            nodes.set(category, {
-                id: category,
-                type: NODE_TYPES.STRIDE,
-                name: category,
-                radius: 12
-            });
-        });
-        
-        // Add CIA categories
-        const ciaCategories = ['Confidentiality', 'Integrity', 'Availability', 'Authorization', 'Authenticity', 'Non-Repudiation'];
-        ciaCategories.forEach(category => {
-            nodes.set(category, {
-                id: category,
-                type: NODE_TYPES.CIA,
-                name: category,
-                radius: 12
-            });
-        });
-        
-        // First pass: collect all unique tactics
-        const tactics = new Set();
-        dataRows.forEach(row => {
-            const tactic = (row.Tactic_Name || row.Tactic || '').trim();
-            const techniqueId = (row.Technique_ID || '').trim();
-            if (/\./.test(techniqueId)) return; // exclude sub-techniques
-            if (tactic) tactics.add(tactic);
-        });
-        
-        // Add tactic nodes
-        tactics.forEach(tactic => {
-            nodes.set(tactic, {
-                id: tactic,
-                type: NODE_TYPES.TACTIC,
-                name: tactic,
-                radius: 15  // Slightly larger than STRIDE/CIA nodes
-            });
-        });
-        
-        // Process techniques and create links
-        dataRows.forEach(row => {
-            const tactic = (row.Tactic_Name || row.Tactic || '').trim();
-            const techniqueName = (row.Technique_Name || row.TechniqueName || '').trim();
-            const techniqueId = (row.Technique_ID || '').trim();
-            const stride = (row.STRIDE || '').trim();
-            const cia = (row.CIA || '').trim();
-            const description = (row.Technique_Description || row.TechniqueDescription || '').trim();
+const NODE_RADII = {
+    [NODE_TYPES.TECHNIQUE]: 6,  // Smaller than category nodes
+    [NODE_TYPES.STRIDE]: 12,
+    [NODE_TYPES.CIA]: 12,
+    [NODE_TYPES.TACTIC]: 15     // Slightly larger than STRIDE/CIA nodes
+};
 
-            if (!techniqueName) return;
-            if (/\./.test(techniqueId)) return; // exclude sub-techniques
+// Load the prebuilt graph (integer-indexed nodes/links plus a settled layout) from the server
+async function loadData() {
+    try {
+        const response = await fetch(`${API_BASE}/graph/?layout=true`);
+        if (!response.ok) {
+            throw new Error(`HTTP error! status: ${response.status}`);
+        }
+        const graph = await response.json();
+        const layout = graph.layout;
 
-            // Add technique node if it doesn't exist
-            if (!nodes.has(techniqueName)) {
-                nodes.set(techniqueName, {
-                    id: techniqueName,
-                    type: NODE_TYPES.TECHNIQUE,
-                    name: techniqueName,
-                    tactic: tactic,
-                    description: description,
-                    radius: 6  // Smaller than category nodes
-                });
+        const nodes = graph.nodes.id.map((id, i) => {
+            const type = graph.node_types[graph.nodes.type[i]];
+            const node = {
+                id: id,
+                type: type,
+                name: id,
+                radius: NODE_RADII[type]
+            };
+            if (type === NODE_TYPES.TECHNIQUE) {
+                node.techniqueId = graph.nodes.technique_id[i];
+                node.tactic = graph.nodes.tactic[i];
             }
-
-            if (tactic) {
-                links.push({
-                    source: techniqueName,
-                    target: tactic,
-                    value: 1,
-                    type: 'tactic'
-                });
+            if (layout) {
+                node.x = layout.x[i];
+                node.y = layout.y[i];
             }
+            return node;
+        });
 
-            if (stride) {
-                links.push({
-                    source: techniqueName,
-                    target: stride,
-                    value: 1,
-                    type: 'stride'
-                });
-            }
+        const links = graph.links.source.map((source, i) => ({
+            source: nodes[source].id,
+            target: nodes[graph.links.target[i]].id,
+            value: 1,
+            type: graph.link_types[graph.links.type[i]]
+        }));
 
-            if (cia) {
-                links.push({
-                    source: techniqueName,
-                    target: cia,
-                    value: 1,
-                    type: 'cia'
-                });
-            }
-        });
-        
         return {
-            nodes: Array.from(nodes.values()),
-            links: links
+            nodes: nodes,
+            links: links,
+            settled: Boolean(layout)
         };
     } catch (error) {
         console.error('Error loading data:', error);
@@ -133,6 +70,20 @@ async function loadData() {
     }
 }
 
+// Fetch a technique description on demand for the fallback alert
+async function fetchTechniqueDescription(techniqueId) {
+    if (!techniqueId) return '';
+    try {
+        const response = await fetch(`${API_BASE}/techniques/${encodeURIComponent(techniqueId)}?fields=Technique_Description`);
+        if (!response.ok) return '';
+        const data = await response.json();
+        return (data.technique.Technique_Description || '').trim();
+    } catch (error) {
+        console.error('Error loading technique description:', error);
+        return '';
+    }
+}
+
 // Initialize the force simulation
 function createForceSimulation(data) {
     const svg = d3.select('#network');
@@ -154,6 +105,14 @@ function createForceSimulation(data) {
     // Create container for the graph
     const container = svg.append('g');
     
+    // Server layout is centred on (0, 0); shift it into the viewport
+    if (data.settled) {
+        data.nodes.forEach(d => {
+            d.x += width / 2;
+            d.y += height / 2;
+        });
+    }
+    
     // Create the force simulation
     const simulation = d3.forceSimulation(data.nodes)
         .force('link', d3.forceLink(data.links)
@@ -173,6 +132,11 @@ function createForceSimulation(data) {
         .force('center', d3.forceCenter(width / 2, height / 2))
         .force('collision', d3.forceCollide().radius(d => d.radius * 1.5));
     
+    // A precomputed layout is already settled, so only let it relax briefly
+    if (data.settled) {
+        simulation.alpha(0.05);
+    }
+    
     // Create the links with different styles
     const link = container.append('g')
         .selectAll('line')
@@ -245,8 +209,10 @@ function createForceSimulation(data) {
                 if (typeof showTechniqueDescription === 'function') {
                     showTechniqueDescription(d.name);
                 } else {
-                    const desc = d.description || 'No description available.';
-                    alert(`${d.name}\n\n${desc}`);
+                    fetchTechniqueDescription(d.techniqueId).then(description => {
+                        const desc = description || 'No description available.';
+                        alert(`${d.name}\n\n${desc}`);
+                    });
                 }
             }
         });
@@ -50,11 +50,48 @@ function initializeSidPersistence() {
 // Initialize SID persistence when DOM is loaded
 document.addEventListener('DOMContentLoaded', initializeSidPersistence);
 
-// Function to fetch and parse CSV data (robust for quoted/multiline fields)
-async function loadMitreData() {
+// Fields the matrix view needs; descriptions are fetched on demand per technique
+const MATRIX_FIELDS = ['Tactic_Name', 'Technique_Name', 'Technique_ID', 'Platform', 'CIA', 'STRIDE'];
+// Rows per /api/techniques/ request (the server caps a page at 1000)
+const TECHNIQUES_PAGE_SIZE = 1000;
+let mitreDataPromise = null;
+
+// Fetch the technique catalog once from the server-side index and cache it for the page
+function loadMitreData() {
+    if (!mitreDataPromise) {
+        mitreDataPromise = fetchMitreData().then(data => {
+            if (!data) mitreDataPromise = null;
+            return data;
+        });
+    }
+    return mitreDataPromise;
+}
+
+// Page through /api/techniques/ until every matching row has been fetched
+async function fetchAllTechniques(filters) {
+    const rows = [];
+    let total = Infinity;
+    while (rows.length < total) {
+        const params = new URLSearchParams({ ...filters, offset: String(rows.length), limit: String(TECHNIQUES_PAGE_SIZE) });
+        const response = await fetch(`${API_BASE}/techniques/?${params}`);
+        if (!response.ok) {
+            throw new Error(`HTTP error! status: ${response.status}`);
+        }
+        const page = await response.json();
+        rows.push(...page.techniques);
+        total = page.total;
+        if (page.techniques.length === 0) break;
+    }
+    return rows;
+}
+
+async function fetchMitreData() {
     try {
-        const rows = await d3.csv('mitre.csv');
-        // Adapt to new CSV schema and exclude sub-techniques (Technique_ID with a dot)
+        const rows = await fetchAllTechniques({
+            include_subtechniques: 'false',
+            fields: MATRIX_FIELDS.join(',')
+        });
+        // Server already excludes sub-techniques; keep the guard for rows without names
         const dataRows = rows.filter(r => {
             const tacticName = (r.Tactic_Name || r.Tactic || '').trim();
             const techniqueName = (r.Technique_Name || r.TechniqueName || '').trim();
@@ -72,7 +109,6 @@ async function loadMitreData() {
             const rawStride = (r.STRIDE || '').trim();
             const rawCia = (r.CIA || '').trim();
             const { stride, cia } = normalizeStrideAndCia(rawStride, rawCia);
-            const description = (r.Technique_Description || r.TechniqueDescription || '').trim();
             const tags = (r.Platform || r.Tags || '')
                 .split(',')
                 .map(t => t.trim())
@@ -92,7 +128,6 @@ async function loadMitreData() {
                 name: techniqueName,
                 stride: stride,
                 cia: cia,
-                description: description,
                 tags: tags
             });
             tacticData.count++;
@@ -138,26 +173,26 @@ async function loadMitreData() {
 }
 
 // Feedback collection system
-let feedbackData = [];
+let feedbackCount = 0;
 
-// API base URL
-const API_BASE = 'http://localhost:8000/api';
+// API base URL (same origin as the page)
+const API_BASE = '/api';
 
-// Load feedback from server on page load
+// Load the feedback count from server on page load (the aggregate stats, not the full history)
 async function loadFeedbackFromServer() {
     try {
-        const response = await fetch(`${API_BASE}/feedback`);
+        const response = await fetch(`${API_BASE}/feedback/stats`);
         if (response.ok) {
             const data = await response.json();
-            feedbackData = data.feedback || [];
-            console.log('Loaded feedback from server:', feedbackData.length, 'entries');
+            feedbackCount = data.totals ? data.totals.total : 0;
+            console.log('Loaded feedback count from server:', feedbackCount, 'entries');
             updateDownloadButtonText();
         } else {
             console.error('Error loading feedback from server:', response.status);
         }
     } catch (error) {
         console.error('Error loading feedback from server:', error);
-        feedbackData = [];
+        feedbackCount = 0;
     }
 }
 
@@ -201,58 +236,21 @@ function generateFeedbackId() {
 // Download feedback as CSV
 async function downloadFeedbackCSV() {
     try {
-        console.log('Attempting to download feedback CSV...');
+        if (feedbackCount === 0) {
+            showFeedbackMessage('No feedback to download.', 'error');
+            return;
+        }
         
-        // First, get the feedback data from the API
-        const response = await fetch(`${API_BASE}/feedback`);
-        console.log('API response status:', response.status);
+        // The server streams the CSV; let the browser write it straight to disk
+        console.log('Downloading feedback CSV...');
+        const a = document.createElement('a');
+        a.href = `${API_BASE}/feedback/download`;
+        a.download = 'feedback.csv';
+        document.body.appendChild(a);
+        a.click();
+        document.body.removeChild(a);
         
-        if (response.ok) {
-            const data = await response.json();
-            const feedback = data.feedback || [];
-            console.log('Retrieved feedback data:', feedback.length, 'entries');
-            
-            if (feedback.length === 0) {
-                showFeedbackMessage('No feedback to download.', 'error');
-                return;
-            }
-            
-            // Create CSV content
-            const headers = ['ID', 'Technique', 'STRIDE', 'CIA', 'Feedback Type', 'SID', 'Comment', 'Timestamp'];
-            const csvContent = [
-                headers.join(','),
-                ...feedback.map(f => [
-                    f.ID || f.id,
-                    `"${f.Technique || f.technique}"`,
-                    f.STRIDE || f.stride,
-                    f.CIA || f.cia,
-                    f['Feedback Type'] || f.feedback_type,
-                    f.SID || f.sid || '',
-                    `"${f.Comment || f.comment || ''}"`,
-                    f.Timestamp || f.timestamp
-                ].join(','))
-            ].join('\n');
-            
-            console.log('Generated CSV content length:', csvContent.length);
-            
-            // Create and download the blob
-            const blob = new Blob([csvContent], { type: 'text/csv' });
-            const url = window.URL.createObjectURL(blob);
-            const a = document.createElement('a');
-            a.href = url;
-            a.download = 'feedback.csv';
-            document.body.appendChild(a);
-            a.click();
-            document.body.removeChild(a);
-            window.URL.revokeObjectURL(url);
-            
-            showFeedbackMessage(`Downloaded feedback CSV! (${feedback.length} entries)`, 'success');
-        } else {
-            console.error('API request failed with status:', response.status);
-            const errorText = await response.text();
-            console.error('Error response:', errorText);
-            showFeedbackMessage(`Download failed: ${response.status}`, 'error');
-        }
+        showFeedbackMessage(`Downloading feedback CSV (${feedbackCount} entries)`, 'success');
     } catch (error) {
         console.error('Error downloading feedback:', error);
         showFeedbackMessage(`Download error: ${error.message}`, 'error');
@@ -268,11 +266,13 @@ async function clearAllFeedback() {
             });
             
             if (response.ok) {
-                feedbackData = [];
+                feedbackCount = 0;
                 updateDownloadButtonText();
                 showFeedbackMessage('All feedback cleared!', 'success');
             } else {
-                showFeedbackMessage('Error clearing feedback.', 'error');
+                // Clearing needs the admin token, which the page does not have
+                const error = await response.json().catch(() => ({}));
+                showFeedbackMessage(`Error clearing feedback: ${error.detail || response.status}`, 'error');
             }
         } catch (error) {
             console.error('Error clearing feedback:', error);
@@ -303,9 +303,9 @@ async function handleThumbsUp(techniqueName, stride, cia) {
     
     const success = await submitFeedbackToServer(feedback, userSid);
     if (success) {
-        feedbackData.push(feedback);
+        feedbackCount++;
         console.log('Feedback collected:', feedback);
-        console.log('Total feedback count:', feedbackData.length);
+        console.log('Total feedback count:', feedbackCount);
         showFeedbackMessage('Feedback submitted successfully!', 'success');
         updateDownloadButtonText();
     }
@@ -422,12 +422,12 @@ async function saveFeedback(techniqueName, feedbackType, existingStride = '', ex
     
     const success = await submitFeedbackToServer(feedback, userSid);
     if (success) {
-        feedbackData.push(feedback);
+        feedbackCount++;
         console.log('Feedback collected:', feedback);
-        console.log('Total feedback count:', feedbackData.length);
+        console.log('Total feedback count:', feedbackCount);
         updateDownloadButtonText();
         closeFeedbackModal();
-        showFeedbackMessage(`Feedback submitted successfully! (Total: ${feedbackData.length})`, 'success');
+        showFeedbackMessage(`Feedback submitted successfully! (Total: ${feedbackCount})`, 'success');
     } else {
         showFeedbackMessage('Error submitting feedback. Please try again.', 'error');
     }
@@ -455,19 +455,37 @@ function showFeedbackMessage(message, type) {
     }, 3000);
 }
 
+// Fetch a single technique description from the catalog API (cached per technique)
+const descriptionCache = new Map();
+
+async function fetchTechniqueDescription(techniqueId) {
+    if (!techniqueId) return '';
+    if (descriptionCache.has(techniqueId)) return descriptionCache.get(techniqueId);
+    try {
+        const response = await fetch(`${API_BASE}/techniques/${encodeURIComponent(techniqueId)}?fields=Technique_Description`);
+        if (!response.ok) return '';
+        const data = await response.json();
+        const description = (data.technique.Technique_Description || '').trim();
+        descriptionCache.set(techniqueId, description);
+        return description;
+    } catch (error) {
+        console.error('Error loading technique description:', error);
+        return '';
+    }
+}
+
 // Show Technique Description modal
 function showTechniqueDescription(techniqueName) {
-    // Find technique across all tactics (data already rendered, so rebuild quick index)
-    // Safer approach: refetch lightweight mapping from current DOM dataset if available.
-    // Here, we re-use loadMitreData and search in-memory.
-    loadMitreData().then(tactics => {
+    // Find technique across all tactics in the cached catalog, then fetch its description
+    loadMitreData().then(async tactics => {
         if (!tactics) return;
         let found = null;
         for (const t of tactics) {
             const match = t.techniques.find(tech => tech.name === techniqueName);
             if (match) { found = match; break; }
         }
-        const description = (found && found.description) ? found.description : 'No description available.';
+        const fetched = found ? await fetchTechniqueDescription(found.id) : '';
+        const description = fetched || 'No description available.';
         const tags = (found && Array.isArray(found.tags)) ? found.tags : [];
 
         const existing = document.querySelector('.technique-modal');
@@ -483,7 +501,7 @@ function showTechniqueDescription(techniqueName) {
                 <div class="technique-description">${escapeHtml(description).replace(/\n/g,'<br>')}</div>
                 ${tags.length ? `<div class="tags-row" style="margin-top:8px;">${tagBadges}</div>` : ''}
                 <div class="modal-actions">
-                    <button class="btn-procedure" onclick="generateProcedureExample('${techniqueName}', '${escapeHtml(description)}')">Procedure</button>
+                    <button class="btn-procedure" onclick="generateProcedureExample('${techniqueName}', '${found ? escapeHtml(found.id) : ''}')">Procedure</button>
                     <button class="btn-cancel" onclick="closeTechniqueModal()">Close</button>
                 </div>
             </div>
@@ -493,71 +511,99 @@ function showTechniqueDescription(techniqueName) {
 }
 
 function closeTechniqueModal() {
+    if (procedureAbortController) procedureAbortController.abort();
     const m = document.querySelector('.technique-modal');
     if (m) m.remove();
 }
 
-// Generate procedure example using LLM
-async function generateProcedureExample(techniqueName, techniqueDescription) {
-    console.log('generateProcedureExample called with:', { techniqueName, techniqueDescription });
+// In-flight procedure stream, aborted when the modal closes so the server stops generating
+let procedureAbortController = null;
+
+// Generate procedure example using LLM, rendering tokens as they stream in.
+// Only the technique ID is sent; the server resolves the description from its catalog.
+async function generateProcedureExample(techniqueName, techniqueId) {
+    // Show loading state
+    const procedureButton = document.querySelector('.btn-procedure');
+    if (!procedureButton) {
+        console.error('Procedure button not found!');
+        return;
+    }
+    
+    // Store original state
+    const originalText = procedureButton.textContent;
+    const originalDisabled = procedureButton.disabled;
+    
+    procedureButton.textContent = 'Generating...';
+    procedureButton.disabled = true;
+    
+    if (procedureAbortController) procedureAbortController.abort();
+    const controller = new AbortController();
+    procedureAbortController = controller;
     
     try {
-        // Show loading state
-        const procedureButton = document.querySelector('.btn-procedure');
-        console.log('Found procedure button:', procedureButton);
-        
-        if (!procedureButton) {
-            console.error('Procedure button not found!');
-            return;
-        }
-        
-        // Store original state
-        const originalText = procedureButton.textContent;
-        const originalDisabled = procedureButton.disabled;
-        
-        procedureButton.textContent = 'Generating...';
-        procedureButton.disabled = true;
-        
-        console.log('Making API call to /api/procedure/generate...');
-        
-        // Call the backend API
-        const response = await fetch(`${API_BASE}/procedure/generate`, {
+        // Call the streaming backend API (Server-Sent Events over a POST body)
+        const response = await fetch(`${API_BASE}/procedure/generate/stream`, {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
             },
             body: JSON.stringify({
-                technique_name: techniqueName,
-                technique_description: techniqueDescription
-            })
+                technique_id: techniqueId,
+                technique_name: techniqueName
+            }),
+            signal: controller.signal
         });
         
-        console.log('API response status:', response.status);
-        
         if (!response.ok) {
             const errorText = await response.text();
             console.error('API error response:', errorText);
-            console.error('Response status:', response.status);
-            console.error('Response headers:', Object.fromEntries(response.headers.entries()));
             throw new Error(`HTTP error! status: ${response.status}, response: ${errorText}`);
         }
         
-        const data = await response.json();
-        console.log('API response data:', data);
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        let procedureText = '';
         
-        // Display the procedure example in the modal
-        console.log('Displaying procedure example:', data.procedure_example);
-        displayProcedureExample(data.procedure_example);
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+            
+            // Events are separated by a blank line
+            let boundary;
+            while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                const rawEvent = buffer.slice(0, boundary);
+                buffer = buffer.slice(boundary + 2);
+                
+                let eventType = 'message';
+                let data = '';
+                rawEvent.split('\n').forEach(line => {
+                    if (line.startsWith('event: ')) eventType = line.slice(7);
+                    else if (line.startsWith('data: ')) data += line.slice(6);
+                });
+                const payload = data ? JSON.parse(data) : {};
+                
+                if (eventType === 'token') {
+                    procedureText += payload.text;
+                    displayProcedureExample(procedureText);
+                } else if (eventType === 'error') {
+                    throw new Error(payload.detail);
+                }
+            }
+        }
         
     } catch (error) {
+        if (error.name === 'AbortError') return;
         console.error('Error generating procedure example:', error);
         alert('Error generating procedure example. Please try again.');
     } finally {
+        if (procedureAbortController === controller) procedureAbortController = null;
         // Restore button state
-        const procedureButton = document.querySelector('.btn-procedure');
-        if (procedureButton) {
-            procedureButton.textContent = originalText;
-            procedureButton.disabled = originalDisabled;
+        const button = document.querySelector('.btn-procedure');
+        if (button) {
+            button.textContent = originalText;
+            button.disabled = originalDisabled;
         }
     }
 }
@@ -678,6 +724,7 @@ async function createMatrix() {
             const techniqueElement = document.createElement('div');
             techniqueElement.className = 'technique';
             // annotate for fast filtering
+            techniqueElement.setAttribute('data-technique-id', technique.id);
             techniqueElement.setAttribute('data-tags', (technique.tags || []).map(t => t.toLowerCase()).join('|'));
             techniqueElement.setAttribute('data-stride', (technique.stride || '').toLowerCase());
             techniqueElement.setAttribute('data-cia', (technique.cia || '').toLowerCase());
@@ -817,24 +864,24 @@ function normalizeStrideAndCia(inputStride, inputCia) {
   return { stride, cia };
 }
 
-function filterTechniques() {
-    const searchTerm = document.querySelector('.search-input').value.toLowerCase().trim();
-    const strideFilter = '';
-    const ciaFilter = '';
-    
-    document.querySelectorAll('.technique').forEach(technique => {
-        const techniqueName = technique.querySelector('.technique-name').textContent.toLowerCase();
-        const techniqueStride = technique.querySelector('.stride-tag')?.dataset.category.toLowerCase() || '';
-        const techniqueCia = technique.querySelector('.cia-tag')?.dataset.category.toLowerCase() || '';
-        
-        const matchesSearch = !searchTerm || techniqueName.includes(searchTerm);
-        const matchesStride = !strideFilter || techniqueStride.includes(strideFilter);
-        const matchesCia = !ciaFilter || techniqueCia.includes(ciaFilter);
-        
-        technique.style.display = matchesSearch && matchesStride && matchesCia ? 'flex' : 'none';
-        technique.style.opacity = matchesSearch && matchesStride && matchesCia ? '1' : '0';
+// Technique IDs matching the search box (null when it is empty) and the sidebar filters (null when none are active)
+let searchMatches = null;
+let sidebarMatches = null;
+let searchRequest = 0;
+let searchTimer = null;
+
+// Rows per /api/search/ request (the server caps a page at 100)
+const SEARCH_PAGE_SIZE = 100;
+
+// Show the cards that pass both the search and the sidebar filters, and recount each tactic
+function applyCardVisibility() {
+    document.querySelectorAll('.technique').forEach(card => {
+        const id = card.getAttribute('data-technique-id');
+        const ok = (!searchMatches || searchMatches.has(id)) && (!sidebarMatches || sidebarMatches.has(id));
+        card.style.display = ok ? 'flex' : 'none';
+        card.style.opacity = ok ? '1' : '0';
     });
-    
+
     // Update tactic counts
     document.querySelectorAll('.tactic-column').forEach(column => {
         const visibleTechniques = column.querySelectorAll('.technique[style*="display: flex"]').length;
@@ -842,9 +889,58 @@ function filterTechniques() {
     });
 }
 
+// Every technique ID the server-side BM25 index matches (names, IDs and descriptions; the last word is a prefix)
+async function searchTechniqueIds(query) {
+    const ids = new Set();
+    let offset = 0;
+    let total = Infinity;
+    while (offset < total) {
+        const params = new URLSearchParams({
+            q: query,
+            include_subtechniques: 'false',
+            offset: String(offset),
+            limit: String(SEARCH_PAGE_SIZE)
+        });
+        const response = await fetch(`${API_BASE}/search/?${params}`);
+        if (!response.ok) {
+            throw new Error(`HTTP error! status: ${response.status}`);
+        }
+        const page = await response.json();
+        page.results.forEach(result => ids.add(result.Technique_ID));
+        total = page.total;
+        offset += SEARCH_PAGE_SIZE;
+    }
+    return ids;
+}
+
+// Filter the matrix by the search box, debounced so typing sends one query per pause
+function filterTechniques() {
+    clearTimeout(searchTimer);
+    searchTimer = setTimeout(runSearch, 150);
+}
+
+async function runSearch() {
+    const request = ++searchRequest;
+    const searchTerm = document.querySelector('.search-input').value.trim();
+    let matches = null;
+    if (searchTerm) {
+        try {
+            matches = await searchTechniqueIds(searchTerm);
+        } catch (error) {
+            console.error('Error searching techniques:', error);
+            return;
+        }
+    }
+    // A newer keystroke already superseded this response
+    if (request !== searchRequest) return;
+    searchMatches = matches;
+    applyCardVisibility();
+}
+
 // Initialize searches when the page loads
 document.addEventListener('DOMContentLoaded', () => {
-    createMatrix();
+    // Fill in the sidebar counts once the cards exist
+    createMatrix().then(applySidebarFilters);
     
     // Add event listeners for search input
     document.querySelector('.search-input').addEventListener('input', filterTechniques);
@@ -990,59 +1086,70 @@ const activeSidebar = { tags: new Set(), stride: new Set(), cia: new Set() };
 
 function toggleSidebarSelection(li, type) {
   const isActive = li.classList.toggle('active');
-  const value = li.textContent.trim();
+  const value = li.getAttribute(`data-filter-${type}`);
   const set = type === 'tag' ? activeSidebar.tags : type === 'stride' ? activeSidebar.stride : activeSidebar.cia;
   if (isActive) set.add(value); else set.delete(value);
   applySidebarFilters();
 }
 
-function applySidebarFilters() {
-  // If nothing selected, do nothing special and let existing filters work
-  const hasAny = activeSidebar.tags.size || activeSidebar.stride.size || activeSidebar.cia.size;
-  const techniqueCards = document.querySelectorAll('.technique');
-  if (!hasAny) {
-    // restore all
-    techniqueCards.forEach(card => {
-      card.style.display = 'flex';
-      card.style.opacity = '1';
-    });
-    // update counts
-    document.querySelectorAll('.tactic-column').forEach(column => {
-      const visibleTechniques = column.querySelectorAll('.technique[style*="display: flex"]').length;
-      column.querySelector('.tactic-count').textContent = `${visibleTechniques} techniques`;
-    });
-    return;
-  }
+// Sidebar tags are platforms, except the matrix toggles
+const MATRIX_TAGS = new Set(['ICS']);
 
-  // Filter using data attributes on cards to avoid name mismatches
-  document.querySelectorAll('.technique').forEach(card => {
-    const cardTags = (card.getAttribute('data-tags') || '').split('|').filter(Boolean);
-    const cardStride = (card.getAttribute('data-stride') || '').trim();
-    const cardCia = (card.getAttribute('data-cia') || '').trim();
-
-    let ok = true;
-    if (activeSidebar.tags.size) {
-      const loweredSet = new Set(cardTags.map(t => t.toLowerCase()));
-      const selectedLower = [...activeSidebar.tags].map(t => String(t).toLowerCase());
-      // Require ALL selected tags to be present (AND semantics)
-      ok = selectedLower.every(t => loweredSet.has(t));
-    }
-    if (ok && activeSidebar.stride.size) {
-      ok = [...activeSidebar.stride].some(s => cardStride === String(s).toLowerCase());
-    }
-    if (ok && activeSidebar.cia.size) {
-      ok = [...activeSidebar.cia].some(c => cardCia === String(c).toLowerCase());
-    }
+function facetParams() {
+  const params = new URLSearchParams({ include_subtechniques: 'false', platform_match: 'all' });
+  activeSidebar.tags.forEach(tag => params.append(MATRIX_TAGS.has(tag) ? 'matrix' : 'platform', tag));
+  activeSidebar.stride.forEach(cat => params.append('stride', cat));
+  activeSidebar.cia.forEach(cat => params.append('cia', cat));
+  return params;
+}
 
-    card.style.display = ok ? 'flex' : 'none';
-    card.style.opacity = ok ? '1' : '0';
+function updateSidebarCounts(counts) {
+  const lookup = (facet, value) => {
+    const values = counts[facet] || {};
+    const key = Object.keys(values).find(k => k.toLowerCase() === String(value).toLowerCase());
+    return key === undefined ? 0 : values[key];
+  };
+  document.querySelectorAll('.sidebar-item').forEach(li => {
+    const tag = li.getAttribute('data-filter-tag');
+    const stride = li.getAttribute('data-filter-stride');
+    const cia = li.getAttribute('data-filter-cia');
+    const count = tag !== null ? lookup(MATRIX_TAGS.has(tag) ? 'matrix' : 'platform', tag)
+      : stride !== null ? lookup('stride', stride)
+      : lookup('cia', cia);
+    let badge = li.querySelector('.sidebar-count');
+    if (!badge) {
+      badge = document.createElement('span');
+      badge.className = 'sidebar-count';
+      li.appendChild(badge);
+    }
+    badge.textContent = count;
+    li.classList.toggle('empty', count === 0 && !li.classList.contains('active'));
   });
+}
 
-  // Update tactic counts
-  document.querySelectorAll('.tactic-column').forEach(column => {
-    const visibleTechniques = column.querySelectorAll('.technique[style*="display: flex"]').length;
-    column.querySelector('.tactic-count').textContent = `${visibleTechniques} techniques`;
-  });
+let facetRequest = 0;
+
+// Ask the server-side facet index which techniques match and how many each other choice would leave
+async function applySidebarFilters() {
+  const request = ++facetRequest;
+  let result;
+  try {
+    const response = await fetch(`${API_BASE}/facets/?${facetParams()}`);
+    if (!response.ok) {
+      throw new Error(`HTTP error! status: ${response.status}`);
+    }
+    result = await response.json();
+  } catch (error) {
+    console.error('Error applying sidebar filters:', error);
+    return;
+  }
+  // A newer click already superseded this response
+  if (request !== facetRequest) return;
+
+  const hasAny = activeSidebar.tags.size || activeSidebar.stride.size || activeSidebar.cia.size;
+  sidebarMatches = hasAny ? new Set(result.techniques) : null;
+  applyCardVisibility();
+  updateSidebarCounts(result.counts);
 }
 
 // Initialize STRIDE search
@@ -1376,7 +1483,7 @@ function addDownloadFeedbackButton() {
 function updateDownloadButtonText() {
     const btn = document.getElementById('download-feedback-btn');
     if (btn) {
-        btn.textContent = `Download Feedback (${feedbackData.length})`;
+        btn.textContent = `Download Feedback (${feedbackCount})`;
     }
 }
 
@@ -1 +1,3 @@
 # Utils package for MITRE ATT&CK application
+# Load .env before any utils module reads its settings
+from utils import config  # noqa: F401
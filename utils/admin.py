@@ -0,0 +1,22 @@
+import hmac
+import os
+from typing import Optional
+
+from fastapi import Header, HTTPException
+
+# Admin configuration - loaded from environment variables or defaults
+# Token for mutating admin routes (cache and feedback deletion, catalog reload); empty disables them
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """
+    Dependency guarding admin routes: the X-Admin-Token header must match ADMIN_TOKEN
+
+    Raises:
+        HTTPException: 403 when no ADMIN_TOKEN is configured, 401 when the header is missing or wrong
+    """
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled; set ADMIN_TOKEN to enable them")
+    if x_admin_token is None or not hmac.compare_digest(x_admin_token.encode("utf-8"), ADMIN_TOKEN.encode("utf-8")):
+        raise HTTPException(status_code=401, detail="Invalid or missing X-Admin-Token header")
@@ -0,0 +1,447 @@
+import csv
+import os
+import threading
+import time
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Sequence, TypeVar
+
+from fastapi.concurrency import run_in_threadpool
+
+from utils.catalog_snapshot import open_snapshot, snapshot_path_for, source_signature, write_snapshot
+
+# Catalog file path - loaded from environment variable or default
+CATALOG_CSV = os.getenv("CATALOG_CSV", "mitre.csv")
+# Memory-mapped snapshot of the catalog shared by all workers; empty disables it
+CATALOG_SNAPSHOT = os.getenv("CATALOG_SNAPSHOT", snapshot_path_for(CATALOG_CSV))
+# Seconds between checks of the CSV for changes, 0 disables the watcher (reload via POST /api/catalog/reload)
+CATALOG_WATCH_INTERVAL = float(os.getenv("CATALOG_WATCH_INTERVAL", "0"))
+
+# Changed technique IDs listed in a reload report
+MAX_REPORTED_CHANGES = 100
+
+T = TypeVar("T")
+
+# Columns of mitre.csv, in file order
+CATALOG_FIELDS = [
+    "Tactic_Name",
+    "Tactic_ID",
+    "Tactic_Description",
+    "Technique_Name",
+    "Technique_ID",
+    "Technique_Description",
+    "Platform",
+    "Matrices",
+    "CIA",
+    "STRIDE",
+]
+
+# Long text columns that are only sent when explicitly requested
+DESCRIPTION_FIELDS = ["Tactic_Description", "Technique_Description"]
+
+# Default projection: everything the matrix view needs, no descriptions
+SUMMARY_FIELDS = [f for f in CATALOG_FIELDS if f not in DESCRIPTION_FIELDS]
+
+STRIDE_CATEGORIES = [
+    "Spoofing",
+    "Tampering",
+    "Repudiation",
+    "Information Disclosure",
+    "Denial of Service",
+    "Elevation of Privilege",
+]
+
+CIA_CATEGORIES = [
+    "Confidentiality",
+    "Integrity",
+    "Availability",
+    "Authorization",
+    "Authenticity",
+    "Non-Repudiation",
+]
+
+_STRIDE_LOOKUP = {c.lower(): c for c in STRIDE_CATEGORIES}
+_CIA_LOOKUP = {c.lower(): c for c in CIA_CATEGORIES}
+
+
+def normalize_stride_and_cia(stride: str, cia: str):
+    """
+    Return (stride, cia) with canonical casing, un-swapping the two columns
+    when a row has them the wrong way round (mirrors normalizeStrideAndCia in script.js)
+    """
+    s = (stride or "").strip().lower()
+    c = (cia or "").strip().lower()
+    s_stride, s_cia = s in _STRIDE_LOOKUP, s in _CIA_LOOKUP
+    c_stride, c_cia = c in _STRIDE_LOOKUP, c in _CIA_LOOKUP
+
+    if s_stride and c_cia:
+        return _STRIDE_LOOKUP[s], _CIA_LOOKUP[c]
+    if s_cia and c_stride:
+        return _STRIDE_LOOKUP[c], _CIA_LOOKUP[s]
+    return (
+        _STRIDE_LOOKUP.get(s) or _STRIDE_LOOKUP.get(c, ""),
+        _CIA_LOOKUP.get(c) or _CIA_LOOKUP.get(s, ""),
+    )
+
+
+def split_platforms(value: str) -> List[str]:
+    """Split the comma separated Platform column into individual platforms"""
+    return [p.strip() for p in (value or "").split(",") if p.strip()]
+
+
+def is_subtechnique(technique_id: str) -> bool:
+    """Sub-technique IDs carry a dotted suffix, e.g. T1556.003"""
+    return "." in (technique_id or "")
+
+
+class TechniqueCatalog:
+    """In-memory, column-oriented view of mitre.csv with lookup indexes"""
+
+    def __init__(self, columns: Dict[str, Sequence[str]], source: str = "", loaded_from: str = "csv"):
+        self.columns = columns
+        self.source = source
+        self.loaded_from = loaded_from  # "csv" or "snapshot"
+        self.size = len(columns["Technique_ID"])
+        self._build_indexes()
+
+    @classmethod
+    def from_csv(cls, path: str = CATALOG_CSV) -> "TechniqueCatalog":
+        """Parse a catalog CSV into columns"""
+        columns: Dict[str, List[str]] = {field: [] for field in CATALOG_FIELDS}
+        with open(path, "r", newline="", encoding="utf-8-sig") as file:
+            reader = csv.DictReader(file)
+            for row in reader:
+                if not (row.get("Technique_ID") or "").strip():
+                    continue
+                for field in CATALOG_FIELDS:
+                    columns[field].append((row.get(field) or "").strip())
+        return cls(columns, source=path)
+
+    @classmethod
+    def from_snapshot(cls, snapshot_path: str, csv_path: Optional[str] = None) -> Optional["TechniqueCatalog"]:
+        """
+        Map a snapshot instead of parsing the CSV; descriptions are decoded on access
+
+        Returns None if the snapshot is missing, unreadable, or older than csv_path.
+        """
+        source = None
+        if csv_path is not None:
+            try:
+                source = source_signature(csv_path)
+            except OSError:
+                return None
+        columns = open_snapshot(snapshot_path, CATALOG_FIELDS, DESCRIPTION_FIELDS, source)
+        if columns is None:
+            return None
+        return cls(columns, source=csv_path or snapshot_path, loaded_from="snapshot")
+
+    @classmethod
+    def open(cls, path: str = CATALOG_CSV, snapshot_path: Optional[str] = CATALOG_SNAPSHOT) -> "TechniqueCatalog":
+        """
+        Load the catalog from its snapshot when it is current, otherwise parse
+        the CSV and write a fresh snapshot for the other workers
+        """
+        if not snapshot_path:
+            return cls.from_csv(path)
+        catalog = cls.from_snapshot(snapshot_path, path)
+        if catalog is not None:
+            return catalog
+        catalog = cls.from_csv(path)
+        try:
+            write_catalog_snapshot(path, snapshot_path, catalog)
+        except OSError:
+            pass  # read-only deployment: every worker parses the CSV, as before
+        return catalog
+
+    def _build_indexes(self):
+        """Build row-number indexes for the columns we filter on"""
+        self.by_technique_id: Dict[str, List[int]] = {}
+        self.by_tactic_id: Dict[str, List[int]] = {}
+        self.by_platform: Dict[str, List[int]] = {}
+        self.by_matrix: Dict[str, List[int]] = {}
+        self.tactics: Dict[str, str] = {}
+
+        technique_ids = self.columns["Technique_ID"]
+        tactic_ids = self.columns["Tactic_ID"]
+        tactic_names = self.columns["Tactic_Name"]
+        platforms = self.columns["Platform"]
+        matrices = self.columns["Matrices"]
+
+        for i in range(self.size):
+            self.by_technique_id.setdefault(technique_ids[i].upper(), []).append(i)
+            self.by_tactic_id.setdefault(tactic_ids[i].upper(), []).append(i)
+            self.tactics.setdefault(tactic_ids[i], tactic_names[i])
+            for platform in split_platforms(platforms[i]):
+                self.by_platform.setdefault(platform.lower(), []).append(i)
+            for matrix in split_platforms(matrices[i]):
+                self.by_matrix.setdefault(matrix.lower(), []).append(i)
+
+    def query(
+        self,
+        technique_id: Optional[str] = None,
+        tactic_id: Optional[str] = None,
+        platform: Optional[str] = None,
+        matrix: Optional[str] = None,
+        include_subtechniques: bool = True,
+    ) -> List[int]:
+        """Return the row numbers matching every given filter, in file order"""
+        candidates = None
+        for index, key in (
+            (self.by_technique_id, technique_id and technique_id.upper()),
+            (self.by_tactic_id, tactic_id and tactic_id.upper()),
+            (self.by_platform, platform and platform.lower()),
+            (self.by_matrix, matrix and matrix.lower()),
+        ):
+            if not key:
+                continue
+            rows = index.get(key, [])
+            candidates = set(rows) if candidates is None else candidates.intersection(rows)
+            if not candidates:
+                return []
+
+        rows = range(self.size) if candidates is None else sorted(candidates)
+        if include_subtechniques:
+            return list(rows)
+        technique_ids = self.columns["Technique_ID"]
+        return [i for i in rows if not is_subtechnique(technique_ids[i])]
+
+    def row(self, i: int, fields: Iterable[str] = CATALOG_FIELDS) -> Dict[str, str]:
+        """Project a single row onto the requested fields"""
+        return {field: self.columns[field][i] for field in fields}
+
+    def rows(self, indexes: Iterable[int], fields: Iterable[str] = CATALOG_FIELDS) -> List[Dict[str, str]]:
+        """Project several rows onto the requested fields"""
+        fields = list(fields)
+        return [self.row(i, fields) for i in indexes]
+
+
+def write_catalog_snapshot(
+    csv_path: str = CATALOG_CSV, snapshot_path: Optional[str] = None, catalog: Optional[TechniqueCatalog] = None
+) -> str:
+    """Write the snapshot for a catalog CSV (parsing it unless catalog is given); returns the snapshot path"""
+    snapshot_path = snapshot_path or snapshot_path_for(csv_path)
+    catalog = catalog or TechniqueCatalog.from_csv(csv_path)
+    write_snapshot(snapshot_path, catalog.columns, source_signature(csv_path))
+    return snapshot_path
+
+
+def technique_signatures(catalog: TechniqueCatalog) -> Dict[str, tuple]:
+    """Technique ID -> every field of every row it appears in, for change detection"""
+    columns = [catalog.columns[field] for field in CATALOG_FIELDS]
+    technique_ids = catalog.columns["Technique_ID"]
+    signatures: Dict[str, list] = {}
+    for i in range(catalog.size):
+        signatures.setdefault(technique_ids[i], []).append(tuple(column[i] for column in columns))
+    return {technique_id: tuple(rows) for technique_id, rows in signatures.items()}
+
+
+def changed_techniques(old: TechniqueCatalog, new: TechniqueCatalog) -> FrozenSet[str]:
+    """IDs of techniques added, removed, or with any row changed between two catalogs"""
+    before, after = technique_signatures(old), technique_signatures(new)
+    return frozenset(
+        technique_id for technique_id in before.keys() | after.keys()
+        if before.get(technique_id) != after.get(technique_id)
+    )
+
+
+# Builds a derived structure for a catalog version, given what was built for the previous version
+DerivedBuilder = Callable[["CatalogVersion", Optional[T]], T]
+
+
+class CatalogVersion:
+    """
+    One catalog plus everything derived from it (search index, facets, graph)
+
+    Derived structures are built once per version and stored on it, so
+    replacing the current version swaps the catalog and all of its indexes in
+    a single assignment. A request that took a version keeps a consistent view
+    even if a reload lands meanwhile.
+    """
+
+    def __init__(
+        self,
+        catalog: TechniqueCatalog,
+        number: int = 1,
+        changed: Optional[FrozenSet[str]] = None,
+        signature: Optional[Dict[str, int]] = None,
+    ):
+        self.catalog = catalog
+        self.number = number
+        self.changed = changed  # technique IDs that differ from the previous version, None = all
+        self.signature = signature
+        self.loaded_at = time.time()
+        self._derived: Dict[str, object] = {}
+        self._builders: Dict[str, DerivedBuilder] = {}
+        self._lock = threading.Lock()
+
+    def derived(self, name: str, build: DerivedBuilder) -> T:
+        """Return the named structure for this version, building it on first use"""
+        value = self._derived.get(name)
+        if value is None:
+            with self._lock:
+                value = self._derived.get(name)
+                if value is None:
+                    value = build(self, None)
+                    self._builders[name] = build
+                    self._derived[name] = value
+        return value
+
+    async def derived_async(self, name: str, build: DerivedBuilder) -> T:
+        """derived() for async handlers: building it, or waiting on another thread's build, runs on the thread pool"""
+        value = self._derived.get(name)
+        if value is None:
+            value = await run_in_threadpool(self.derived, name, build)
+        return value
+
+    def rebuild_from(self, previous: "CatalogVersion"):
+        """Build everything the previous version had, letting builders reuse unchanged parts"""
+        for name, build in list(previous._builders.items()):
+            self._derived[name] = build(self, previous._derived.get(name))
+            self._builders[name] = build
+
+    def info(self) -> Dict[str, object]:
+        return {
+            "version": self.number,
+            "rows": self.catalog.size,
+            "techniques": len(self.catalog.by_technique_id),
+            "source": self.catalog.source,
+            "loaded_from": self.catalog.loaded_from,
+            "loaded_at": self.loaded_at,
+            "changed_techniques": None if self.changed is None else len(self.changed),
+            "derived": sorted(self._derived),
+        }
+
+
+_version: Optional[CatalogVersion] = None
+_catalog_lock = threading.Lock()
+# Serializes reloads; readers never take it
+_reload_lock = threading.Lock()
+_reload_listeners: List[Callable[[CatalogVersion, CatalogVersion], None]] = []
+
+
+def _signature(path: str) -> Optional[Dict[str, int]]:
+    try:
+        return source_signature(path)
+    except OSError:
+        return None
+
+
+def current_catalog_version() -> CatalogVersion:
+    """Return the current catalog version, loading the catalog on first use"""
+    global _version
+    if _version is None:
+        with _catalog_lock:
+            if _version is None:
+                _version = CatalogVersion(TechniqueCatalog.open(CATALOG_CSV), signature=_signature(CATALOG_CSV))
+    return _version
+
+
+def get_catalog() -> TechniqueCatalog:
+    """Return the current catalog, loading it on first use"""
+    return current_catalog_version().catalog
+
+
+def on_catalog_reload(listener: Callable[[CatalogVersion, CatalogVersion], None]):
+    """Call listener(old, new) after each reload that changed the catalog, e.g. to drop cache entries"""
+    _reload_listeners.append(listener)
+
+
+def snapshot_for(path: str) -> Optional[str]:
+    """Snapshot of a catalog CSV: CATALOG_SNAPSHOT belongs to CATALOG_CSV, any other CSV gets its own"""
+    if path == CATALOG_CSV or not CATALOG_SNAPSHOT:
+        return CATALOG_SNAPSHOT
+    return snapshot_path_for(path)
+
+
+def reload_catalog(path: str = CATALOG_CSV, force: bool = False) -> Dict[str, object]:
+    """
+    Load the catalog again and swap it in once its indexes are built
+
+    Everything is built before the swap, so readers keep using the old version
+    until the new one is complete. Does nothing if the CSV has not changed
+    since the current version was loaded, unless force is set.
+
+    Raises:
+        ValueError: the new CSV has no techniques (the current version is kept)
+        OSError, csv.Error: the CSV could not be read (the current version is kept)
+    """
+    global _version
+    with _reload_lock:
+        start = time.perf_counter()
+        old = current_catalog_version()
+        signature = _signature(path)
+        if not force and signature is not None and signature == old.signature:
+            return {**old.info(), "reloaded": False}
+
+        catalog = TechniqueCatalog.open(path, snapshot_for(path))
+        if not catalog.size:
+            raise ValueError(f"{path} has no techniques; keeping catalog version {old.number}")
+        changed = changed_techniques(old.catalog, catalog)
+        if not changed and not force:
+            # Same content under a new mtime: keep the built version, remember the new signature
+            old.signature = signature
+            return {**old.info(), "reloaded": False}
+
+        new = CatalogVersion(catalog, old.number + 1, changed, signature)
+        new.rebuild_from(old)
+        with _catalog_lock:
+            _version = new
+
+        errors = []
+        for listener in _reload_listeners:
+            try:
+                listener(old, new)
+            except Exception as e:
+                errors.append(f"{getattr(listener, '__name__', listener)}: {str(e)}")
+        return {
+            **new.info(),
+            "reloaded": True,
+            "previous_version": old.number,
+            "changed": sorted(changed)[:MAX_REPORTED_CHANGES],
+            "seconds": round(time.perf_counter() - start, 3),
+            "errors": errors,
+        }
+
+
+def load_catalog(path: str = CATALOG_CSV) -> TechniqueCatalog:
+    """(Re)load the catalog from disk and make it the current one"""
+    if _version is None:
+        return get_catalog()
+    reload_catalog(path, force=True)
+    return get_catalog()
+
+
+class CatalogWatcher(threading.Thread):
+    """Reload the catalog whenever its CSV changes on disk, checking every interval seconds"""
+
+    def __init__(
+        self,
+        interval: float = CATALOG_WATCH_INTERVAL,
+        path: str = CATALOG_CSV,
+        on_reload: Optional[Callable[[Dict[str, object]], None]] = None,
+        on_error: Optional[Callable[[Exception], None]] = None,
+    ):
+        super().__init__(name="catalog-watcher", daemon=True)
+        self.interval = interval
+        self.path = path
+        self.on_reload = on_reload
+        self.on_error = on_error
+        self._stop_event = threading.Event()
+
+    def run(self):
+        seen = current_catalog_version().signature
+        while not self._stop_event.wait(self.interval):
+            signature = _signature(self.path)
+            if signature is None or signature == seen:
+                continue
+            # A broken file is reported once, not every interval, until it changes again
+            seen = signature
+            try:
+                result = reload_catalog(self.path)
+            except Exception as e:
+                if self.on_error is not None:
+                    self.on_error(e)
+                continue
+            if result["reloaded"] and self.on_reload is not None:
+                self.on_reload(result)
+
+    def stop(self):
+        self._stop_event.set()
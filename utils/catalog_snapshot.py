@@ -0,0 +1,200 @@
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections.abc import Sequence
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence as SequenceType
+
+# Snapshot layout:
+#   MAGIC | u32 metadata length | metadata JSON | padding to 8 | column segments
+# Every column is dictionary coded: a per-row code array (u16 or u32) indexing a
+# string table stored as u32 offsets (n + 1) plus one UTF-8 blob. Segments are
+# 8-byte aligned so the arrays can be used in place through memoryview.cast().
+MAGIC = b"MITRECAT"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<8sI")
+ALIGNMENT = 8
+
+
+def snapshot_path_for(csv_path: str) -> str:
+    """Default snapshot location next to a catalog CSV, e.g. mitre.csv -> mitre.catalog"""
+    return f"{os.path.splitext(csv_path)[0]}.catalog"
+
+
+def source_signature(csv_path: str) -> Dict[str, int]:
+    """Size and mtime of the CSV a snapshot was built from, used to detect stale snapshots"""
+    stat = os.stat(csv_path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+class SnapshotColumn(Sequence):
+    """
+    Read-only string column backed by a memory-mapped snapshot
+
+    Codes and offsets are views into the mapping. Eager columns decode their
+    (small) string table once; lazy columns decode a value each time it is read,
+    so long descriptions never become Python strings unless requested.
+    """
+
+    def __init__(self, codes: memoryview, offsets: memoryview, blob: memoryview, lazy: bool = False):
+        self.codes = codes
+        self.offsets = offsets
+        self.blob = blob
+        self.lazy = lazy
+        self._values: Optional[List[str]] = None if lazy else [self.decode(k) for k in range(len(offsets) - 1)]
+
+    def decode(self, code: int) -> str:
+        """The string table entry for a code"""
+        return str(self.blob[self.offsets[code]:self.offsets[code + 1]], "utf-8")
+
+    @property
+    def cardinality(self) -> int:
+        return len(self.offsets) - 1
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        code = self.codes[i]
+        return self.decode(code) if self._values is None else self._values[code]
+
+    def __iter__(self) -> Iterator[str]:
+        for i in range(len(self.codes)):
+            yield self[i]
+
+
+def _encode_column(values: SequenceType[str]):
+    """(codes array, offsets array, blob) for one column"""
+    table: Dict[str, int] = {}
+    codes = [table.setdefault(value, len(table)) for value in values]
+    offsets = array("I", [0])
+    blob = bytearray()
+    for value in table:
+        blob += value.encode("utf-8")
+        offsets.append(len(blob))
+    return array("H" if len(table) < 1 << 16 else "I", codes), offsets, bytes(blob)
+
+
+def write_snapshot(path: str, columns: Dict[str, SequenceType[str]], source: Optional[Dict[str, int]] = None):
+    """Write columns as a snapshot (atomically, so concurrent readers never see a partial file)"""
+    segments: List[bytes] = []
+    layout: Dict[str, Dict[str, list]] = {}
+    position = 0
+
+    def add(data: bytes) -> List[int]:
+        nonlocal position
+        segments.append(data)
+        segments.append(b"\0" * (-len(data) % ALIGNMENT))
+        placed = [position, len(data)]
+        position += len(data) + (-len(data) % ALIGNMENT)
+        return placed
+
+    rows = None
+    for name, values in columns.items():
+        rows = len(values) if rows is None else rows
+        codes, offsets, blob = _encode_column(values)
+        layout[name] = {
+            "codes": add(codes.tobytes()) + [codes.typecode],
+            "offsets": add(offsets.tobytes()),
+            "strings": add(blob),
+        }
+
+    metadata = json.dumps({
+        "version": FORMAT_VERSION,
+        "byteorder": sys.byteorder,
+        "rows": rows or 0,
+        "source": source,
+        "columns": layout,
+    }).encode("utf-8")
+    header = HEADER.pack(MAGIC, len(metadata)) + metadata
+    header += b"\0" * (-len(header) % ALIGNMENT)
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as file:
+        file.write(header)
+        for segment in segments:
+            file.write(segment)
+    os.replace(tmp_path, path)
+
+
+class SnapshotError(ValueError):
+    """A snapshot file that is truncated or corrupt"""
+
+
+def _segment(data: memoryview, placed: list) -> memoryview:
+    """The [offset, length] slice of the data area, checked against its size"""
+    at, length = placed[0], placed[1]
+    if not (isinstance(at, int) and isinstance(length, int)) or at < 0 or length < 0 or at + length > len(data):
+        raise SnapshotError(f"segment {placed} outside the {len(data)}-byte data area")
+    return data[at:at + length]
+
+
+def _read_column(data: memoryview, layout: dict, rows: int, lazy: bool) -> SnapshotColumn:
+    """Build one column, validating its segments so a corrupt file fails here rather than on first read"""
+    codes = _segment(data, layout["codes"]).cast(layout["codes"][2])
+    offsets = _segment(data, layout["offsets"]).cast("I")
+    blob = _segment(data, layout["strings"])
+    if len(codes) != rows or len(offsets) < 1 or offsets[0] != 0 or offsets[-1] > len(blob):
+        raise SnapshotError("column arrays do not match the metadata")
+    if any(offsets[k] > offsets[k + 1] for k in range(len(offsets) - 1)):
+        raise SnapshotError("string offsets are not ascending")
+    if rows and max(codes) >= len(offsets) - 1:
+        raise SnapshotError("row code outside the string table")
+    return SnapshotColumn(codes, offsets, blob, lazy=lazy)
+
+
+def open_snapshot(
+    path: str,
+    fields: Iterable[str],
+    lazy_fields: Iterable[str] = (),
+    source: Optional[Dict[str, int]] = None,
+) -> Optional[Dict[str, SnapshotColumn]]:
+    """
+    Map a snapshot read-only and return its columns
+
+    Returns None when the file is missing, truncated or corrupt, was written
+    by another format version or byte order, lacks one of the fields, or
+    (when source is given) was built from a different CSV.
+    """
+    try:
+        with open(path, "rb") as file:
+            mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    try:
+        return _read_snapshot(memoryview(mapping), fields, set(lazy_fields), source)
+    except (SnapshotError, struct.error, IndexError, KeyError, TypeError, ValueError, UnicodeDecodeError):
+        # json.JSONDecodeError is a ValueError; bad typecodes raise ValueError or TypeError from cast()
+        return None
+
+
+def _read_snapshot(view: memoryview, fields: Iterable[str], lazy_fields: set, source: Optional[Dict[str, int]]):
+    if len(view) < HEADER.size:
+        raise SnapshotError("shorter than the header")
+    magic, metadata_length = HEADER.unpack_from(view, 0)
+    if magic != MAGIC:
+        return None
+    if HEADER.size + metadata_length > len(view):
+        raise SnapshotError("metadata runs past the end of the file")
+    metadata = json.loads(bytes(view[HEADER.size:HEADER.size + metadata_length]))
+    if metadata.get("version") != FORMAT_VERSION or metadata.get("byteorder") != sys.byteorder:
+        return None
+    if source is not None and metadata.get("source") != source:
+        return None
+
+    data_start = HEADER.size + metadata_length
+    data_start += -data_start % ALIGNMENT
+    data = view[data_start:]
+    rows = metadata["rows"]
+    columns: Dict[str, SnapshotColumn] = {}
+    for field in fields:
+        layout = metadata["columns"].get(field)
+        if layout is None:
+            return None
+        columns[field] = _read_column(data, layout, rows, field in lazy_fields)
+    return columns
@@ -0,0 +1,262 @@
+import asyncio
+import time
+from collections import deque
+from typing import AsyncIterator, Awaitable, Callable, Deque, Dict, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key into one execution"""
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.shared_calls = 0
+
+    def in_flight(self) -> int:
+        return len(self._inflight)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._inflight
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        """
+        Run fn once per key at a time; concurrent callers await the same result
+
+        Returns:
+            (result, shared) where shared is True for callers that joined an
+            execution started by someone else
+        """
+        future = self._inflight.get(key)
+        shared = future is not None
+        if shared:
+            self.shared_calls += 1
+        else:
+            future = asyncio.ensure_future(fn())
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shield so one caller going away does not cancel the work for the others
+        return await asyncio.shield(future), shared
+
+
+class SharedStream:
+    """Fan one async token stream out to any number of subscribers, replaying what they missed"""
+
+    def __init__(
+        self,
+        source: AsyncIterator[str],
+        on_complete: Optional[Callable[[str], Optional[Awaitable[None]]]] = None,
+        on_error: Optional[Callable[[Exception], None]] = None,
+        on_cancel: Optional[Callable[[], None]] = None,
+        on_finish: Optional[Callable[[], None]] = None,
+    ):
+        self.parts: List[str] = []
+        self.done = False
+        self.error: Optional[Exception] = None
+        self.subscribers = 0
+        self.closing = False
+        self._source = source
+        self._on_complete = on_complete
+        self._on_error = on_error
+        self._on_cancel = on_cancel
+        self._on_finish = on_finish
+        self._changed = asyncio.Condition()
+        self._task = asyncio.ensure_future(self._pump())
+
+    async def _pump(self):
+        try:
+            async for part in self._source:
+                async with self._changed:
+                    self.parts.append(part)
+                    self._changed.notify_all()
+            if self._on_complete is not None:
+                # May be a coroutine (e.g. writing the cache off the event loop); subscribers finish after it
+                completed = self._on_complete("".join(self.parts))
+                if completed is not None:
+                    await completed
+        except asyncio.CancelledError:
+            if self._on_cancel is not None:
+                self._on_cancel()
+        except Exception as e:
+            self.error = e
+            if self._on_error is not None:
+                self._on_error(e)
+        finally:
+            await self._source.aclose()
+            async with self._changed:
+                self.done = True
+                self._changed.notify_all()
+            if self._on_finish is not None:
+                self._on_finish()
+
+    async def subscribe(self) -> AsyncIterator[str]:
+        """Yield every part from the start; the upstream is cancelled when the last subscriber leaves"""
+        self.subscribers += 1
+        position = 0
+        try:
+            while True:
+                async with self._changed:
+                    await self._changed.wait_for(lambda: len(self.parts) > position or self.done)
+                    new_parts = self.parts[position:]
+                    finished = self.done
+                position += len(new_parts)
+                for part in new_parts:
+                    yield part
+                if finished and position == len(self.parts):
+                    if self.error is not None:
+                        raise self.error
+                    return
+        finally:
+            self.subscribers -= 1
+            if self.subscribers == 0 and not self.done:
+                self.closing = True
+                self._task.cancel()
+
+
+class StreamGroup:
+    """Registry of in-flight SharedStreams keyed by request identity"""
+
+    def __init__(self):
+        self._streams: Dict[str, SharedStream] = {}
+        self.shared_calls = 0
+
+    def in_flight(self) -> int:
+        return len(self._streams)
+
+    def get(self, key: str) -> Optional[SharedStream]:
+        stream = self._streams.get(key)
+        if stream is not None and not stream.done and not stream.closing:
+            self.shared_calls += 1
+            return stream
+        return None
+
+    def start(self, key: str, source: AsyncIterator[str], **callbacks) -> SharedStream:
+        on_finish = callbacks.pop("on_finish", None)
+
+        def finished():
+            if self._streams.get(key) is stream:
+                del self._streams[key]
+            if on_finish is not None:
+                on_finish()
+
+        stream = SharedStream(source, on_finish=finished, **callbacks)
+        self._streams[key] = stream
+        return stream
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot be admitted (queue full or waited too long)"""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(f"Server busy ({reason}), retry after {retry_after}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Global concurrency limit with a bounded FIFO wait queue
+
+    At most max_concurrent holders run at once; up to max_queue more wait
+    for at most queue_timeout seconds. Anything beyond that is rejected
+    immediately so callers can shed load instead of piling up work.
+    """
+
+    def __init__(self, max_concurrent: int, max_queue: int, queue_timeout: float):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self.admitted = 0
+        self.rejected = {"queue_full": 0, "timeout": 0}
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._recent_waits: Deque[float] = deque(maxlen=256)
+        self._service_time = 0.0  # moving average, used for Retry-After
+
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def retry_after(self) -> int:
+        """Rough time until a slot frees up, in whole seconds"""
+        backlog = (len(self._waiters) + 1) / max(self.max_concurrent, 1)
+        return max(1, int(round(backlog * (self._service_time or 1.0))))
+
+    async def acquire(self):
+        """Take a slot, waiting in the queue if necessary; raises AdmissionRejected"""
+        start = time.monotonic()
+        if self.active < self.max_concurrent and not self._waiters:
+            self.active += 1
+        else:
+            if len(self._waiters) >= self.max_queue:
+                self.rejected["queue_full"] += 1
+                raise AdmissionRejected("queue_full", self.retry_after())
+
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout)
+            except asyncio.TimeoutError:
+                self._abandon(waiter)
+                self.rejected["timeout"] += 1
+                raise AdmissionRejected("timeout", self.retry_after())
+            except asyncio.CancelledError:
+                self._abandon(waiter)
+                raise
+
+        wait = time.monotonic() - start
+        self.admitted += 1
+        self._wait_total += wait
+        self._wait_max = max(self._wait_max, wait)
+        self._recent_waits.append(wait)
+        return time.monotonic()
+
+    def _abandon(self, waiter: asyncio.Future):
+        """Leave the queue; if the slot was already handed over, pass it on"""
+        if waiter.done() and not waiter.cancelled():
+            self.release()
+        else:
+            waiter.cancel()
+            try:
+                self._waiters.remove(waiter)
+            except ValueError:
+                pass
+
+    def release(self, acquired_at: Optional[float] = None):
+        """Return a slot, handing it directly to the next live waiter"""
+        if acquired_at is not None:
+            elapsed = time.monotonic() - acquired_at
+            self._service_time = elapsed if not self._service_time else 0.8 * self._service_time + 0.2 * elapsed
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    async def run(self, fn: Callable[[], Awaitable[T]]) -> T:
+        """Run fn while holding a slot"""
+        acquired_at = await self.acquire()
+        try:
+            return await fn()
+        finally:
+            self.release(acquired_at)
+
+    def stats(self) -> Dict[str, object]:
+        waits = sorted(self._recent_waits)
+        return {
+            "active": self.active,
+            "queued": len(self._waiters),
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "queue_timeout": self.queue_timeout,
+            "admitted": self.admitted,
+            "rejected": dict(self.rejected),
+            "wait_seconds": {
+                "avg": round(self._wait_total / self.admitted, 4) if self.admitted else 0.0,
+                "p95_recent": round(waits[int(0.95 * (len(waits) - 1))], 4) if waits else 0.0,
+                "max": round(self._wait_max, 4),
+            },
+            "avg_service_seconds": round(self._service_time, 3),
+        }
@@ -0,0 +1,15 @@
+"""
+Environment loading, done once before any module reads its settings
+
+Every module reads its configuration with os.getenv when it is imported, so
+the .env file must be loaded before the first of them. The utils package
+imports this module first for that reason; nothing else calls load_dotenv.
+"""
+import os
+
+from dotenv import load_dotenv
+
+# Path of the dotenv file; variables already set in the environment take precedence
+ENV_FILE = os.getenv("ENV_FILE", ".env")
+
+load_dotenv(ENV_FILE)
@@ -0,0 +1,193 @@
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from utils.catalog import (
+    CIA_CATEGORIES,
+    STRIDE_CATEGORIES,
+    CatalogVersion,
+    TechniqueCatalog,
+    current_catalog_version,
+    is_subtechnique,
+    normalize_stride_and_cia,
+    split_platforms,
+)
+
+# Facets, in response order
+FACET_NAMES = ["platform", "matrix", "tactic", "stride", "cia"]
+
+# How several selected values of one facet combine
+MATCH_ANY = "any"  # a row needs one of them (OR)
+MATCH_ALL = "all"  # a row needs every one of them (AND), e.g. platforms in the sidebar
+
+
+def row_positions(mask: int) -> List[int]:
+    """Row numbers of the set bits of mask, in ascending order"""
+    bits = bin(mask)[:1:-1]
+    return [i for i, bit in enumerate(bits) if bit == "1"]
+
+
+class FacetIndex:
+    """
+    One bitset per facet value over the catalog rows
+
+    Bit i of a value's bitset is set when row i carries that value. Python
+    ints act as the bitsets, so a multi-facet filter is a handful of & and |
+    over ~900-bit integers and a count is int.bit_count().
+    """
+
+    def __init__(self, catalog: TechniqueCatalog):
+        self.catalog = catalog
+        self.all_rows = (1 << catalog.size) - 1
+        self.parent_rows = 0  # rows that are not sub-techniques
+        # Plain list: snapshot columns decode on every access, too slow for per-query lookups
+        self.technique_ids: List[str] = list(catalog.columns["Technique_ID"])
+        # facet -> lowercase value -> bitset, in first-seen order
+        self.bitsets: Dict[str, Dict[str, int]] = {name: {} for name in FACET_NAMES}
+        # facet -> lowercase value -> display value
+        self.labels: Dict[str, Dict[str, str]] = {name: {} for name in FACET_NAMES}
+        self._build()
+
+    def _row_values(self) -> Dict[str, Callable[[int], Iterable[str]]]:
+        columns = self.catalog.columns
+
+        def stride_and_cia(i: int) -> Tuple[str, str]:
+            return normalize_stride_and_cia(columns["STRIDE"][i], columns["CIA"][i])
+
+        return {
+            "platform": lambda i: split_platforms(columns["Platform"][i]),
+            "matrix": lambda i: split_platforms(columns["Matrices"][i]),
+            "tactic": lambda i: [columns["Tactic_ID"][i]],
+            "stride": lambda i: [stride_and_cia(i)[0]],
+            "cia": lambda i: [stride_and_cia(i)[1]],
+        }
+
+    def _build(self):
+        # List the fixed STRIDE / CIA categories first so they keep their canonical order
+        for name, categories in (("stride", STRIDE_CATEGORIES), ("cia", CIA_CATEGORIES)):
+            for category in categories:
+                self.bitsets[name][category.lower()] = 0
+                self.labels[name][category.lower()] = category
+
+        readers = self._row_values()
+        for i in range(self.catalog.size):
+            bit = 1 << i
+            if not is_subtechnique(self.technique_ids[i]):
+                self.parent_rows |= bit
+            for name, read in readers.items():
+                for value in read(i):
+                    if not value:
+                        continue
+                    key = value.lower()
+                    self.bitsets[name][key] = self.bitsets[name].get(key, 0) | bit
+                    self.labels[name].setdefault(key, value)
+
+    def values(self, facet: str) -> List[str]:
+        """Display values of a facet"""
+        return list(self.labels[facet].values())
+
+    def _facet_mask(self, facet: str, selected: List[str], match: str) -> int:
+        """Rows passing one facet's selection (all rows when nothing is selected)"""
+        if not selected:
+            return self.all_rows
+        bitsets = self.bitsets[facet]
+        if match == MATCH_ALL:
+            mask = self.all_rows
+            for value in selected:
+                mask &= bitsets.get(value, 0)
+            return mask
+        mask = 0
+        for value in selected:
+            mask |= bitsets.get(value, 0)
+        return mask
+
+    def query(
+        self,
+        selections: Dict[str, List[str]],
+        match: Optional[Dict[str, str]] = None,
+        include_subtechniques: bool = True,
+        breakdown: bool = False,
+    ) -> dict:
+        """
+        Intersect the selected facets and count every facet value against the result
+
+        Values of one facet are OR-ed (or AND-ed when match[facet] is "all")
+        and facets are AND-ed together. Counts are disjunctive: a value's count
+        is the number of rows the result would have with that value selected
+        too, so picking another OR value never drops the other counts to zero.
+        Counts are rows, i.e. technique cards in the matrix view.
+
+        Args:
+            selections: facet -> selected values (case-insensitive)
+            match: facet -> "any" (default) or "all"
+            include_subtechniques: Set to false to drop dotted sub-technique rows
+            breakdown: Add per-tactic STRIDE / CIA counts of the matching rows
+
+        Raises:
+            KeyError: selections names an unknown facet
+        """
+        match = match or {}
+        for facet in selections:
+            if facet not in self.bitsets:
+                raise KeyError(facet)
+        selected = {facet: [v.lower() for v in selections.get(facet, [])] for facet in FACET_NAMES}
+
+        base = self.all_rows if include_subtechniques else self.parent_rows
+        facet_masks = {
+            facet: self._facet_mask(facet, selected[facet], match.get(facet, MATCH_ANY))
+            for facet in FACET_NAMES
+        }
+        matched = base
+        for mask in facet_masks.values():
+            matched &= mask
+
+        counts: Dict[str, Dict[str, int]] = {}
+        for facet in FACET_NAMES:
+            # Every other facet's filter, plus this facet's own selection when it is AND-ed
+            others = base
+            for other, mask in facet_masks.items():
+                if other != facet or match.get(facet, MATCH_ANY) == MATCH_ALL:
+                    others &= mask
+            labels = self.labels[facet]
+            counts[facet] = {
+                labels[key]: (others & bitset).bit_count()
+                for key, bitset in self.bitsets[facet].items()
+            }
+
+        rows = row_positions(matched)
+        technique_ids = self.technique_ids
+        result = {
+            "rows": len(rows),
+            "techniques": list(dict.fromkeys([technique_ids[i] for i in rows])),
+            "counts": counts,
+        }
+        if breakdown:
+            result["by_tactic"] = self.breakdown(matched)
+        return result
+
+    def breakdown(self, matched: int) -> Dict[str, dict]:
+        """Per-tactic row, STRIDE and CIA counts of the rows in matched"""
+        result = {}
+        for tactic_key, tactic_bits in self.bitsets["tactic"].items():
+            in_tactic = matched & tactic_bits
+            tactic_id = self.labels["tactic"][tactic_key]
+            result[tactic_id] = {
+                "name": self.catalog.tactics.get(tactic_id, ""),
+                "rows": in_tactic.bit_count(),
+                "stride": {self.labels["stride"][k]: (in_tactic & b).bit_count() for k, b in self.bitsets["stride"].items()},
+                "cia": {self.labels["cia"][k]: (in_tactic & b).bit_count() for k, b in self.bitsets["cia"].items()},
+            }
+        return result
+
+
+def build_facet_index(version: CatalogVersion, previous: Optional[FacetIndex]) -> FacetIndex:
+    # Row positions shift when rows are added or removed, so the bitsets are always rebuilt (~15 ms)
+    return FacetIndex(version.catalog)
+
+
+def get_facet_index() -> FacetIndex:
+    """Return the facet index for the current catalog version, building it if needed"""
+    return current_catalog_version().derived("facets", build_facet_index)
+
+
+async def get_facet_index_async() -> FacetIndex:
+    """get_facet_index() without blocking the event loop while the index is still being built"""
+    return await current_catalog_version().derived_async("facets", build_facet_index)
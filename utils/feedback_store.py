@@ -0,0 +1,546 @@
+import csv
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from utils.metrics import FEEDBACK_WRITE_LATENCY, FEEDBACK_WRITES
+
+try:
+    import fcntl
+except ImportError:  # Windows: CSV appends are only serialized within one process
+    fcntl = None
+
+# Feedback storage configuration - loaded from environment variables or defaults
+FEEDBACK_BACKEND = os.getenv("FEEDBACK_BACKEND", "sqlite")  # "sqlite" or "csv"
+FEEDBACK_DB = os.getenv("FEEDBACK_DB", "feedback.db")
+FEEDBACK_CSV = os.getenv("FEEDBACK_CSV", "feedback.csv")
+FEEDBACK_BATCH_MAX = int(os.getenv("FEEDBACK_BATCH_MAX", "256"))
+FEEDBACK_BATCH_WAIT_MS = float(os.getenv("FEEDBACK_BATCH_WAIT_MS", "2"))
+FEEDBACK_EXPORT_CHUNK = int(os.getenv("FEEDBACK_EXPORT_CHUNK", "500"))
+
+# Record fields in storage order, and the CSV / API column names for them
+FEEDBACK_FIELDS = ["id", "technique", "stride", "cia", "feedback_type", "sid", "comment", "timestamp"]
+FEEDBACK_COLUMNS = ["ID", "Technique", "STRIDE", "CIA", "Feedback Type", "SID", "Comment", "Timestamp"]
+
+# Fields that can be filtered on with an exact match
+FILTER_FIELDS = ["technique", "feedback_type", "stride", "cia", "sid"]
+
+
+def to_row(record: Dict[str, str]) -> Dict[str, str]:
+    """Record keyed by field name -> row keyed by the CSV column names the API has always returned"""
+    return {column: record.get(field, "") or "" for field, column in zip(FEEDBACK_FIELDS, FEEDBACK_COLUMNS)}
+
+
+def iter_csv_records(path: str) -> Iterator[Dict[str, str]]:
+    """Parse a feedback CSV (tolerating a BOM and blank lines) into records, one row at a time"""
+    with open(path, "r", newline="", encoding="utf-8-sig") as file:
+        for row in csv.DictReader(file):
+            if not row.get("ID"):
+                continue
+            if row.get("Timestamp") is None:
+                # Rows written before the Comment column existed end with the timestamp
+                row["Timestamp"], row["Comment"] = row.get("Comment"), ""
+            yield {field: row.get(column) or "" for field, column in zip(FEEDBACK_FIELDS, FEEDBACK_COLUMNS)}
+
+
+def matches(
+    record: Dict[str, str],
+    filters: Dict[str, str],
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    after: Optional[Tuple[str, str]] = None,
+) -> bool:
+    """Python equivalent of the SQLite backend's WHERE clause"""
+    if any(record.get(field) != value for field, value in filters.items()):
+        return False
+    timestamp = record.get("timestamp", "")
+    if since is not None and timestamp < since:
+        return False
+    if until is not None and timestamp >= until:
+        return False
+    return after is None or (timestamp, record.get("id", "")) > after
+
+
+class FeedbackCounters:
+    """Feedback counts per (technique, STRIDE, CIA), updated as records are written"""
+
+    def __init__(self):
+        self._counts: Dict[Tuple[str, str, str], Dict[str, int]] = {}
+        self.lock = threading.RLock()
+
+    def add(self, records: Iterable[Dict[str, str]]):
+        with self.lock:
+            for record in records:
+                key = (record.get("technique", ""), record.get("stride", ""), record.get("cia", ""))
+                counts = self._counts.setdefault(key, {})
+                feedback_type = record.get("feedback_type", "")
+                counts[feedback_type] = counts.get(feedback_type, 0) + 1
+
+    def reset(self):
+        with self.lock:
+            self._counts.clear()
+
+    def snapshot(self, technique: Optional[str] = None) -> List[Dict[str, object]]:
+        """One entry per (technique, STRIDE, CIA), sorted, with thumbs_up/thumbs_down always present"""
+        with self.lock:
+            items = sorted(
+                (key, dict(counts)) for key, counts in self._counts.items()
+                if technique is None or key[0] == technique
+            )
+        return [
+            {
+                "technique": key[0],
+                "stride": key[1],
+                "cia": key[2],
+                "thumbs_up": counts.pop("thumbs_up", 0),
+                "thumbs_down": counts.pop("thumbs_down", 0),
+                **counts,
+            }
+            for key, counts in items
+        ]
+
+
+class FeedbackStore:
+    """
+    Base class for feedback backends
+
+    Writes go through a single writer thread that drains whatever is queued
+    (waiting up to batch_wait for stragglers) and persists it as one batch,
+    so a burst of submissions costs one commit instead of one per request.
+    """
+
+    backend = ""
+
+    def __init__(self, batch_max: int = FEEDBACK_BATCH_MAX, batch_wait_ms: float = FEEDBACK_BATCH_WAIT_MS):
+        self.batch_max = batch_max
+        self.batch_wait = batch_wait_ms / 1000.0
+        self.batches = 0
+        self.written = 0
+        self.counters = FeedbackCounters()
+        self._load_counters()
+        # Held by the writer around each batch and by clear(), so a batch never straddles a clear
+        self._write_lock = threading.Lock()
+        self._queue: "queue.Queue[Optional[Tuple[Dict[str, str], Future]]]" = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name=f"feedback-{self.backend}-writer", daemon=True)
+        self._writer.start()
+
+    def submit(self, record: Dict[str, str]) -> Future:
+        """Queue a record for the next batch; the future resolves once it is durable"""
+        future: Future = Future()
+        self._queue.put((record, future))
+        return future
+
+    def add(self, record: Dict[str, str]):
+        """Blocking variant of submit"""
+        self.submit(record).result()
+
+    def _next_batch(self) -> Tuple[List[Tuple[Dict[str, str], Future]], bool]:
+        item = self._queue.get()
+        if item is None:
+            return [], True
+        batch = [item]
+        deadline = time.monotonic() + self.batch_wait
+        while len(batch) < self.batch_max:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _write_loop(self):
+        self._open_writer()
+        stopping = False
+        while not stopping:
+            batch, stopping = self._next_batch()
+            if not batch:
+                continue
+            records = [record for record, _ in batch]
+            start_time = time.monotonic()
+            try:
+                with self._write_lock:
+                    self._write_batch(records)
+                    FEEDBACK_WRITE_LATENCY.observe(time.monotonic() - start_time, self.backend)
+                    FEEDBACK_WRITES.inc(self.backend, amount=len(records))
+                    self._update_counters(records)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            self.written += len(batch)
+            for _, future in batch:
+                future.set_result(None)
+        self._close_writer()
+
+    def _open_writer(self):
+        pass
+
+    def _close_writer(self):
+        pass
+
+    def _write_batch(self, records: List[Dict[str, str]]):
+        raise NotImplementedError
+
+    def _load_counters(self):
+        """Seed the counters from what is already stored (once, at open)"""
+        self.counters.add(self.query())
+
+    def _update_counters(self, records: List[Dict[str, str]]):
+        self.counters.add(records)
+
+    def query(
+        self,
+        filters: Optional[Dict[str, str]] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        after: Optional[Tuple[str, str]] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, str]]:
+        """
+        Records ordered by (timestamp, id)
+
+        Args:
+            filters: Exact matches on FILTER_FIELDS
+            since: Inclusive lower bound on timestamp
+            until: Exclusive upper bound on timestamp
+            after: Keyset cursor; only records after this (timestamp, id)
+            limit: Maximum number of records
+        """
+        raise NotImplementedError
+
+    def iter_chunks(
+        self,
+        filters: Optional[Dict[str, str]] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        chunk_size: int = FEEDBACK_EXPORT_CHUNK,
+    ) -> Iterator[List[Dict[str, str]]]:
+        """
+        Yield matching records in (timestamp, id) order, chunk_size at a time
+
+        Each chunk is its own keyset query, so memory stays flat however much
+        feedback there is and no read transaction is held between chunks.
+        """
+        after = None
+        while True:
+            records = self.query(filters, since, until, after, chunk_size)
+            if records:
+                yield records
+            if len(records) < chunk_size:
+                return
+            after = (records[-1]["timestamp"], records[-1]["id"])
+
+    def count(self) -> int:
+        raise NotImplementedError
+
+    def clear(self) -> int:
+        """
+        Delete all stored feedback and reset the counters
+
+        Returns:
+            Number of records removed
+        """
+        with self._write_lock:
+            return self._clear()
+
+    def _clear(self) -> int:
+        raise NotImplementedError
+
+    def aggregates(self, technique: Optional[str] = None) -> List[Dict[str, object]]:
+        """Per (technique, STRIDE, CIA) feedback counts"""
+        return self.counters.snapshot(technique)
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "backend": self.backend,
+            "rows": self.count(),
+            "written": self.written,
+            "batches": self.batches,
+            "avg_batch_size": round(self.written / self.batches, 2) if self.batches else 0.0,
+        }
+
+    def close(self):
+        """Flush queued writes and stop the writer thread"""
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join()
+
+
+class CSVFeedbackStore(FeedbackStore):
+    """The original append-only feedback.csv, with batched, file-locked appends"""
+
+    backend = "csv"
+
+    def __init__(self, path: str = FEEDBACK_CSV, **kwargs):
+        self.path = path
+        self.ensure_exists()
+        super().__init__(**kwargs)
+
+    def ensure_exists(self):
+        """Create the CSV with its header row if it is missing"""
+        if not os.path.exists(self.path):
+            with open(self.path, "w", newline="", encoding="utf-8") as file:
+                csv.writer(file).writerow(FEEDBACK_COLUMNS)
+
+    def _write_batch(self, records: List[Dict[str, str]]):
+        self.ensure_exists()
+        with open(self.path, "a", newline="", encoding="utf-8") as file:
+            # Other workers append to the same file; keep each batch contiguous
+            if fcntl is not None:
+                fcntl.flock(file, fcntl.LOCK_EX)
+            try:
+                writer = csv.writer(file)
+                writer.writerows([record.get(field, "") for field in FEEDBACK_FIELDS] for record in records)
+                file.flush()
+                os.fsync(file.fileno())
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(file, fcntl.LOCK_UN)
+
+    def query(self, filters=None, since=None, until=None, after=None, limit=None) -> List[Dict[str, str]]:
+        if not os.path.exists(self.path):
+            return []
+        # The CSV has no index: every query is a scan, which is why SQLite is the default
+        records = [
+            record for record in iter_csv_records(self.path)
+            if matches(record, filters or {}, since, until, after)
+        ]
+        records.sort(key=lambda record: (record["timestamp"], record["id"]))
+        return records[:limit] if limit is not None else records
+
+    def iter_chunks(self, filters=None, since=None, until=None, chunk_size=FEEDBACK_EXPORT_CHUNK):
+        # Stream the file in append order rather than re-scanning it for every keyset page
+        if not os.path.exists(self.path):
+            return
+        chunk = []
+        for record in iter_csv_records(self.path):
+            if matches(record, filters or {}, since, until):
+                chunk.append(record)
+                if len(chunk) == chunk_size:
+                    yield chunk
+                    chunk = []
+        if chunk:
+            yield chunk
+
+    def count(self) -> int:
+        return sum(1 for _ in iter_csv_records(self.path)) if os.path.exists(self.path) else 0
+
+    def _clear(self) -> int:
+        removed = self.count()
+        with open(self.path, "w", newline="", encoding="utf-8") as file:
+            if fcntl is not None:
+                fcntl.flock(file, fcntl.LOCK_EX)
+            try:
+                csv.writer(file).writerow(FEEDBACK_COLUMNS)
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(file, fcntl.LOCK_UN)
+        self.counters.reset()
+        return removed
+
+
+class SQLiteFeedbackStore(FeedbackStore):
+    """Feedback in a WAL-mode SQLite table indexed by technique, SID and timestamp"""
+
+    backend = "sqlite"
+
+    def __init__(self, db_path: str = FEEDBACK_DB, import_csv: Optional[str] = FEEDBACK_CSV, **kwargs):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._seen_rowid = 0
+        self._generation: Optional[int] = None  # PRAGMA user_version, bumped by every clear()
+        self._setup_db()
+        if import_csv and self.count() == 0 and os.path.exists(import_csv):
+            self.import_csv(import_csv)
+        super().__init__(**kwargs)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, isolation_level=None)
+        conn.execute("PRAGMA busy_timeout=5000")  # several uvicorn workers share the file
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _reader(self) -> sqlite3.Connection:
+        """One read connection per thread; WAL lets them run alongside the writer"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    def _setup_db(self):
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS feedback (
+                    id TEXT PRIMARY KEY,
+                    technique TEXT NOT NULL,
+                    stride TEXT NOT NULL,
+                    cia TEXT NOT NULL,
+                    feedback_type TEXT NOT NULL,
+                    sid TEXT NOT NULL DEFAULT '',
+                    comment TEXT NOT NULL DEFAULT '',
+                    timestamp TEXT NOT NULL
+                )"""
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_feedback_technique ON feedback(technique, timestamp)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_feedback_sid ON feedback(sid, timestamp)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_feedback_timestamp ON feedback(timestamp, id)")
+        finally:
+            conn.close()
+
+    def _insert(self, conn: sqlite3.Connection, records: List[Dict[str, str]]) -> int:
+        """Insert records in one transaction, ignoring IDs that already exist"""
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            cursor = conn.executemany(
+                f"INSERT OR IGNORE INTO feedback ({', '.join(FEEDBACK_FIELDS)}) "
+                f"VALUES ({', '.join('?' * len(FEEDBACK_FIELDS))})",
+                [[record.get(field, "") or "" for field in FEEDBACK_FIELDS] for record in records],
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return cursor.rowcount
+
+    def _open_writer(self):
+        self._writer_conn = self._connect()
+
+    def _close_writer(self):
+        self._writer_conn.close()
+
+    def _write_batch(self, records: List[Dict[str, str]]):
+        self._insert(self._writer_conn, records)
+
+    def import_csv(self, path: str) -> int:
+        """
+        Load an existing feedback CSV; rows whose ID is already stored are skipped
+
+        Returns:
+            Number of rows imported
+        """
+        conn = self._connect()
+        try:
+            return self._insert(conn, list(iter_csv_records(path)))
+        finally:
+            conn.close()
+
+    def _catch_up(self, conn: sqlite3.Connection):
+        """
+        Fold rows inserted since the last look into the counters
+
+        Rowids only grow, so this sees rows written by other worker processes
+        too, and each row is counted exactly once. A clear() (here or in
+        another worker) bumps user_version; rowids may then start over, so the
+        counters are rebuilt from scratch.
+        """
+        with self.counters.lock:
+            generation = conn.execute("PRAGMA user_version").fetchone()[0]
+            if generation != self._generation:
+                self._generation = generation
+                self._seen_rowid = 0
+                self.counters.reset()
+            rows = conn.execute(
+                "SELECT rowid, technique, stride, cia, feedback_type FROM feedback WHERE rowid > ? ORDER BY rowid",
+                (self._seen_rowid,),
+            ).fetchall()
+            if rows:
+                self._seen_rowid = rows[-1][0]
+                self.counters.add(
+                    {"technique": row[1], "stride": row[2], "cia": row[3], "feedback_type": row[4]} for row in rows
+                )
+
+    def _load_counters(self):
+        self._catch_up(self._reader())
+
+    def _update_counters(self, records: List[Dict[str, str]]):
+        self._catch_up(self._writer_conn)
+
+    def aggregates(self, technique: Optional[str] = None) -> List[Dict[str, object]]:
+        self._catch_up(self._reader())
+        return super().aggregates(technique)
+
+    def query(self, filters=None, since=None, until=None, after=None, limit=None) -> List[Dict[str, str]]:
+        clauses, params = [], []
+        for field, value in (filters or {}).items():
+            if field not in FILTER_FIELDS:
+                raise ValueError(f"Cannot filter feedback on '{field}'")
+            clauses.append(f"{field} = ?")
+            params.append(value)
+        if since is not None:
+            clauses.append("timestamp >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("timestamp < ?")
+            params.append(until)
+        if after is not None:
+            clauses.append("(timestamp, id) > (?, ?)")
+            params.extend(after)
+        sql = f"SELECT {', '.join(FEEDBACK_FIELDS)} FROM feedback"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY timestamp, id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [dict(zip(FEEDBACK_FIELDS, row)) for row in self._reader().execute(sql, params)]
+
+    def count(self) -> int:
+        return self._reader().execute("SELECT COUNT(*) FROM feedback").fetchone()[0]
+
+    def _clear(self) -> int:
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                removed = conn.execute("DELETE FROM feedback").rowcount
+                generation = conn.execute("PRAGMA user_version").fetchone()[0]
+                conn.execute(f"PRAGMA user_version = {int(generation) + 1}")
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            self._catch_up(conn)
+        finally:
+            conn.close()
+        return removed
+
+
+FEEDBACK_BACKENDS = {
+    "sqlite": SQLiteFeedbackStore,
+    "csv": CSVFeedbackStore,
+}
+
+_store: Optional[FeedbackStore] = None
+_store_lock = threading.Lock()
+
+
+def get_feedback_store() -> FeedbackStore:
+    """Return the process-wide feedback store for FEEDBACK_BACKEND, opening it on first use"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                if FEEDBACK_BACKEND not in FEEDBACK_BACKENDS:
+                    raise ValueError(
+                        f"Unknown FEEDBACK_BACKEND '{FEEDBACK_BACKEND}' (expected one of {', '.join(FEEDBACK_BACKENDS)})"
+                    )
+                _store = FEEDBACK_BACKENDS[FEEDBACK_BACKEND]()
+    return _store
+
+
+def close_feedback_store():
+    """Flush pending writes; called on application shutdown"""
+    global _store
+    with _store_lock:
+        if _store is not None:
+            _store.close()
+            _store = None
@@ -0,0 +1,282 @@
+import hashlib
+import json
+import math
+import os
+import threading
+import uuid
+from typing import Dict, List, Optional
+
+from utils.catalog import (
+    CIA_CATEGORIES,
+    STRIDE_CATEGORIES,
+    CatalogVersion,
+    TechniqueCatalog,
+    current_catalog_version,
+    is_subtechnique,
+    normalize_stride_and_cia,
+)
+
+# Layout cache file - loaded from environment variable or default
+GRAPH_LAYOUT_CACHE = os.getenv("GRAPH_LAYOUT_CACHE", "graph_layout.json")
+GRAPH_LAYOUT_TICKS = int(os.getenv("GRAPH_LAYOUT_TICKS", "300"))
+
+# Node and link type codes used by the compact format (order matters)
+NODE_TYPES = ["technique", "stride", "cia", "tactic"]
+LINK_TYPES = ["tactic", "stride", "cia"]
+TECHNIQUE, STRIDE, CIA, TACTIC = range(len(NODE_TYPES))
+
+# Forces mirror createForceSimulation in network.js
+NODE_RADIUS = {TECHNIQUE: 6, STRIDE: 12, CIA: 12, TACTIC: 15}
+NODE_CHARGE = {TECHNIQUE: -100.0, STRIDE: -300.0, CIA: -300.0, TACTIC: -500.0}
+LINK_DISTANCE = {0: 150.0, 1: 100.0, 2: 100.0}
+COLLIDE_SCALE = 1.5
+VELOCITY_DECAY = 0.4
+ALPHA_MIN = 0.001
+
+
+class TechniqueGraph:
+    """Tactic / technique / STRIDE / CIA graph with integer-indexed links"""
+
+    def __init__(self, catalog: TechniqueCatalog):
+        self.catalog = catalog
+        self.ids: List[str] = []
+        self.types: List[int] = []
+        self.technique_ids: List[str] = []
+        self.tactics: List[str] = []
+        self.sources: List[int] = []
+        self.targets: List[int] = []
+        self.link_types: List[int] = []
+        self._build()
+        self.digest = self._digest()
+
+    def _add_node(self, node_id: str, node_type: int, technique_id: str = "", tactic: str = "") -> int:
+        self._index[node_id] = len(self.ids)
+        self.ids.append(node_id)
+        self.types.append(node_type)
+        self.technique_ids.append(technique_id)
+        self.tactics.append(tactic)
+        return self._index[node_id]
+
+    def _build(self):
+        self._index: Dict[str, int] = {}
+        columns = self.catalog.columns
+        rows = [
+            i for i in range(self.catalog.size)
+            if columns["Technique_Name"][i] and not is_subtechnique(columns["Technique_ID"][i])
+        ]
+
+        for category in STRIDE_CATEGORIES:
+            self._add_node(category, STRIDE)
+        for category in CIA_CATEGORIES:
+            self._add_node(category, CIA)
+        for i in rows:
+            tactic = columns["Tactic_Name"][i]
+            if tactic and tactic not in self._index:
+                self._add_node(tactic, TACTIC)
+
+        seen_links = set()
+        for i in rows:
+            name = columns["Technique_Name"][i]
+            tactic = columns["Tactic_Name"][i]
+            stride, cia = normalize_stride_and_cia(columns["STRIDE"][i], columns["CIA"][i])
+
+            source = self._index.get(name)
+            if source is None:
+                source = self._add_node(name, TECHNIQUE, columns["Technique_ID"][i], tactic)
+            for link_type, target_id in enumerate((tactic, stride, cia)):
+                target = self._index.get(target_id) if target_id else None
+                if target is None or (source, target) in seen_links:
+                    continue
+                seen_links.add((source, target))
+                self.sources.append(source)
+                self.targets.append(target)
+                self.link_types.append(link_type)
+        del self._index
+
+    def _digest(self) -> str:
+        payload = json.dumps([self.ids, self.types, self.sources, self.targets, self.link_types])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+    def to_dict(self, layout: Optional[Dict[str, List[float]]] = None) -> dict:
+        """Compact, columnar wire format; links refer to nodes by position"""
+        return {
+            "version": self.digest,
+            "node_types": NODE_TYPES,
+            "link_types": LINK_TYPES,
+            "nodes": {
+                "id": self.ids,
+                "type": self.types,
+                "technique_id": self.technique_ids,
+                "tactic": self.tactics,
+            },
+            "links": {
+                "source": self.sources,
+                "target": self.targets,
+                "type": self.link_types,
+            },
+            "layout": layout,
+        }
+
+
+def compute_layout(graph: TechniqueGraph, ticks: int = GRAPH_LAYOUT_TICKS) -> Dict[str, List[float]]:
+    """
+    Run the same force model as network.js to convergence, centred on (0, 0)
+
+    Uses d3-force's phyllotaxis start positions, link/charge/center/collide
+    forces and alpha schedule, so the client can render the result directly.
+    """
+    n = len(graph.ids)
+    x, y = [0.0] * n, [0.0] * n
+    for i in range(n):
+        radius = 10 * math.sqrt(0.5 + i)
+        angle = i * math.pi * (3 - math.sqrt(5))
+        x[i], y[i] = radius * math.cos(angle), radius * math.sin(angle)
+    vx, vy = [0.0] * n, [0.0] * n
+
+    charge = [NODE_CHARGE[t] for t in graph.types]
+    collide = [NODE_RADIUS[t] * COLLIDE_SCALE for t in graph.types]
+    degree = [0] * n
+    for s, t in zip(graph.sources, graph.targets):
+        degree[s] += 1
+        degree[t] += 1
+    links = [
+        (s, t, LINK_DISTANCE[k], 1.0 / min(degree[s], degree[t]), degree[s] / (degree[s] + degree[t]))
+        for s, t, k in zip(graph.sources, graph.targets, graph.link_types)
+    ]
+
+    alpha = 1.0
+    alpha_decay = 1 - ALPHA_MIN ** (1 / 300)
+    for _ in range(ticks):
+        alpha += -alpha * alpha_decay
+
+        for s, t, distance, strength, bias in links:
+            dx = x[t] + vx[t] - x[s] - vx[s] or 1e-6
+            dy = y[t] + vy[t] - y[s] - vy[s] or 1e-6
+            length = math.sqrt(dx * dx + dy * dy)
+            k = (length - distance) / length * alpha * strength
+            dx, dy = dx * k, dy * k
+            vx[t] -= dx * bias
+            vy[t] -= dy * bias
+            vx[s] += dx * (1 - bias)
+            vy[s] += dy * (1 - bias)
+
+        for i in range(n):
+            xi, yi, ri = x[i], y[i], collide[i]
+            fx = fy = 0.0
+            for j in range(i + 1, n):
+                dx = x[j] - xi or 1e-6
+                dy = y[j] - yi or 1e-6
+                d2 = dx * dx + dy * dy
+                if d2 < 1:
+                    d2 = math.sqrt(d2)
+                # Many-body: node j pushes i and i pushes j
+                wi = charge[j] * alpha / d2
+                wj = charge[i] * alpha / d2
+                fx += dx * wi
+                fy += dy * wi
+                vx[j] -= dx * wj
+                vy[j] -= dy * wj
+                # Collision: separate overlapping discs
+                r = ri + collide[j]
+                if d2 < r * r:
+                    d = math.sqrt(d2)
+                    k = (r - d) / d * 0.5
+                    fx -= dx * k
+                    fy -= dy * k
+                    vx[j] += dx * k
+                    vy[j] += dy * k
+            vx[i] += fx
+            vy[i] += fy
+
+        for i in range(n):
+            vx[i] *= 1 - VELOCITY_DECAY
+            vy[i] *= 1 - VELOCITY_DECAY
+            x[i] += vx[i]
+            y[i] += vy[i]
+
+        mean_x, mean_y = sum(x) / n, sum(y) / n
+        for i in range(n):
+            x[i] -= mean_x
+            y[i] -= mean_y
+
+    return {"x": [round(v, 1) for v in x], "y": [round(v, 1) for v in y]}
+
+
+def load_cached_layout(graph: TechniqueGraph, path: str = GRAPH_LAYOUT_CACHE) -> Optional[Dict[str, List[float]]]:
+    """Return the layout stored on disk if it was computed for this exact graph"""
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            cached = json.load(file)
+    except (OSError, ValueError):
+        return None
+    if cached.get("version") != graph.digest:
+        return None
+    return cached.get("layout")
+
+
+def save_cached_layout(graph: TechniqueGraph, layout: Dict[str, List[float]], path: str = GRAPH_LAYOUT_CACHE):
+    """Persist a layout atomically so other workers and restarts can reuse it"""
+    # A unique temporary name per writer, so concurrent workers never interleave into one file
+    tmp_path = f"{path}.{os.getpid()}.{uuid.uuid4().hex[:8]}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        json.dump({"version": graph.digest, "layout": layout}, file)
+    os.replace(tmp_path, path)
+
+
+class GraphState:
+    """The graph for the current catalog plus its (lazily computed) layout"""
+
+    def __init__(self, graph: TechniqueGraph):
+        self.graph = graph
+        self.layout: Optional[Dict[str, List[float]]] = load_cached_layout(graph)
+        self._layout_lock = threading.Lock()
+        self._layout_thread: Optional[threading.Thread] = None
+        self._thread_lock = threading.Lock()
+
+    def ensure_layout(self) -> Dict[str, List[float]]:
+        """Compute (once) and cache the layout; safe to call from several threads"""
+        if self.layout is None:
+            with self._layout_lock:
+                if self.layout is None:
+                    layout = compute_layout(self.graph)
+                    try:
+                        save_cached_layout(self.graph, layout)
+                    except OSError:
+                        pass  # an unwritable cache only costs a recompute after restart
+                    self.layout = layout
+        return self.layout
+
+    def start_layout(self):
+        """Compute the layout on a background thread unless it is ready or already being computed"""
+        if self.layout is not None:
+            return
+        with self._thread_lock:
+            if self._layout_thread is None:
+                self._layout_thread = threading.Thread(target=self.ensure_layout, name="graph-layout", daemon=True)
+                self._layout_thread.start()
+
+
+def build_graph_state(version: CatalogVersion, previous: Optional[GraphState]) -> GraphState:
+    """
+    Graph for a catalog version; on reload the layout is ready before the version is swapped in
+
+    Changes that leave the graph's structure alone (descriptions, platforms)
+    keep the previous layout instead of simulating again.
+    """
+    state = GraphState(TechniqueGraph(version.catalog))
+    if previous is not None and previous.layout is not None:
+        if previous.graph.digest == state.graph.digest:
+            state.layout = previous.layout
+        else:
+            state.ensure_layout()
+    return state
+
+
+def get_graph_state() -> GraphState:
+    """Return the graph for the current catalog version, building it if needed"""
+    return current_catalog_version().derived("graph", build_graph_state)
+
+
+async def get_graph_state_async() -> GraphState:
+    """get_graph_state() without blocking the event loop while the graph is still being built"""
+    return await current_catalog_version().derived_async("graph", build_graph_state)
@@ -0,0 +1,208 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+# LLM cache configuration - loaded from environment variables or defaults
+LLM_CACHE_DB = os.getenv("LLM_CACHE_DB", "llm_cache.db")
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", str(30 * 24 * 3600)))  # seconds, 0 = never expire
+LLM_CACHE_MEMORY_ENTRIES = int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "256"))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000"))
+
+# Expired and over-limit rows are pruned once per this many writes, not on every write,
+# so the table may briefly hold up to this many entries beyond LLM_CACHE_MAX_ENTRIES
+EVICT_EVERY_WRITES = 64
+
+
+def make_cache_key(model: str, template_version: str, technique_name: str, technique_description: str) -> str:
+    """Stable key for one generation request"""
+    payload = json.dumps([model, template_version, technique_name, technique_description], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    Two-tier cache for LLM outputs: an in-process LRU in front of a SQLite table
+
+    Methods block on SQLite; async callers should run them through run_in_threadpool.
+    """
+
+    def __init__(
+        self,
+        db_path: str = LLM_CACHE_DB,
+        ttl: int = LLM_CACHE_TTL,
+        memory_entries: int = LLM_CACHE_MEMORY_ENTRIES,
+        max_entries: int = LLM_CACHE_MAX_ENTRIES,
+    ):
+        self.db_path = db_path
+        self.ttl = ttl
+        self.memory_entries = memory_entries
+        self.max_entries = max_entries
+        self._memory: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = {"memory": 0, "disk": 0}
+        self.misses = 0
+        self._writes = 0
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._setup_db()
+
+    def _setup_db(self):
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS llm_responses (
+                    key TEXT PRIMARY KEY,
+                    technique_name TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )"""
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_llm_responses_technique ON llm_responses(technique_name)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_llm_responses_accessed ON llm_responses(accessed_at)"
+            )
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl > 0 and now - created_at > self.ttl
+
+    def _remember(self, key: str, response: str, created_at: float):
+        """Insert into the memory tier, evicting the least recently used entry"""
+        self._memory[key] = (response, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for key, or None"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and not self._expired(entry[1], now):
+                self._memory.move_to_end(key)
+                self.hits["memory"] += 1
+                return entry[0]
+            self._memory.pop(key, None)
+
+            row = self._conn.execute(
+                "SELECT response, created_at FROM llm_responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or self._expired(row[1], now):
+                if row is not None:
+                    self._conn.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+                self.misses += 1
+                return None
+
+            self._conn.execute("UPDATE llm_responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self._remember(key, row[0], row[1])
+            self.hits["disk"] += 1
+            return row[0]
+
+    def contains(self, key: str) -> bool:
+        """True if a live entry exists, without touching hit counters or recency"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT created_at FROM llm_responses WHERE key = ?", (key,)
+            ).fetchone()
+        return row is not None and not self._expired(row[0], now)
+
+    def set(self, key: str, response: str, technique_name: str = "", model: str = ""):
+        """Store a response in both tiers, enforcing the size limit every EVICT_EVERY_WRITES writes"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                """INSERT OR REPLACE INTO llm_responses
+                   (key, technique_name, model, response, created_at, accessed_at)
+                   VALUES (?, ?, ?, ?, ?, ?)""",
+                (key, technique_name, model, response, now, now),
+            )
+            self._remember(key, response, now)
+            self._writes += 1
+            if self._writes % EVICT_EVERY_WRITES == 0:
+                self._evict(now)
+
+    def _evict(self, now: float):
+        """Drop expired rows, then the least recently used ones beyond max_entries"""
+        if self.ttl > 0:
+            self._conn.execute("DELETE FROM llm_responses WHERE created_at < ?", (now - self.ttl,))
+        count = self._conn.execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0]
+        if count > self.max_entries:
+            self._conn.execute(
+                """DELETE FROM llm_responses WHERE key IN (
+                       SELECT key FROM llm_responses ORDER BY accessed_at LIMIT ?
+                   )""",
+                (count - self.max_entries,),
+            )
+
+    def invalidate(self, key: Optional[str] = None, technique_name: Optional[str] = None, everything: bool = False) -> int:
+        """
+        Remove entries by key, by technique name, or everything when everything is set
+
+        Raises:
+            ValueError: none of key, technique_name or everything was given
+
+        Returns:
+            Number of disk entries removed
+        """
+        with self._lock:
+            if key is not None:
+                self._memory.pop(key, None)
+                cursor = self._conn.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+            elif technique_name is not None:
+                keys = [
+                    row[0] for row in self._conn.execute(
+                        "SELECT key FROM llm_responses WHERE technique_name = ?", (technique_name,)
+                    )
+                ]
+                for k in keys:
+                    self._memory.pop(k, None)
+                cursor = self._conn.execute(
+                    "DELETE FROM llm_responses WHERE technique_name = ?", (technique_name,)
+                )
+            elif everything:
+                self._memory.clear()
+                cursor = self._conn.execute("DELETE FROM llm_responses")
+            else:
+                raise ValueError("Pass a key, a technique name or everything=True")
+            return cursor.rowcount
+
+    def stats(self) -> Dict[str, object]:
+        """Hit/miss counters and tier sizes"""
+        with self._lock:
+            disk_entries = self._conn.execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0]
+            lookups = self.hits["memory"] + self.hits["disk"] + self.misses
+            return {
+                "memory_entries": len(self._memory),
+                "disk_entries": disk_entries,
+                "memory_hits": self.hits["memory"],
+                "disk_hits": self.hits["disk"],
+                "misses": self.misses,
+                "hit_ratio": round((lookups - self.misses) / lookups, 4) if lookups else 0.0,
+            }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_cache: Optional[LLMResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> LLMResponseCache:
+    """Return the process-wide cache, opening the database on first use"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = LLMResponseCache()
+    return _cache
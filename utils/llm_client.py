@@ -1,13 +1,60 @@
-import openai
+import asyncio
 import os
 import time
-from typing import Optional, Dict, Any
+from typing import AsyncIterator, NamedTuple, Optional, Dict, Any
 import logging
 
+from utils.metrics import LLM_LATENCY, record_llm_usage
+from utils.resilience import CircuitBreaker, CircuitOpenError, ResilientCaller
+from utils.startup import import_lazily
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# HTTP client configuration - loaded from environment variables or defaults
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "10"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+LLM_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", "10"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+# Request a usage chunk at the end of streamed completions (disable for servers that reject stream_options)
+LLM_STREAM_USAGE = os.getenv("LLM_STREAM_USAGE", "true").lower() == "true"
+
+# Resilience configuration - loaded from environment variables or defaults
+LLM_ATTEMPT_TIMEOUT = float(os.getenv("LLM_ATTEMPT_TIMEOUT", "30"))  # seconds per attempt, 0 = only LLM_TIMEOUT
+LLM_RETRY_BACKOFF_BASE = float(os.getenv("LLM_RETRY_BACKOFF_BASE", "0.5"))
+LLM_RETRY_BACKOFF_CAP = float(os.getenv("LLM_RETRY_BACKOFF_CAP", "8"))
+LLM_HEDGE = os.getenv("LLM_HEDGE", "false").lower() == "true"
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "0.95"))
+LLM_HEDGE_MIN_DELAY = float(os.getenv("LLM_HEDGE_MIN_DELAY", "2"))
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))  # 0 disables the circuit breaker
+LLM_BREAKER_RESET = float(os.getenv("LLM_BREAKER_RESET", "30"))
+
+def default_resilience(max_retries: int = LLM_MAX_RETRIES) -> ResilientCaller:
+    """Retry, hedging and circuit breaker policy from the LLM_* settings"""
+    return ResilientCaller(
+        max_retries=max_retries,
+        attempt_timeout=LLM_ATTEMPT_TIMEOUT,
+        backoff_base=LLM_RETRY_BACKOFF_BASE,
+        backoff_cap=LLM_RETRY_BACKOFF_CAP,
+        hedge=LLM_HEDGE,
+        hedge_percentile=LLM_HEDGE_PERCENTILE,
+        hedge_min_delay=LLM_HEDGE_MIN_DELAY,
+        breaker=CircuitBreaker(LLM_BREAKER_FAILURES, LLM_BREAKER_RESET) if LLM_BREAKER_FAILURES > 0 else None
+    )
+
+def load_openai():
+    """Import the openai SDK and httpx on first use; returns (openai, httpx)"""
+    return import_lazily("openai"), import_lazily("httpx")
+
+class LLMCompletion(NamedTuple):
+    """Completion text plus the token usage reported by the API"""
+    text: str
+    prompt_tokens: int
+    completion_tokens: int
+
 class LLMClient:
     """Client for interacting with OpenAI LLM API"""
     
@@ -15,15 +62,46 @@ class LLMClient:
     OPENAI_MODEL = "gpt-3.5-turbo"
     OPENAI_MAX_TOKENS = 800
     OPENAI_TEMPERATURE = 0.7
+    SYSTEM_PROMPT = "You are a cybersecurity expert specializing in MITRE ATT&CK techniques. Provide clear, educational examples."
     
-    def __init__(self, api_key: Optional[str] = None):
-        """Initialize the LLM client with OpenAI API key"""
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = OPENAI_BASE_URL,
+        timeout: float = LLM_TIMEOUT,
+        max_connections: int = LLM_MAX_CONNECTIONS,
+        max_retries: int = LLM_MAX_RETRIES,
+        resilience: Optional[ResilientCaller] = None
+    ):
+        """
+        Initialize the LLM client with OpenAI API key and a pooled async HTTP client
+        
+        Retries are done by the resilience policy (max_retries of them unless a
+        policy is passed in), so the OpenAI SDK's own retries are switched off.
+        """
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
         if not self.api_key:
             raise ValueError("OpenAI API key is required. Set OPENAI_API_KEY environment variable or pass it to constructor.")
         
-        openai.api_key = self.api_key
-        self.client = openai.OpenAI(api_key=self.api_key)
+        # openai (and httpx under it) takes about half a second to import: only pay for it when a client is made
+        openai, httpx = load_openai()
+        
+        # One connection pool for the lifetime of the client, so TLS sessions are reused
+        self.http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=min(LLM_MAX_KEEPALIVE_CONNECTIONS, max_connections)
+            ),
+            timeout=httpx.Timeout(timeout, connect=LLM_CONNECT_TIMEOUT)
+        )
+        self.client = openai.AsyncOpenAI(
+            api_key=self.api_key,
+            base_url=base_url,
+            http_client=self.http_client,
+            timeout=httpx.Timeout(timeout, connect=LLM_CONNECT_TIMEOUT),
+            max_retries=0
+        )
+        self.resilience = resilience or default_resilience(max_retries)
     
     async def generate_procedure_example(self, prompt: str) -> str:
         """
@@ -43,39 +121,163 @@ class LLMClient:
             logger.info(f"OpenAI API call successful in {response_time:.3f}s")
             return response
             
+        except CircuitOpenError:
+            raise
         except Exception as e:
             logger.error(f"Error generating procedure example: {str(e)}")
             raise Exception(f"Failed to generate procedure example: {str(e)}")
     
+    def _messages(self, prompt: str) -> list:
+        """Chat messages for a procedure generation prompt"""
+        return [
+            {"role": "system", "content": self.SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ]
+    
+    async def stream_procedure_example(self, prompt: str) -> AsyncIterator[str]:
+        """
+        Stream a procedure example as the model produces it
+        
+        Args:
+            prompt: The complete prompt to send to the LLM
+            
+        Yields:
+            Text fragments in order; closing the generator early closes the
+            upstream HTTP stream so no further tokens are generated
+        """
+        start_time = time.time()
+        try:
+            # Retries and the breaker cover opening the stream; hedging a stream would duplicate tokens
+            stream = await self.resilience.call(
+                lambda: self.client.chat.completions.create(
+                    model=self.OPENAI_MODEL,
+                    messages=self._messages(prompt),
+                    max_tokens=self.OPENAI_MAX_TOKENS,
+                    temperature=self.OPENAI_TEMPERATURE,
+                    stream=True,
+                    # Ask for a final usage chunk so streamed calls are counted too
+                    extra_body={"stream_options": {"include_usage": True}} if LLM_STREAM_USAGE else None
+                ),
+                operation="stream",
+                hedge=False
+            )
+        except CircuitOpenError:
+            LLM_LATENCY.observe(time.time() - start_time, "stream", "rejected")
+            raise
+        except Exception as e:
+            LLM_LATENCY.observe(time.time() - start_time, "stream", "error")
+            logger.error(f"OpenAI streaming call failed: {str(e)}")
+            raise Exception(f"OpenAI API call failed: {str(e)}")
+        
+        outcome = "error"
+        try:
+            async for chunk in stream:
+                usage = getattr(chunk, "usage", None)
+                if usage:
+                    if isinstance(usage, dict):
+                        record_llm_usage(usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0))
+                    else:
+                        record_llm_usage(usage.prompt_tokens, usage.completion_tokens)
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    yield delta
+            outcome = "success"
+        except (GeneratorExit, asyncio.CancelledError):
+            outcome = "cancelled"
+            raise
+        finally:
+            LLM_LATENCY.observe(time.time() - start_time, "stream", outcome)
+            await stream.response.aclose()
+    
+    async def complete(self, prompt: str) -> LLMCompletion:
+        """
+        Run one completion and report its token usage
+        
+        Goes through the resilience policy (per-attempt timeout, retries,
+        hedging, circuit breaker). Unlike generate_procedure_example, the final
+        exception propagates unchanged so callers can tell rate limits from
+        other failures.
+        """
+        start_time = time.time()
+        try:
+            response = await self.resilience.call(
+                lambda: self.client.chat.completions.create(
+                    model=self.OPENAI_MODEL,
+                    messages=self._messages(prompt),
+                    max_tokens=self.OPENAI_MAX_TOKENS,
+                    temperature=self.OPENAI_TEMPERATURE
+                )
+            )
+        except CircuitOpenError:
+            LLM_LATENCY.observe(time.time() - start_time, "complete", "rejected")
+            raise
+        except Exception:
+            LLM_LATENCY.observe(time.time() - start_time, "complete", "error")
+            raise
+        LLM_LATENCY.observe(time.time() - start_time, "complete", "success")
+        usage = response.usage
+        completion = LLMCompletion(
+            text=response.choices[0].message.content.strip(),
+            prompt_tokens=usage.prompt_tokens if usage else 0,
+            completion_tokens=usage.completion_tokens if usage else 0
+        )
+        record_llm_usage(completion.prompt_tokens, completion.completion_tokens)
+        return completion
+    
     async def _call_openai(self, prompt: str) -> str:
         """Make the actual call to OpenAI API"""
         try:
-            response = self.client.chat.completions.create(
-                model=self.OPENAI_MODEL,
-                messages=[
-                    {"role": "system", "content": "You are a cybersecurity expert specializing in MITRE ATT&CK techniques. Provide clear, educational examples."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=self.OPENAI_MAX_TOKENS,
-                temperature=self.OPENAI_TEMPERATURE
-            )
-            
-            return response.choices[0].message.content.strip()
+            completion = await self.complete(prompt)
+            return completion.text
             
+        except CircuitOpenError:
+            raise
         except Exception as e:
             logger.error(f"OpenAI API call failed: {str(e)}")
             raise Exception(f"OpenAI API call failed: {str(e)}")
     
-    def test_connection(self) -> bool:
+    async def check_upstream(self, timeout: float = 5.0):
+        """
+        Cheap reachability check: look up the configured model
+
+        Costs no tokens and bypasses retries and the circuit breaker, so it
+        reports the upstream as it is right now. Raises on any failure.
+        """
+        await self.client.models.retrieve(self.OPENAI_MODEL, timeout=timeout)
+    
+    async def test_connection(self) -> bool:
         """Test if the OpenAI API connection is working"""
         try:
-            # Make a simple test call
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[{"role": "user", "content": "Hello"}],
-                max_tokens=5
-            )
+            await self.check_upstream()
             return True
         except Exception as e:
             logger.error(f"Connection test failed: {str(e)}")
             return False
+    
+    async def aclose(self):
+        """Close the underlying connection pool"""
+        await self.client.close()
+
+
+# Shared application-lifetime client, created on first use
+_shared_client: Optional[LLMClient] = None
+
+def shared_llm_client_stats() -> Optional[Dict[str, Any]]:
+    """Retry/hedge/circuit stats of the shared client, or None if it has not been created"""
+    return _shared_client.resilience.stats() if _shared_client is not None else None
+
+def get_shared_llm_client() -> LLMClient:
+    """Return the process-wide LLM client, creating it on first use"""
+    global _shared_client
+    if _shared_client is None:
+        _shared_client = LLMClient()
+    return _shared_client
+
+async def close_shared_llm_client():
+    """Close the process-wide LLM client, if one was created"""
+    global _shared_client
+    if _shared_client is not None:
+        client, _shared_client = _shared_client, None
+        await client.aclose()
@@ -0,0 +1,141 @@
+import asyncio
+import os
+import time
+from typing import Callable, Dict, Optional
+
+from utils.llm_client import LLMClient, get_shared_llm_client, load_openai, shared_llm_client_stats
+from utils.resilience import LatencyWindow
+
+# LLM health probe configuration - loaded from environment variables or defaults
+LLM_HEALTH_INTERVAL = float(os.getenv("LLM_HEALTH_INTERVAL", "15"))  # seconds between probes, 0 disables probing
+LLM_HEALTH_TIMEOUT = float(os.getenv("LLM_HEALTH_TIMEOUT", "5"))
+LLM_HEALTH_FAILURES = int(os.getenv("LLM_HEALTH_FAILURES", "2"))  # consecutive failed probes before "down"
+# Whether /health/ready reports not-ready while the LLM upstream is down. Off by default: catalog,
+# search, graph and feedback never call the LLM, and generations already fail fast on the circuit breaker
+LLM_HEALTH_GATES_READINESS = os.getenv("LLM_HEALTH_GATES_READINESS", "false").lower() == "true"
+
+UNKNOWN, UP, DOWN, STALE, UNCONFIGURED = "unknown", "up", "down", "stale", "unconfigured"
+
+
+class LLMHealthProber:
+    """
+    Checks the LLM upstream in the background and keeps the last result
+
+    Health endpoints read the cached status instead of calling the upstream,
+    so a load balancer polling every few seconds costs nothing upstream and
+    never blocks the event loop. A probe is a model lookup, not a completion.
+    """
+
+    def __init__(
+        self,
+        client_factory: Callable[[], LLMClient] = get_shared_llm_client,
+        interval: float = LLM_HEALTH_INTERVAL,
+        timeout: float = LLM_HEALTH_TIMEOUT,
+        failure_threshold: int = LLM_HEALTH_FAILURES,
+    ):
+        self.client_factory = client_factory
+        self.interval = interval
+        self.timeout = timeout
+        self.failure_threshold = max(1, failure_threshold)
+        self.state = UNKNOWN
+        self.error: Optional[str] = None
+        self.latency: Optional[float] = None
+        self.latencies = LatencyWindow(size=100)
+        self.checked_at: Optional[float] = None
+        self.last_success_at: Optional[float] = None
+        self.consecutive_failures = 0
+        self.probes = 0
+        self.failures = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def probe(self) -> str:
+        """Check the upstream once and record the outcome; returns the new state"""
+        try:
+            client = self.client_factory()
+        except ValueError as e:  # no API key: nothing to probe
+            self.state, self.error = UNCONFIGURED, str(e)
+            self.checked_at = time.time()
+            return self.state
+
+        start = time.perf_counter()
+        try:
+            await client.check_upstream(self.timeout)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.consecutive_failures += 1
+            self.failures += 1
+            self.error = f"{type(e).__name__}: {str(e)}"
+            if self.consecutive_failures >= self.failure_threshold:
+                self.state = DOWN
+        else:
+            self.latency = time.perf_counter() - start
+            self.latencies.observe(self.latency)
+            self.consecutive_failures = 0
+            self.error = None
+            self.state = UP
+            self.last_success_at = time.time()
+        self.probes += 1
+        self.checked_at = time.time()
+        return self.state
+
+    async def _run(self):
+        # Import the SDK on a worker thread so the first probe (or generation) does not stall the event loop
+        if os.getenv("OPENAI_API_KEY"):
+            await asyncio.to_thread(load_openai)
+        while True:
+            await self.probe()
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """Start probing on the running event loop (the first probe runs immediately)"""
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def current_state(self) -> str:
+        """The cached state, or "stale" when the prober has stopped reporting"""
+        if self.state in (UP, DOWN) and self.checked_at is not None:
+            if time.time() - self.checked_at > 3 * self.interval + self.timeout:
+                return STALE
+        return self.state
+
+    def ready(self) -> bool:
+        """Whether the upstream counts as usable; unconfigured or unprobed upstreams never block readiness"""
+        return self.current_state() not in (DOWN, STALE)
+
+    def status(self) -> Dict[str, object]:
+        upstream = shared_llm_client_stats()
+        return {
+            "state": self.current_state(),
+            "probing": self._task is not None,
+            "interval": self.interval,
+            "checked_at": self.checked_at,
+            "last_success_at": self.last_success_at,
+            "latency_ms": round(self.latency * 1000, 1) if self.latency is not None else None,
+            "latency_p95_ms": round(self.latencies.percentile(0.95) * 1000, 1) if len(self.latencies) else None,
+            "consecutive_failures": self.consecutive_failures,
+            "probes": self.probes,
+            "failures": self.failures,
+            "error": self.error,
+            "circuit": upstream["circuit"]["state"] if upstream and upstream["circuit"] else None,
+        }
+
+
+_prober: Optional[LLMHealthProber] = None
+
+
+def get_llm_health() -> LLMHealthProber:
+    """Return the process-wide prober (started by the application on startup)"""
+    global _prober
+    if _prober is None:
+        _prober = LLMHealthProber()
+    return _prober
@@ -1,97 +1,209 @@
+import atexit
+import json
 import logging
+import logging.handlers
 import os
+import queue
+import random
 from datetime import datetime
 from typing import Any, Dict, Optional
 
+# Logging configuration - loaded from environment variables or defaults
+LOG_FILE = os.getenv("LOG_FILE", "app.log")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")  # "text" or "json" (one object per line)
+# Size-based rotation is only safe with a single process writing LOG_FILE: with several uvicorn
+# workers each one rotates on its own and lines get lost. Set 0 there and rotate externally
+# (e.g. logrotate); the file is then reopened whenever it is moved or truncated.
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024)))  # 0 = no in-process rotation
+LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+LOG_CONSOLE = os.getenv("LOG_CONSOLE", "true").lower() == "true"
+# Comma separated path prefixes whose requests are never logged, e.g. "/static/,/health"
+LOG_EXCLUDE_PATHS = [p.strip() for p in os.getenv("LOG_EXCLUDE_PATHS", "").split(",") if p.strip()]
+# Fraction of static asset requests (/static/... or a file extension) to log
+LOG_STATIC_SAMPLE_RATE = float(os.getenv("LOG_STATIC_SAMPLE_RATE", "1.0"))
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: timestamp, level, logger, message and the event's fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", None) or {})
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that leaves formatting to the listener thread
+
+    The stock prepare() renders the message on the calling thread; here the
+    record is queued as-is so the event loop only pays for an enqueue.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+# Extensions of the frontend files served from the site root
+STATIC_EXTENSIONS = (".js", ".css", ".html", ".csv", ".png", ".svg", ".ico")
+
+
+def is_static_path(path: str) -> bool:
+    """Frontend files: anything under /static/ or ending in an asset extension (not /api/techniques/T1556.003)"""
+    if path.startswith("/static/"):
+        return True
+    return not path.startswith("/api/") and path.lower().endswith(STATIC_EXTENSIONS)
+
+
 class AppLogger:
     """Centralized logging for the MITRE ATT&CK application"""
-    
-    def __init__(self, log_file: str = "app.log"):
+
+    def __init__(self, log_file: str = LOG_FILE):
         self.log_file = log_file
+        self.listener: Optional[logging.handlers.QueueListener] = None
         self._setup_logger()
-    
+
     def _setup_logger(self):
         """Setup the main application logger"""
         # Create logs directory if it doesn't exist
         os.makedirs('logs', exist_ok=True)
-        
+
         # Configure the main logger
         self.logger = logging.getLogger('mitre_attack_app')
         self.logger.setLevel(logging.INFO)
-        
+        # Records are written by our own handlers; don't also hand them to the root logger
+        self.logger.propagate = False
+
         # Prevent duplicate handlers
         if not self.logger.handlers:
-            # File handler for app.log
-            file_handler = logging.FileHandler(self.log_file, encoding='utf-8')
-            file_handler.setLevel(logging.INFO)
-            
+            # File handler for app.log, rotated by size (single process) or externally (several workers)
+            if LOG_MAX_BYTES > 0:
+                file_handler = logging.handlers.RotatingFileHandler(
+                    self.log_file, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding='utf-8'
+                )
+            else:
+                file_handler = logging.handlers.WatchedFileHandler(self.log_file, encoding='utf-8')
+            handlers = [file_handler]
+
             # Console handler for development
-            console_handler = logging.StreamHandler()
-            console_handler.setLevel(logging.INFO)
-            
+            if LOG_CONSOLE:
+                handlers.append(logging.StreamHandler())
+
             # Create formatter
-            formatter = logging.Formatter(
-                '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-                datefmt='%Y-%m-%d %H:%M:%S'
-            )
-            
-            file_handler.setFormatter(formatter)
-            console_handler.setFormatter(formatter)
-            
-            self.logger.addHandler(file_handler)
-            self.logger.addHandler(console_handler)
-    
+            if LOG_FORMAT == "json":
+                formatter = JsonFormatter()
+            else:
+                formatter = logging.Formatter(TEXT_FORMAT, datefmt=DATE_FORMAT)
+
+            for handler in handlers:
+                handler.setLevel(logging.INFO)
+                handler.setFormatter(formatter)
+
+            # Callers only enqueue; a listener thread formats and does the I/O
+            log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+            self.logger.addHandler(DeferredQueueHandler(log_queue))
+            self.listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+            self.listener.start()
+            atexit.register(self.stop)
+
+    def stop(self):
+        """Flush queued records and stop the listener thread"""
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+
+    def _log(self, level: int, message: str, *args: Any, **fields: Any):
+        """Log with %-style args (rendered on the listener thread) and structured fields for JSON output"""
+        if self.logger.isEnabledFor(level):
+            self.logger.log(level, message, *args, extra={"fields": fields})
+
+    def should_log_request(self, path: str) -> bool:
+        """Apply LOG_EXCLUDE_PATHS and static asset sampling to one request"""
+        if any(path.startswith(prefix) for prefix in LOG_EXCLUDE_PATHS):
+            return False
+        if LOG_STATIC_SAMPLE_RATE < 1.0 and is_static_path(path):
+            return random.random() < LOG_STATIC_SAMPLE_RATE
+        return True
+
     def log_request(self, method: str, path: str, client_ip: str, user_agent: str = None):
         """Log incoming API requests"""
-        self.logger.info(
-            f"REQUEST: {method} {path} | IP: {client_ip} | UA: {user_agent or 'Unknown'}"
+        user_agent = user_agent or 'Unknown'
+        self._log(
+            logging.INFO, "REQUEST: %s %s | IP: %s | UA: %s", method, path, client_ip, user_agent,
+            event="request", method=method, path=path, client_ip=client_ip, user_agent=user_agent
         )
-    
+
     def log_response(self, method: str, path: str, status_code: int, response_time: float):
         """Log API responses"""
-        self.logger.info(
-            f"RESPONSE: {method} {path} | Status: {status_code} | Time: {response_time:.3f}s"
+        self._log(
+            logging.INFO, "RESPONSE: %s %s | Status: %s | Time: %.3fs", method, path, status_code, response_time,
+            event="response", method=method, path=path, status_code=status_code, response_time=round(response_time, 6)
         )
-    
+
     def log_error(self, method: str, path: str, error: Exception, status_code: int = 500):
         """Log API errors"""
-        self.logger.error(
-            f"ERROR: {method} {path} | Status: {status_code} | Error: {str(error)} | Type: {type(error).__name__}"
+        self._log(
+            logging.ERROR, "ERROR: %s %s | Status: %s | Error: %s | Type: %s",
+            method, path, status_code, error, type(error).__name__,
+            event="error", method=method, path=path, status_code=status_code,
+            error=str(error), error_type=type(error).__name__
         )
-    
+
     def log_llm_request(self, technique_name: str, prompt_length: int):
         """Log LLM API requests"""
-        self.logger.info(
-            f"LLM_REQUEST: Technique: {technique_name} | Prompt Length: {prompt_length} chars"
+        self._log(
+            logging.INFO, "LLM_REQUEST: Technique: %s | Prompt Length: %s chars", technique_name, prompt_length,
+            event="llm_request", technique=technique_name, prompt_length=prompt_length
         )
-    
+
     def log_llm_response(self, technique_name: str, response_length: int, response_time: float):
         """Log LLM API responses"""
-        self.logger.info(
-            f"LLM_RESPONSE: Technique: {technique_name} | Response Length: {response_length} chars | Time: {response_time:.3f}s"
+        self._log(
+            logging.INFO, "LLM_RESPONSE: Technique: %s | Response Length: %s chars | Time: %.3fs",
+            technique_name, response_length, response_time,
+            event="llm_response", technique=technique_name, response_length=response_length,
+            response_time=round(response_time, 6)
         )
-    
+
     def log_llm_error(self, technique_name: str, error: Exception):
         """Log LLM API errors"""
-        self.logger.error(
-            f"LLM_ERROR: Technique: {technique_name} | Error: {str(error)} | Type: {type(error).__name__}"
+        self._log(
+            logging.ERROR, "LLM_ERROR: Technique: %s | Error: %s | Type: %s",
+            technique_name, error, type(error).__name__,
+            event="llm_error", technique=technique_name, error=str(error), error_type=type(error).__name__
         )
-    
+
+    def log_llm_cache(self, technique_name: str, hit: bool):
+        """Log LLM response cache lookups"""
+        status = "HIT" if hit else "MISS"
+        self._log(
+            logging.INFO, "LLM_CACHE: Technique: %s | Status: %s", technique_name, status,
+            event="llm_cache", technique=technique_name, hit=hit
+        )
+
     def log_feedback(self, action: str, technique: str, feedback_type: str, success: bool):
         """Log feedback operations"""
         status = "SUCCESS" if success else "FAILED"
-        self.logger.info(
-            f"FEEDBACK: {action} | Technique: {technique} | Type: {feedback_type} | Status: {status}"
+        self._log(
+            logging.INFO, "FEEDBACK: %s | Technique: %s | Type: %s | Status: %s",
+            action, technique, feedback_type, status,
+            event="feedback", action=action, technique=technique, feedback_type=feedback_type, success=success
         )
-    
+
     def log_system(self, message: str, level: str = "INFO"):
         """Log system-level messages"""
-        if level.upper() == "ERROR":
-            self.logger.error(f"SYSTEM: {message}")
-        elif level.upper() == "WARNING":
-            self.logger.warning(f"SYSTEM: {message}")
-        else:
-            self.logger.info(f"SYSTEM: {message}")
+        levels = {"ERROR": logging.ERROR, "WARNING": logging.WARNING}
+        self._log(levels.get(level.upper(), logging.INFO), "SYSTEM: %s", message, event="system")
 
 # Global logger instance
 app_logger = AppLogger()
@@ -0,0 +1,188 @@
+import bisect
+import math
+import threading
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+# Default latency buckets in seconds (Prometheus client defaults plus a long tail for LLM calls)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Route label for requests that matched no route, so 404 scans cannot blow up cardinality
+UNMATCHED_ROUTE = "unmatched"
+
+
+def escape_label(value: object) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(names: Sequence[str], values: Sequence[object], extra: str = "") -> str:
+    pairs = [f'{name}="{escape_label(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Metric:
+    """
+    Base for labelled metrics
+
+    Recording is lock-free: each series is a small list updated in place, and
+    the lock is only taken the first time a label combination is seen. Series
+    are updated from the event loop or from a single worker thread, so plain
+    in-place arithmetic under the GIL is enough.
+    """
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def _new_series(self) -> list:
+        return [0.0]
+
+    def _get(self, label_values: Tuple[str, ...]) -> list:
+        series = self._series.get(label_values)
+        if series is None:
+            with self._lock:
+                series = self._series.setdefault(label_values, self._new_series())
+        return series
+
+    def _snapshot(self) -> List[Tuple[Tuple[str, ...], list]]:
+        """Sorted copy of the series, taken under the lock so request threads can keep adding new ones"""
+        with self._lock:
+            items = [(label_values, list(series)) for label_values, series in self._series.items()]
+        return sorted(items)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for label_values, series in self._snapshot():
+            lines.append(f"{self.name}{format_labels(self.labels, label_values)} {format_value(series[0])}")
+        return lines
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, *label_values: str, amount: float = 1):
+        self._get(label_values)[0] += amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def inc(self, *label_values: str, amount: float = 1):
+        self._get(label_values)[0] += amount
+
+    def dec(self, *label_values: str, amount: float = 1):
+        self._get(label_values)[0] -= amount
+
+    def set(self, value: float, *label_values: str):
+        self._get(label_values)[0] = value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_series(self) -> list:
+        # Per-bucket (non-cumulative) counts, one overflow bucket, then sum and count
+        return [0] * (len(self.buckets) + 1) + [0.0, 0]
+
+    def observe(self, value: float, *label_values: str):
+        series = self._get(label_values)
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for label_values, series in self._snapshot():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), series):
+                cumulative += count
+                le = f'le="{format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{format_labels(self.labels, label_values, le)} {cumulative}")
+            labels = format_labels(self.labels, label_values)
+            lines.append(f"{self.name}_sum{labels} {format_value(series[-2])}")
+            lines.append(f"{self.name}_count{labels} {series[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    """Metrics plus collectors that read other components' stats at scrape time"""
+
+    def __init__(self):
+        self.metrics: List[Metric] = []
+        self.collectors: List[Callable[[], Iterable[str]]] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labels))
+
+    def gauge(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labels))
+
+    def histogram(self, name: str, documentation: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labels, buckets))
+
+    def register_collector(self, collector: Callable[[], Iterable[str]]):
+        """collector() returns exposition lines (HELP/TYPE included) and runs on every scrape"""
+        self.collectors.append(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        for collector in self.collectors:
+            lines.extend(collector())
+        return "\n".join(lines) + "\n"
+
+
+def gauge_lines(name: str, documentation: str, samples: Dict[Tuple[Tuple[str, object], ...], float], kind: str = "gauge") -> List[str]:
+    """Exposition lines for values computed at scrape time; samples maps ((label, value), ...) -> number"""
+    lines = [f"# HELP {name} {documentation}", f"# TYPE {name} {kind}"]
+    for labels, value in samples.items():
+        lines.append(f"{name}{format_labels([l for l, _ in labels], [v for _, v in labels])} {format_value(value)}")
+    return lines
+
+
+# Global registry and the instruments the application records into
+metrics = MetricsRegistry()
+
+HTTP_REQUESTS = metrics.counter(
+    "http_requests_total", "HTTP requests by method, route template and status code", ("method", "route", "status")
+)
+HTTP_LATENCY = metrics.histogram(
+    "http_request_duration_seconds", "Time until response headers, by method and route template", ("method", "route")
+)
+HTTP_IN_FLIGHT = metrics.gauge("http_requests_in_flight", "HTTP requests currently being handled")
+LLM_LATENCY = metrics.histogram(
+    "llm_request_duration_seconds", "OpenAI chat completion latency by operation and outcome", ("operation", "outcome")
+)
+LLM_TOKENS = metrics.counter("llm_tokens_total", "Tokens reported in OpenAI usage, by type", ("type",))
+LLM_RETRIES = metrics.counter("llm_retries_total", "OpenAI call retries by operation and error type", ("operation", "error"))
+LLM_HEDGES = metrics.counter("llm_hedged_requests_total", "Hedge requests sent, and how many finished first", ("result",))
+FEEDBACK_WRITE_LATENCY = metrics.histogram(
+    "feedback_write_duration_seconds", "Feedback store batch commit latency", ("backend",)
+)
+FEEDBACK_WRITES = metrics.counter("feedback_writes_total", "Feedback records written", ("backend",))
+
+
+def record_llm_usage(prompt_tokens: int, completion_tokens: int):
+    LLM_TOKENS.inc("prompt", amount=prompt_tokens)
+    LLM_TOKENS.inc("completion", amount=completion_tokens)
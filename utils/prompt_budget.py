@@ -0,0 +1,99 @@
+import math
+import os
+import re
+from functools import lru_cache
+from typing import Callable, List, Optional
+
+try:
+    import tiktoken
+except ImportError:  # tiktoken is optional; token counts are estimated without it
+    tiktoken = None
+
+# Prompt budget configuration - loaded from environment variables or defaults
+LLM_PROMPT_MAX_TOKENS = int(os.getenv("LLM_PROMPT_MAX_TOKENS", "1024"))  # whole prompt incl. system message, 0 = no limit
+LLM_TOKENIZER_ENCODING = os.getenv("LLM_TOKENIZER_ENCODING", "cl100k_base")  # tiktoken encoding (gpt-3.5/gpt-4)
+
+# [link text](https://...) -> link text
+MARKDOWN_LINK = re.compile(r"\[([^\]]+)\]\((?:https?://|/)[^)\s]*\)")
+# (Citation: Some Report 2021), possibly several in a row
+CITATION = re.compile(r"\s*\(Citation:[^)]*\)")
+HTML_TAG = re.compile(r"</?[a-zA-Z][^>]*>")
+WHITESPACE = re.compile(r"\s+")
+# Sentence ends: punctuation followed by whitespace and an upper-case letter, digit or quote
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9\"'(])")
+# Rough GPT-style pre-tokenization used when tiktoken is not installed
+ESTIMATE_PIECES = re.compile(r"\w+|[^\w\s]")
+
+
+def clean_description(text: str) -> str:
+    """Drop markdown link targets, citation markers and HTML tags, and collapse whitespace"""
+    text = MARKDOWN_LINK.sub(r"\1", text or "")
+    text = CITATION.sub("", text)
+    text = HTML_TAG.sub("", text)
+    return WHITESPACE.sub(" ", text).strip()
+
+
+def estimate_tokens(text: str) -> int:
+    """Upper-leaning estimate: one token per punctuation mark, one per 4 characters of each word"""
+    return sum(math.ceil(len(piece) / 4) if piece[0].isalnum() or piece[0] == "_" else 1
+               for piece in ESTIMATE_PIECES.findall(text))
+
+
+def _load_counter() -> Callable[[str], int]:
+    if tiktoken is not None:
+        try:
+            encoding = tiktoken.get_encoding(LLM_TOKENIZER_ENCODING)
+            return lambda text: len(encoding.encode(text, disallowed_special=()))
+        except Exception:
+            pass  # encoding files not cached locally and no network: estimate instead
+    return estimate_tokens
+
+
+_counter: Optional[Callable[[str], int]] = None
+
+
+def count_tokens(text: str) -> int:
+    """Prompt tokens for text, with tiktoken when available"""
+    global _counter
+    if _counter is None:
+        _counter = _load_counter()
+    return _counter(text)
+
+
+def tokenizer_name() -> str:
+    count_tokens("")
+    return f"tiktoken:{LLM_TOKENIZER_ENCODING}" if _counter is not estimate_tokens else "estimate"
+
+
+def fit_to_budget(text: str, max_tokens: int) -> str:
+    """
+    Longest prefix of whole sentences within max_tokens
+
+    When even the first sentence is too long it is cut at a word boundary.
+    The result ends with an ellipsis whenever something was dropped.
+    """
+    if max_tokens <= 0 or count_tokens(text) <= max_tokens:
+        return text
+    kept: List[str] = []
+    used = 0
+    for sentence in SENTENCE_END.split(text):
+        cost = count_tokens(sentence + " ")
+        if used + cost > max_tokens:
+            break
+        kept.append(sentence)
+        used += cost
+    if kept:
+        return " ".join(kept) + " ..."
+    words, kept_words = text.split(" "), []
+    for word in words:
+        used += count_tokens(word + " ")
+        if used > max_tokens - 1:
+            break
+        kept_words.append(word)
+    return " ".join(kept_words) + " ..."
+
+
+@lru_cache(maxsize=2048)
+def compact_description(description: str, max_tokens: int) -> str:
+    """Cleaned description fitted to max_tokens (cached: catalog descriptions repeat)"""
+    return fit_to_budget(clean_description(description), max_tokens)
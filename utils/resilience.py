@@ -0,0 +1,277 @@
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Optional, Tuple, Type, TypeVar
+
+from utils.metrics import LLM_HEDGES, LLM_RETRIES
+from utils.startup import import_lazily
+
+T = TypeVar("T")
+
+
+class AttemptTimeout(asyncio.TimeoutError):
+    """One upstream attempt (including its hedge) took longer than the per-attempt timeout"""
+
+
+class CircuitOpenError(Exception):
+    """Raised without calling the upstream while the circuit breaker is open"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Upstream unavailable (circuit open), retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+_retryable_errors: Optional[Tuple[Type[BaseException], ...]] = None
+
+
+def retryable_errors() -> Tuple[Type[BaseException], ...]:
+    """
+    Failures that say the upstream is slow or unhealthy: retried, and counted by the circuit breaker
+
+    Anything else (bad request, authentication) is a real answer from a healthy
+    upstream. The openai package is only imported when this is first needed.
+    """
+    global _retryable_errors
+    if _retryable_errors is None:
+        openai = import_lazily("openai")
+        _retryable_errors = (
+            openai.RateLimitError,
+            openai.APITimeoutError,
+            openai.APIConnectionError,
+            openai.InternalServerError,
+            AttemptTimeout,
+        )
+    return _retryable_errors
+
+
+def retry_delay(error: BaseException, attempt: int, base: float, cap: float) -> float:
+    """Honour Retry-After when the server sends one, otherwise full-jitter exponential backoff"""
+    response = getattr(error, "response", None)
+    if response is not None:
+        retry_after = response.headers.get("retry-after")
+        if retry_after:
+            try:
+                return min(cap, float(retry_after))
+            except ValueError:
+                pass
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class CircuitBreaker:
+    """
+    Closed -> open after failure_threshold consecutive upstream failures
+
+    While open, calls fail immediately with CircuitOpenError. After
+    reset_timeout seconds a single probe call is let through (half-open):
+    success closes the circuit, failure opens it again.
+    """
+
+    CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self.rejected = 0
+        self._probing = False
+
+    def retry_after(self) -> int:
+        return max(1, int(round(self.opened_at + self.reset_timeout - time.monotonic())))
+
+    def before_call(self):
+        """Admit a call or raise CircuitOpenError"""
+        if self.state == self.OPEN and time.monotonic() >= self.opened_at + self.reset_timeout:
+            self.state = self.HALF_OPEN
+        if self.state == self.OPEN or (self.state == self.HALF_OPEN and self._probing):
+            self.rejected += 1
+            raise CircuitOpenError(self.retry_after() if self.state == self.OPEN else 1)
+        if self.state == self.HALF_OPEN:
+            self._probing = True
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.times_opened += 1
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+        self._probing = False
+
+    def record_abandoned(self):
+        """The call was cancelled before it told us anything"""
+        self._probing = False
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "failure_threshold": self.failure_threshold,
+            "reset_timeout": self.reset_timeout,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+            "retry_after": self.retry_after() if self.state == self.OPEN else 0,
+        }
+
+
+class LatencyWindow:
+    """Recent successful attempt latencies, for picking the hedging delay"""
+
+    def __init__(self, size: int = 200):
+        self._samples: Deque[float] = deque(maxlen=size)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def observe(self, seconds: float):
+        self._samples.append(seconds)
+
+    def percentile(self, fraction: float) -> float:
+        samples = sorted(self._samples)
+        return samples[min(len(samples) - 1, int(fraction * len(samples)))] if samples else 0.0
+
+
+class ResilientCaller:
+    """
+    Per-attempt timeout, jittered retries, optional hedging and a circuit breaker around an async call
+
+    Hedging: once hedge_min_samples latencies have been seen, an attempt still
+    running after the hedge_percentile latency (but at least hedge_min_delay)
+    gets a second, identical request; whichever finishes first wins and the
+    other is cancelled.
+    """
+
+    def __init__(
+        self,
+        max_retries: int = 2,
+        attempt_timeout: float = 0.0,
+        backoff_base: float = 0.5,
+        backoff_cap: float = 8.0,
+        hedge: bool = False,
+        hedge_percentile: float = 0.95,
+        hedge_min_delay: float = 1.0,
+        hedge_min_samples: int = 20,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.max_retries = max_retries
+        self.attempt_timeout = attempt_timeout
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_min_samples = hedge_min_samples
+        self.breaker = breaker
+        self.latencies = LatencyWindow()
+        self.retries = 0
+        self.hedges_sent = 0
+        self.hedges_won = 0
+
+    def check(self):
+        """Raise CircuitOpenError now rather than after queueing for a slot"""
+        if self.breaker is not None and self.breaker.state == CircuitBreaker.OPEN:
+            if time.monotonic() < self.breaker.opened_at + self.breaker.reset_timeout:
+                self.breaker.rejected += 1
+                raise CircuitOpenError(self.breaker.retry_after())
+
+    def hedge_delay(self) -> Optional[float]:
+        if not self.hedge or len(self.latencies) < self.hedge_min_samples:
+            return None
+        return max(self.hedge_min_delay, self.latencies.percentile(self.hedge_percentile))
+
+    async def call(self, fn: Callable[[], Awaitable[T]], operation: str = "complete", hedge: bool = True) -> T:
+        """
+        Run fn until it succeeds, a non-retryable error occurs or retries run out
+
+        Raises:
+            CircuitOpenError: the breaker is open (no request was made)
+            The last error from fn otherwise
+        """
+        attempt = 0
+        while True:
+            if self.breaker is not None:
+                self.breaker.before_call()
+            try:
+                result = await self._attempt(fn, hedge)
+            except retryable_errors() as e:
+                if self.breaker is not None:
+                    self.breaker.record_failure()
+                # Give up on the last attempt, or when this failure just opened the circuit
+                if attempt >= self.max_retries or (self.breaker is not None and self.breaker.state == CircuitBreaker.OPEN):
+                    raise
+                self.retries += 1
+                LLM_RETRIES.inc(operation, type(e).__name__)
+                await asyncio.sleep(retry_delay(e, attempt, self.backoff_base, self.backoff_cap))
+                attempt += 1
+                continue
+            except asyncio.CancelledError:
+                if self.breaker is not None:
+                    self.breaker.record_abandoned()
+                raise
+            except Exception:
+                if self.breaker is not None:
+                    self.breaker.record_success()
+                raise
+            if self.breaker is not None:
+                self.breaker.record_success()
+            return result
+
+    async def _attempt(self, fn: Callable[[], Awaitable[T]], hedge: bool) -> T:
+        """One attempt: the request, plus a hedge if it runs long, bounded by attempt_timeout"""
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        deadline = start + self.attempt_timeout if self.attempt_timeout else None
+        hedge_at = self.hedge_delay() if hedge else None
+        first = asyncio.ensure_future(fn())
+        tasks = [first]
+        hedged = False
+        error: Optional[BaseException] = None
+        try:
+            while tasks:
+                timeout = None if deadline is None else max(0.0, deadline - loop.time())
+                if hedge_at is not None and not hedged:
+                    until_hedge = max(0.0, start + hedge_at - loop.time())
+                    timeout = until_hedge if timeout is None else min(timeout, until_hedge)
+                done, _ = await asyncio.wait(tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    tasks.remove(task)
+                    if task.exception() is None:
+                        self.latencies.observe(loop.time() - start)
+                        if hedged and task is not first:
+                            self.hedges_won += 1
+                            LLM_HEDGES.inc("won")
+                        return task.result()
+                    error = task.exception()
+                if done:
+                    continue
+                if hedge_at is not None and not hedged and (deadline is None or loop.time() < deadline):
+                    tasks.append(asyncio.ensure_future(fn()))
+                    hedged = True
+                    self.hedges_sent += 1
+                    LLM_HEDGES.inc("sent")
+                    continue
+                raise AttemptTimeout(f"No upstream response within {self.attempt_timeout:g}s")
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "max_retries": self.max_retries,
+            "attempt_timeout": self.attempt_timeout,
+            "retries": self.retries,
+            "hedging": self.hedge,
+            "hedge_delay": self.hedge_delay(),
+            "hedges_sent": self.hedges_sent,
+            "hedges_won": self.hedges_won,
+            "circuit": self.breaker.stats() if self.breaker is not None else None,
+        }
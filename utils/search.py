@@ -0,0 +1,251 @@
+import bisect
+import html
+import math
+import re
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from utils.catalog import CatalogVersion, TechniqueCatalog, current_catalog_version, is_subtechnique
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Per-field weights folded into term frequency and document length (BM25F-style)
+FIELD_WEIGHTS = {
+    "id": 5.0,
+    "name": 3.0,
+    "description": 1.0,
+}
+
+# Prefix expansions score a little below exact term matches
+PREFIX_PENALTY = 0.8
+MAX_PREFIX_EXPANSIONS = 50
+
+# Snippet window, in tokens
+SNIPPET_TOKENS = 30
+
+STOP_WORDS = frozenset(
+    "a an and are as at be by for from has have in is it its may of on or "
+    "that the their this to was were which with".split()
+)
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+# Markdown links and citation markers are noise for both matching and snippets
+CITATION_RE = re.compile(r"\(Citation:[^)]*\)")
+LINK_RE = re.compile(r"\[([^\]]+)\]\([^)]*\)")
+
+
+def clean_text(text: str) -> str:
+    """Drop citation markers and reduce markdown links to their label"""
+    return LINK_RE.sub(r"\1", CITATION_RE.sub("", text or ""))
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens without stop words"""
+    return [t for t in TOKEN_RE.findall((text or "").lower()) if t not in STOP_WORDS]
+
+
+def id_tokens(technique_id: str) -> List[str]:
+    """T1556.003 is searchable as 't1556.003', 't1556' and '003'"""
+    technique_id = (technique_id or "").lower()
+    return [technique_id] + TOKEN_RE.findall(technique_id) if "." in technique_id else [technique_id]
+
+
+class SearchDocument:
+    """One technique (deduplicated across tactics) in the index"""
+
+    __slots__ = ("technique_id", "name", "description", "rows", "length", "terms")
+
+    def __init__(self, technique_id: str, name: str, description: str, rows: List[int]):
+        self.technique_id = technique_id
+        self.name = name
+        self.description = description
+        self.rows = rows
+        self.length = 0.0
+        self.terms: Dict[str, float] = {}  # term -> field-weighted frequency
+
+
+class SearchIndex:
+    """Inverted index with BM25 ranking over technique IDs, names and descriptions"""
+
+    def __init__(
+        self,
+        catalog: TechniqueCatalog,
+        previous: Optional["SearchIndex"] = None,
+        changed: Optional[FrozenSet[str]] = None,
+    ):
+        """
+        Args:
+            previous, changed: Index of the previous catalog version and the technique
+                IDs that differ from it; unchanged techniques reuse its tokenization
+        """
+        self.catalog = catalog
+        self.documents: List[SearchDocument] = []
+        self.postings: Dict[str, Dict[int, float]] = {}
+        self.vocabulary: List[str] = []
+        self.average_length = 0.0
+        self.reused = 0
+        reusable = {}
+        if previous is not None and changed is not None:
+            reusable = {d.technique_id: d for d in previous.documents if d.technique_id not in changed}
+        self._build(reusable)
+
+    def _build(self, reusable: Dict[str, SearchDocument]):
+        columns = self.catalog.columns
+        for technique_id, rows in self.catalog.by_technique_id.items():
+            first = rows[0]
+            known = reusable.get(columns["Technique_ID"][first])
+            if known is not None:
+                doc = SearchDocument(known.technique_id, known.name, known.description, rows)
+                doc.length, doc.terms = known.length, known.terms
+                self.reused += 1
+            else:
+                doc = self._document(columns["Technique_ID"][first], columns["Technique_Name"][first],
+                                     columns["Technique_Description"][first], rows)
+            doc_number = len(self.documents)
+            self.documents.append(doc)
+            for term, weight in doc.terms.items():
+                self.postings.setdefault(term, {})[doc_number] = weight
+
+        if self.documents:
+            self.average_length = sum(d.length for d in self.documents) / len(self.documents)
+        self.vocabulary = sorted(self.postings)
+
+    @staticmethod
+    def _document(technique_id: str, name: str, description: str, rows: List[int]) -> SearchDocument:
+        """Tokenize one technique into field-weighted term frequencies"""
+        doc = SearchDocument(technique_id, name, clean_text(description), rows)
+        fields = (
+            ("id", id_tokens(doc.technique_id)),
+            ("name", tokenize(doc.name)),
+            ("description", tokenize(doc.description)),
+        )
+        for field, tokens in fields:
+            weight = FIELD_WEIGHTS[field]
+            doc.length += weight * len(tokens)
+            for token in tokens:
+                doc.terms[token] = doc.terms.get(token, 0.0) + weight
+        return doc
+
+    def _idf(self, term: str) -> float:
+        n = len(self.postings.get(term, ()))
+        return math.log(1 + (len(self.documents) - n + 0.5) / (n + 0.5))
+
+    def expand_prefix(self, prefix: str) -> List[str]:
+        """Vocabulary terms starting with prefix, most common first"""
+        start = bisect.bisect_left(self.vocabulary, prefix)
+        matches = []
+        for term in self.vocabulary[start:]:
+            if not term.startswith(prefix):
+                break
+            matches.append(term)
+        matches.sort(key=lambda t: -len(self.postings[t]))
+        return matches[:MAX_PREFIX_EXPANSIONS]
+
+    def query_terms(self, query: str, prefix: bool = True) -> List[Tuple[str, float]]:
+        """Turn a query into (term, boost) pairs; the last word is a prefix for type-ahead"""
+        raw = query.lower()
+        words = raw.split()
+        tokens = tokenize(raw)
+        terms: Dict[str, float] = {t: 1.0 for t in tokens}
+        # Let technique IDs like "t1556.003" match as a whole
+        for word in words:
+            if "." in word and word in self.postings:
+                terms[word] = 1.0
+
+        if prefix and tokens and not raw.endswith(" "):
+            stem = words[-1] if "." in words[-1] else tokens[-1]
+            for term in self.expand_prefix(stem):
+                terms.setdefault(term, PREFIX_PENALTY)
+        return list(terms.items())
+
+    def search(
+        self,
+        query: str,
+        limit: int = 20,
+        offset: int = 0,
+        prefix: bool = True,
+        include_subtechniques: bool = True,
+    ) -> Tuple[int, List[dict]]:
+        """Return (total matches, one page of ranked results with highlights)"""
+        terms = self.query_terms(query, prefix)
+        scores: Dict[int, float] = {}
+        for term, boost in terms:
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = self._idf(term) * boost
+            for doc_number, tf in postings.items():
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.documents[doc_number].length / self.average_length)
+                scores[doc_number] = scores.get(doc_number, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+        if not include_subtechniques:
+            scores = {d: s for d, s in scores.items() if not is_subtechnique(self.documents[d].technique_id)}
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], self.documents[item[0]].technique_id))
+        matched_terms = {term for term, _ in terms}
+        results = []
+        for doc_number, score in ranked[offset:offset + limit]:
+            doc = self.documents[doc_number]
+            results.append({
+                "Technique_ID": doc.technique_id,
+                "Technique_Name": doc.name,
+                "score": round(score, 4),
+                "tactics": [self.catalog.columns["Tactic_Name"][i] for i in doc.rows],
+                "name_highlight": highlight(doc.name, matched_terms),
+                "snippet": snippet(doc.description, matched_terms),
+            })
+        return len(ranked), results
+
+
+def highlight(text: str, terms: set) -> str:
+    """HTML-escape text and wrap matched words in <mark>"""
+    out, last = [], 0
+    for match in TOKEN_RE.finditer(text.lower()):
+        if match.group() in terms:
+            out.append(html.escape(text[last:match.start()]))
+            out.append(f"<mark>{html.escape(text[match.start():match.end()])}</mark>")
+            last = match.end()
+    out.append(html.escape(text[last:]))
+    return "".join(out)
+
+
+def snippet(text: str, terms: set, window: int = SNIPPET_TOKENS) -> str:
+    """Highlighted excerpt around the densest cluster of matched words"""
+    spans = [(m.start(), m.end(), m.group() in terms) for m in TOKEN_RE.finditer(text.lower())]
+    if not spans:
+        return ""
+
+    hits = [i for i, span in enumerate(spans) if span[2]]
+    best_start, best_count = 0, 0
+    for first in hits:
+        count = len(set(
+            text[spans[i][0]:spans[i][1]].lower()
+            for i in hits if first <= i < first + window
+        ))
+        if count > best_count:
+            best_start, best_count = max(0, first - 3), count
+
+    end_token = min(len(spans), best_start + window) - 1
+    start_char = spans[best_start][0]
+    end_char = spans[end_token][1]
+    excerpt = highlight(text[start_char:end_char], terms)
+    if start_char > 0:
+        excerpt = "…" + excerpt
+    if end_char < len(text):
+        excerpt += "…"
+    return excerpt
+
+
+def build_search_index(version: CatalogVersion, previous: Optional[SearchIndex]) -> SearchIndex:
+    return SearchIndex(version.catalog, previous, version.changed)
+
+
+def get_search_index() -> SearchIndex:
+    """Return the search index for the current catalog version, building it if needed"""
+    return current_catalog_version().derived("search", build_search_index)
+
+
+async def get_search_index_async() -> SearchIndex:
+    """get_search_index() without blocking the event loop while the index is still being built"""
+    return await current_catalog_version().derived_async("search", build_search_index)
@@ -0,0 +1,98 @@
+import importlib
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from types import ModuleType
+from typing import Dict, List, Optional, Tuple
+
+
+def process_uptime() -> Optional[float]:
+    """Seconds since this process was launched (Linux only), so interpreter start-up is counted too"""
+    try:
+        with open("/proc/self/stat", "r") as file:
+            # Field 22 is the start time in clock ticks after boot; fields are counted after "(comm)"
+            start_ticks = int(file.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime", "r") as file:
+            uptime = float(file.read().split()[0])
+        return max(0.0, uptime - start_ticks / os.sysconf("SC_CLK_TCK"))
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+class StartupTimer:
+    """
+    Wall-clock breakdown of start-up: imports, each startup step, and the first response
+
+    Phases recorded after the application became ready (lazy imports on first
+    use, background warm-up) are reported separately as deferred.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.before_start = process_uptime()  # interpreter start until this module was imported
+        self.phases: List[Tuple[str, float, float]] = []  # (name, offset, seconds)
+        self.ready_at: Optional[float] = None
+        self.first_response_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def record(self, name: str, seconds: float):
+        with self._lock:
+            self.phases.append((name, self.elapsed() - seconds, seconds))
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def mark_ready(self):
+        self.ready_at = self.elapsed()
+
+    def mark_first_response(self):
+        if self.first_response_at is None and self.ready_at is not None:
+            self.first_response_at = self.elapsed()
+
+    def _since_launch(self, offset: Optional[float]) -> Optional[float]:
+        if offset is None:
+            return None
+        return round(((self.before_start or 0.0) + offset) * 1000, 1)
+
+    def report(self) -> Dict[str, object]:
+        """Milliseconds per phase, plus launch-to-ready and launch-to-first-response totals"""
+        with self._lock:
+            phases = list(self.phases)
+        ready_at = self.ready_at if self.ready_at is not None else float("inf")
+        entry = lambda name, offset, seconds: {"name": name, "start_ms": round(offset * 1000, 1), "ms": round(seconds * 1000, 1)}
+        return {
+            "before_import_ms": round(self.before_start * 1000, 1) if self.before_start is not None else None,
+            "phases": [entry(*p) for p in phases if p[1] < ready_at],
+            "deferred": [entry(*p) for p in phases if p[1] >= ready_at],
+            "ready_ms": self._since_launch(self.ready_at),
+            "first_response_ms": self._since_launch(self.first_response_at),
+        }
+
+    def summary(self) -> str:
+        """One log line: the total and the slowest phases"""
+        report = self.report()
+        slowest = sorted(report["phases"], key=lambda p: -p["ms"])[:5]
+        parts = ", ".join(f"{p['name']} {p['ms']:.0f}ms" for p in slowest)
+        return f"Ready {report['ready_ms']}ms after launch ({parts})"
+
+
+startup_timer = StartupTimer()
+
+
+def import_lazily(name: str) -> ModuleType:
+    """Import a heavy module on first use, recording the time it took as a start-up phase"""
+    if name in sys.modules:
+        # import_module also waits for an import still running in another thread
+        return importlib.import_module(name)
+    with startup_timer.phase(f"import {name}"):
+        return importlib.import_module(name)
@@ -0,0 +1,218 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+from email.utils import formatdate
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+# Static asset configuration - loaded from environment variables or defaults
+STATIC_DIR = os.getenv("STATIC_DIR", ".")
+STATIC_MAX_AGE = int(os.getenv("STATIC_MAX_AGE", "3600"))
+STATIC_BROTLI_QUALITY = int(os.getenv("STATIC_BROTLI_QUALITY", "9"))
+STATIC_GZIP_LEVEL = int(os.getenv("STATIC_GZIP_LEVEL", "9"))
+# Files larger than this are streamed from disk instead of cached in memory
+STATIC_CACHE_MAX_BYTES = int(os.getenv("STATIC_CACHE_MAX_BYTES", str(8 * 1024 * 1024)))
+
+# Frontend files compressed at startup and also served from the site root
+PRECOMPRESS_ASSETS = [
+    "index.html",
+    "network.html",
+    "script.js",
+    "network.js",
+    "styles.css",
+    "mitre.csv",
+]
+
+# Besides the files above, only stylesheets and scripts are served; everything else in
+# STATIC_DIR (Python sources, databases, logs) is not reachable over HTTP
+SERVED_EXTENSIONS = (".js", ".css")
+
+# Below this size compression is not worth the extra header
+MIN_COMPRESS_BYTES = 512
+
+COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json", "image/svg+xml")
+
+# Suffix appended to the content hash so every representation gets its own strong ETag
+ENCODING_TAGS = {"br": "br", "gzip": "gz", "identity": "id"}
+
+
+class CompressedAsset:
+    """One file held in memory in every encoding we can serve"""
+
+    def __init__(self, path: str, mtime_ns: int, size: int, body: bytes):
+        self.path = path
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.media_type = guess_media_type(path)
+        self.last_modified = formatdate(mtime_ns / 1e9, usegmt=True)
+        self.digest = hashlib.sha256(body).hexdigest()[:32]
+        self.bodies: Dict[str, bytes] = {"identity": body}
+
+        if len(body) >= MIN_COMPRESS_BYTES and self.media_type.startswith(COMPRESSIBLE_TYPES):
+            gzipped = gzip.compress(body, compresslevel=STATIC_GZIP_LEVEL, mtime=0)
+            if len(gzipped) < len(body):
+                self.bodies["gzip"] = gzipped
+            if brotli is not None:
+                brotlied = brotli.compress(body, quality=STATIC_BROTLI_QUALITY)
+                if len(brotlied) < len(body):
+                    self.bodies["br"] = brotlied
+
+    def etag(self, encoding: str) -> str:
+        return f'"{self.digest}-{ENCODING_TAGS[encoding]}"'
+
+
+def guess_media_type(path: str) -> str:
+    """Bare media type; Response appends the charset to text/* types itself"""
+    media_type, _ = mimetypes.guess_type(path)
+    if path.endswith(".csv"):
+        media_type = "text/csv"
+    elif path.endswith(".js"):
+        media_type = "text/javascript"  # older mimetypes tables say application/javascript
+    return media_type or "application/octet-stream"
+
+
+def is_served(relative_path: str) -> bool:
+    """Whether a path names one of the frontend files (top level only)"""
+    return relative_path in PRECOMPRESS_ASSETS or (
+        "/" not in relative_path and relative_path.endswith(SERVED_EXTENSIONS)
+    )
+
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    """Parse an Accept-Encoding header into {coding: q}"""
+    codings: Dict[str, float] = {}
+    for part in (header or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        codings[coding] = q
+    return codings
+
+
+def choose_encoding(header: str, available: List[str]) -> str:
+    """Pick the smallest representation the client accepts (br before gzip before identity)"""
+    accepted = parse_accept_encoding(header)
+    wildcard = accepted.get("*", 0.0)
+    for encoding in ("br", "gzip"):
+        if encoding in available and accepted.get(encoding, wildcard) > 0:
+            return encoding
+    return "identity"
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison, as If-None-Match requires"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return any(tag == etag or tag == f"W/{etag}" for tag in candidates)
+
+
+class StaticAssetCache:
+    """Serves files from a directory with precompressed bodies, strong ETags and 304s"""
+
+    def __init__(self, directory: str = STATIC_DIR):
+        self.directory = os.path.realpath(directory)
+        self._assets: Dict[str, CompressedAsset] = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, relative_path: str) -> Optional[str]:
+        """Map a URL path onto an allowed frontend file inside the directory, refusing traversal and dotfiles"""
+        parts = [p for p in relative_path.replace("\\", "/").split("/") if p]
+        if not parts or any(p.startswith(".") for p in parts) or not is_served("/".join(parts)):
+            return None
+        full_path = os.path.realpath(os.path.join(self.directory, *parts))
+        if not full_path.startswith(self.directory + os.sep) or not os.path.isfile(full_path):
+            return None
+        return full_path
+
+    def cached(self, full_path: str) -> Tuple[Optional[CompressedAsset], os.stat_result]:
+        """The cached asset if it is still current (None otherwise), without compressing anything"""
+        stat = os.stat(full_path)
+        asset = self._assets.get(full_path)
+        if asset is not None and asset.mtime_ns == stat.st_mtime_ns and asset.size == stat.st_size:
+            return asset, stat
+        return None, stat
+
+    def get(self, full_path: str) -> Tuple[Optional[CompressedAsset], os.stat_result]:
+        """Return the cached asset for a file, rebuilding it if the file changed on disk"""
+        asset, stat = self.cached(full_path)
+        if asset is not None or stat.st_size > STATIC_CACHE_MAX_BYTES:
+            return asset, stat
+
+        with open(full_path, "rb") as file:
+            body = file.read()
+        asset = CompressedAsset(full_path, stat.st_mtime_ns, stat.st_size, body)
+        with self._lock:
+            self._assets[full_path] = asset
+        return asset, stat
+
+    def precompress(self, relative_paths: List[str] = PRECOMPRESS_ASSETS) -> Dict[str, Dict[str, int]]:
+        """Warm the cache; returns {path: {encoding: bytes}} for logging"""
+        sizes = {}
+        for relative_path in relative_paths:
+            full_path = self.resolve(relative_path)
+            if full_path is None:
+                continue
+            asset, _ = self.get(full_path)
+            if asset is not None:
+                sizes[relative_path] = {enc: len(body) for enc, body in asset.bodies.items()}
+        return sizes
+
+    async def response(self, request: Request, relative_path: str, max_age: int = STATIC_MAX_AGE) -> Response:
+        """Build the response for a GET/HEAD of a static file"""
+        full_path = self.resolve(relative_path)
+        if full_path is None:
+            raise HTTPException(status_code=404, detail="Not Found")
+
+        asset, stat = self.cached(full_path)
+        if asset is None and stat.st_size <= STATIC_CACHE_MAX_BYTES:
+            # Compressing takes tens of milliseconds for the larger files; keep it off the event loop
+            asset, stat = await run_in_threadpool(self.get, full_path)
+        if asset is None:
+            return FileResponse(full_path, stat_result=stat)
+
+        encoding = choose_encoding(request.headers.get("accept-encoding", ""), list(asset.bodies))
+        etag = asset.etag(encoding)
+        # HTML must be revalidated so new script/style versions are picked up promptly
+        cache_control = "no-cache" if asset.media_type.startswith("text/html") else f"public, max-age={max_age}"
+        headers = {
+            "ETag": etag,
+            "Cache-Control": cache_control,
+            "Last-Modified": asset.last_modified,
+            "Vary": "Accept-Encoding",
+        }
+
+        if etag_matches(request.headers.get("if-none-match", ""), etag):
+            return Response(status_code=304, headers=headers)
+
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        body = asset.bodies[encoding]
+        if request.method == "HEAD":
+            headers["Content-Length"] = str(len(body))
+            return Response(status_code=200, headers=headers, media_type=asset.media_type)
+        return Response(content=body, headers=headers, media_type=asset.media_type)
+
+
+# Global asset cache instance
+static_assets = StaticAssetCache()